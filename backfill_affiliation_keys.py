@@ -0,0 +1,71 @@
+"""소속키 컬럼을 채우거나 규칙 변경 후 다시 계산하는 백필
+
+행마다 갱신하지 않고 서로 다른 소속 값마다 한 번씩 갱신합니다.
+
+    python backfill_affiliation_keys.py
+    python backfill_affiliation_keys.py --rules affiliations.json --dry-run
+"""
+import argparse
+import sys
+
+from mpti_core import (
+    AFFILIATION_KEY_COLUMN,
+    AFFILIATIONS_PATH,
+    RESPONSE_TABLE,
+    AffiliationIndex,
+    create_client_from_env,
+    load_affiliation_rules,
+)
+
+PAGE_SIZE = 1000
+
+
+def backfill(sb, index: AffiliationIndex, dry_run: bool = False) -> dict:
+    """소속 값별로 계산한 키가 저장된 키와 다르면 그 소속의 행을 한 번에 갱신"""
+    stale = {}
+    stats = {"scanned": 0, "values": 0, "keys": 0, "updated_values": 0}
+    seen = set()
+    last_id = None
+    while True:
+        query = sb.table(RESPONSE_TABLE).select(f"id,소속,{AFFILIATION_KEY_COLUMN}")
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.order("id").limit(PAGE_SIZE).execute().data or []
+        if not rows:
+            break
+        for row in rows:
+            stats["scanned"] += 1
+            raw = row.get("소속")
+            if raw is None:
+                continue
+            seen.add(raw)
+            key = index.key(raw)
+            if row.get(AFFILIATION_KEY_COLUMN) != key:
+                stale[raw] = key
+        last_id = rows[-1]["id"]
+        print(f"\r확인 {stats['scanned']} · 소속 {len(seen)}", end="", file=sys.stderr, flush=True)
+    print(file=sys.stderr)
+
+    stats["values"] = len(seen)
+    stats["keys"] = len({index.key(raw) for raw in seen})
+    for raw, key in sorted(stale.items()):
+        print(f"{raw!r} -> {key}", file=sys.stderr)
+        if not dry_run:
+            sb.table(RESPONSE_TABLE).update({AFFILIATION_KEY_COLUMN: key}).eq("소속", raw).execute()
+        stats["updated_values"] += 1
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="소속키 백필")
+    parser.add_argument("--rules", default=AFFILIATIONS_PATH, help="소속 규칙 파일 (기본: affiliations.json)")
+    parser.add_argument("--dry-run", action="store_true", help="변경하지 않고 바뀔 소속만 출력")
+    args = parser.parse_args(argv)
+
+    index = AffiliationIndex(load_affiliation_rules(args.rules))
+    stats = backfill(create_client_from_env(), index, dry_run=args.dry_run)
+    print(f"{stats['scanned']:,}행 확인 · 소속 {stats['values']:,}개 → 소속키 {stats['keys']:,}개 · {stats['updated_values']:,}개 소속 갱신")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""기존 응답데이터를 compact 저장 방식으로 다시 쓰는 일회성 백필
+
+컬럼과 중복되는 항목을 응답데이터에서 제거합니다. 복원은 mpti_core.row_to_response가
+컬럼 값과 합쳐서 처리하므로 읽는 쪽은 바뀌지 않습니다.
+
+    python backfill_payloads.py --mode compact_zlib
+    python backfill_payloads.py --dry-run
+"""
+import argparse
+import sys
+
+from mpti_core import PAYLOAD_MODES, RESPONSE_TABLE, compact_payload_row, create_client_from_env
+
+PAGE_SIZE = 1000
+
+
+def backfill(sb, mode: str = "compact", dry_run: bool = False) -> dict:
+    """id 순서로 전체 행을 훑으며 응답데이터를 다시 인코딩"""
+    stats = {"scanned": 0, "updated": 0, "bytes_before": 0, "bytes_after": 0}
+    last_id = None
+    while True:
+        query = sb.table(RESPONSE_TABLE).select("*")
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        rows = query.order("id").limit(PAGE_SIZE).execute().data or []
+        if not rows:
+            break
+
+        for row in rows:
+            stats["scanned"] += 1
+            before = row.get("응답데이터") or ""
+            encoded = compact_payload_row(row, mode)
+            stats["bytes_before"] += len(before.encode("utf-8"))
+            if encoded is None:
+                stats["bytes_after"] += len(before.encode("utf-8"))
+                continue
+            stats["bytes_after"] += len(encoded.encode("utf-8"))
+            if not dry_run:
+                sb.table(RESPONSE_TABLE).update({"응답데이터": encoded}).eq("id", row["id"]).execute()
+            stats["updated"] += 1
+
+        last_id = rows[-1]["id"]
+        print(f"\r확인 {stats['scanned']} · 변경 {stats['updated']}", end="", file=sys.stderr, flush=True)
+
+    print(file=sys.stderr)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="응답데이터 compact 백필")
+    parser.add_argument("--mode", choices=[m for m in PAYLOAD_MODES if m != "full"], default="compact")
+    parser.add_argument("--dry-run", action="store_true", help="변경하지 않고 절감량만 계산")
+    args = parser.parse_args(argv)
+
+    stats = backfill(create_client_from_env(), mode=args.mode, dry_run=args.dry_run)
+    before, after = stats["bytes_before"], stats["bytes_after"]
+    saved = (1 - after / before) * 100 if before else 0
+    print(f"응답데이터 {before:,} → {after:,} bytes ({saved:.0f}% 절감), {stats['updated']}행 변경")
+
+
+if __name__ == "__main__":
+    main()
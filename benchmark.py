@@ -0,0 +1,274 @@
+"""관리자 화면 주요 경로 마이크로벤치마크
+
+실제 테이블 컬럼 구성의 합성 응답(시드 고정)으로 아래 경로를 측정하고
+결과를 JSON으로 저장합니다. 커밋 간 비교는 --compare로 이전 결과 파일을 지정합니다.
+
+    python benchmark.py                          # 1k/10k/100k/1M
+    python benchmark.py --sizes 1000 10000 --cases dataframe csv_export
+    python benchmark.py --compare bench_results/<이전 결과>.json
+    python benchmark.py --cases json_read csv_read   # 전송 형식 비교
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from mpti_core import (
+    DEFAULT_EVENT_ID,
+    SAMPLE_CHOICES,
+    SUBMIT_TZ,
+    AffiliationIndex,
+    ResponseAggregates,
+    affiliation_index,
+    build_participant_labels,
+    load_affiliation_rules,
+    encode_payload,
+    read_responses_csv,
+    responses_to_csv,
+)
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+RESULTS_DIR = "bench_results"
+
+# 소속: 소수 기관에 몰리는 분포 + 같은 기관의 여러 표기
+AFFILIATIONS = [
+    ("서울대학교", 30), ("서울대", 8), ("SNU", 3), ("서울대학교 ", 2),
+    ("평창군청", 12), ("평창군 보건소", 6), ("강원대학교", 8), ("강원대", 3),
+    ("연세대학교", 5), ("고려대학교", 5), ("식품의약품안전처", 4), ("한국식품연구원", 4),
+    ("CJ제일제당", 3), ("농심", 2), ("개인", 5),
+]
+SWEET_WEIGHTS = (0.10, 0.22, 0.33, 0.23, 0.12)
+SALTY_WEIGHTS = (0.14, 0.30, 0.30, 0.17, 0.09)
+
+
+def synthetic_rows(n: int, seed: int = 0, event: str = DEFAULT_EVENT_ID, payload_mode: str = "full") -> list:
+    """taste_mpti_responses 행 형태의 합성 응답 n건"""
+    rng = np.random.default_rng(seed)
+    names, weights = zip(*AFFILIATIONS)
+    p = np.array(weights, dtype=float) / sum(weights)
+
+    affiliation = rng.choice(np.array(names, dtype=object), size=n, p=p)
+    male = rng.random(n) < 0.45
+    age = np.clip(rng.normal(38, 13, n), 15, 85).astype(int)
+    height = np.where(male, rng.normal(173.5, 6, n), rng.normal(160.5, 5.5, n)).round(1)
+    bmi = np.clip(rng.normal(23.2, 3.2, n), 15, 40)
+    weight = (bmi * (height / 100) ** 2).round(1)
+    sweet = rng.choice(np.array(SAMPLE_CHOICES), size=n, p=SWEET_WEIGHTS)
+    salty = rng.choice(np.array(SAMPLE_CHOICES), size=n, p=SALTY_WEIGHTS)
+    # 행사 기간(3일, 10~17시)에 고르게 분포, 약 3%는 재참여 이메일
+    start = datetime(2025, 10, 17, 10, tzinfo=SUBMIT_TZ)
+    offsets = rng.integers(0, 3, n) * 86400 + rng.integers(0, 7 * 3600, n)
+    person = np.where(rng.random(n) < 0.03, rng.integers(0, max(1, n), n), np.arange(n))
+
+    keys = {name: affiliation_index().key(name) for name in names}
+    rows = []
+    for i in range(n):
+        response = {
+            "email": f"user{person[i]}@example.com",
+            "name": f"참여자{person[i]}",
+            "affiliation": affiliation[i],
+            "gender": "남" if male[i] else "여",
+            "age": int(age[i]),
+            "height": float(height[i]),
+            "weight": float(weight[i]),
+            "sweet_preference": sweet[i],
+            "salty_preference": salty[i],
+            "event": event,
+        }
+        submitted = (start + timedelta(seconds=int(offsets[i]))).isoformat()
+        rows.append({
+            "id": i + 1,
+            "이메일": response["email"],
+            "성명": response["name"],
+            "소속": response["affiliation"],
+            "소속키": keys[response["affiliation"]],
+            "성별": response["gender"],
+            "나이": response["age"],
+            "신장": response["height"],
+            "체중": response["weight"],
+            "단맛선호": response["sweet_preference"],
+            "짠맛선호": response["salty_preference"],
+            "제출시간": submitted,
+            "이벤트": event,
+            "응답데이터": encode_payload({"제출시간": submitted, **response}, payload_mode),
+        })
+    return rows
+
+
+# ---- 측정 대상 (data: rows, df, json, csv를 담은 dict를 받아 한 번 실행) ----
+
+def case_dataframe(data):
+    """fetch_taste_responses_df (이전 방식) - 행 dict 목록 -> DataFrame"""
+    pd.DataFrame(data["rows"])
+
+
+def case_json_read(data):
+    """JSON 응답 본문 -> DataFrame (PostgREST 기본 형식, 파싱 포함)"""
+    pd.DataFrame(json.loads(data["json"]))
+
+
+def case_csv_read(data):
+    """CSV 응답 본문 -> DataFrame (.csv() + read_responses_csv)"""
+    read_responses_csv(data["csv"])
+
+
+def case_donut(data):
+    """donut_chart_counts - 분포 계산 + 도넛 figure 렌더링(PNG)"""
+    import matplotlib
+    matplotlib.use("Agg")
+    from mpti_charts import donut_png, sample_counts
+
+    donut_png(sample_counts(data["df"]["단맛선호"]))
+
+
+def case_affiliation_grid(data):
+    """전체 소속 비교 - 한 번의 groupby로 비율 행렬 + 그림 한 장(PNG)"""
+    import matplotlib
+    matplotlib.use("Agg")
+    from mpti_charts import comparison_figure, figure_png, share_matrices
+
+    shares, n = share_matrices(data["df"], samples=SAMPLE_CHOICES)
+    figure_png(comparison_figure(shares, n))
+
+
+def case_affiliation_filter(data):
+    """소속 필터 - DataFrame 마스크와 누적 집계의 소속별 분포"""
+    df = data["df"]
+    df[df["소속키"] == "평창군청"]
+    agg = ResponseAggregates()
+    agg.rebuild(data["rows"])
+    agg.sample_counts("단맛선호", "평창군청")
+
+
+def case_affiliation_keys(data):
+    """소속 정규화 - 새 색인(빈 캐시)으로 전체 소속 값의 키 계산 (저장 시 경로)"""
+    index = AffiliationIndex(load_affiliation_rules())
+    for value in data["df"]["소속"]:
+        index.key(value)
+
+
+def case_participant_labels(data):
+    """상세 보기 참여자 라벨"""
+    build_participant_labels(data["df"])
+
+
+def case_csv_export(data):
+    """관리자 CSV 내보내기"""
+    responses_to_csv(data["df"])
+
+
+CASES = {
+    "dataframe": case_dataframe,
+    "json_read": case_json_read,
+    "csv_read": case_csv_read,
+    "donut": case_donut,
+    "affiliation_filter": case_affiliation_filter,
+    "affiliation_grid": case_affiliation_grid,
+    "affiliation_keys": case_affiliation_keys,
+    "participant_labels": case_participant_labels,
+    "csv_export": case_csv_export,
+}
+
+
+def make_data(n: int, seed: int, cases) -> dict:
+    rows = synthetic_rows(n, seed=seed)
+    data = {"rows": rows, "df": pd.DataFrame(rows)}
+    # 전송 형식 비교용 응답 본문 (측정 밖에서 미리 만듦)
+    if "json_read" in cases:
+        data["json"] = json.dumps(rows, ensure_ascii=False)
+    if "csv_read" in cases:
+        data["csv"] = data["df"].to_csv(index=False)
+    return data
+
+
+def measure(fn, data, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(data)
+        times.append(time.perf_counter() - t0)
+    return {"min_s": min(times), "median_s": statistics.median(times), "repeat": repeat}
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def run_suite(sizes, cases, repeat: int = 3, seed: int = 0, log=print) -> dict:
+    results = {}
+    # import·폰트 캐시 등 첫 호출 비용은 제외
+    warm = make_data(100, seed, cases)
+    for name in cases:
+        CASES[name](warm)
+
+    for n in sizes:
+        data = make_data(n, seed, cases)
+        # 큰 크기는 한 번만 (1M에서 반복하면 수 분 걸림)
+        reps = repeat if n <= 100_000 else 1
+        for name in cases:
+            result = measure(CASES[name], data, reps)
+            results.setdefault(name, {})[str(n)] = result
+            log(f"{name:>20} {n:>9,}  {result['median_s'] * 1000:10.1f} ms")
+        del data
+    return {
+        "commit": _git_commit(),
+        "created_at": datetime.now(SUBMIT_TZ).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "seed": seed,
+        "results": results,
+    }
+
+
+def compare(current: dict, previous: dict, log=print):
+    """이전 결과 대비 중앙값 비율 (1보다 크면 느려짐)"""
+    log(f"\n비교 기준: {previous.get('commit')} ({previous.get('created_at')})")
+    for name, by_size in current["results"].items():
+        for n, result in by_size.items():
+            before = previous.get("results", {}).get(name, {}).get(n)
+            if before and before["median_s"]:
+                ratio = result["median_s"] / before["median_s"]
+                flag = "  ⚠️" if ratio > 1.2 else ""
+                log(f"{name:>20} {int(n):>9,}  x{ratio:5.2f}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="미각 MPTI 마이크로벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="행 수 (기본: 1k 10k 100k 1M)")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=3, help="크기별 반복 횟수 (100k 초과는 1회)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help=f"결과 JSON 경로 (기본: {RESULTS_DIR}/<시각>_<커밋>.json)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.sizes, args.cases, repeat=args.repeat, seed=args.seed)
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(SUBMIT_TZ).strftime("%Y%m%d_%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}_{report['commit'] or 'local'}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""응답 스냅샷 Parquet 아카이브 (증분 내보내기)
+
+taste_mpti_responses의 새 응답만 제출일(선택적으로 소속키)로 파티션된 Parquet
+데이터셋에 추가합니다. 이미 내보낸 위치는 데이터셋 안의 _watermark.json에 기록됩니다.
+모든 파일은 같은 고정 스키마입니다. 테이블 컬럼이 없는 시식(taste_tests.json)의 응답은
+응답_<response_key> 컬럼으로 펼치고, 응답데이터 컬럼에는 전체 응답 JSON을 함께 둡니다.
+
+    python export_parquet.py archive/ --partition-by-affiliation
+    python export_parquet.py archive/ --taste-tests taste_tests_seoul.json
+
+분석 시에는 pandas.read_parquet("archive/") 또는 pyarrow.dataset으로 읽으면 됩니다.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import uuid
+
+from mpti_core import (
+    DEFAULT_EVENT_ID,
+    RESPONSE_TABLE,
+    TASTE_TESTS_PATH,
+    affiliation_index,
+    create_client_from_env,
+    fetch_pages,
+    load_taste_tests,
+    parse_submit_time,
+    row_to_response,
+)
+
+WATERMARK_FILE = "_watermark.json"
+
+# 모든 파트 파일을 같은 스키마로 씀 - 배치에 없는 컬럼은 null, 스키마 밖 컬럼은 버림
+# (pyarrow는 데이터셋을 읽을 때 첫 파일의 스키마를 쓰므로 파일마다 컬럼이 다르면 조용히 빠짐)
+TEXT_COLUMNS = ("이메일", "성명", "소속", "소속키", "성별", "단맛선호", "짠맛선호", "이벤트")
+RESPONSE_PREFIX = "응답_"
+
+
+def response_keys(path: str = TASTE_TESTS_PATH) -> tuple:
+    """응답_ 컬럼으로 펼칠 시식 응답 키 - 테이블 컬럼이 없는(응답데이터에만 저장되는) 시식, 정의 순서대로"""
+    return tuple(test["response_key"] for test in load_taste_tests(path) if not test["column"])
+
+
+def archive_schema(keys: tuple = ()):
+    """고정 스키마 - keys는 응답_<키> 컬럼으로 펼칠 응답 키 (응답이 없는 행은 null)"""
+    import pyarrow as pa
+
+    timestamp = pa.timestamp("us", tz="Asia/Seoul")
+    return pa.schema([
+        ("id", pa.int64()),
+        ("created_at", timestamp),
+        *((col, pa.string()) for col in TEXT_COLUMNS),
+        ("나이", pa.int64()),
+        ("신장", pa.float64()),
+        ("체중", pa.float64()),
+        ("제출시간", timestamp),
+        *((RESPONSE_PREFIX + key, pa.string()) for key in keys),
+        ("응답데이터", pa.string()),
+    ])
+
+
+def read_watermark(root: str) -> dict:
+    path = os.path.join(root, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_watermark(root: str, watermark: dict):
+    """임시 파일에 쓴 뒤 교체하여 중간에 끊겨도 이전 값이 유지되도록 함"""
+    path = os.path.join(root, WATERMARK_FILE)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(watermark, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def fetch_new_rows(sb, key: str, after) -> list:
+    """key 컬럼이 after보다 큰 행을 key 오름차순으로 페이지 단위 조회"""
+    def page(start, end):
+        query = sb.table(RESPONSE_TABLE).select("*")
+        if after is not None:
+            query = query.gt(key, after)
+        return query.order(key).range(start, end).execute().data or []
+    return [row for rows in fetch_pages(page) for row in rows]
+
+
+def _text(value):
+    if value is None or value != value:  # None, NaN 제외
+        return None
+    return str(value).strip() or None
+
+
+def _number(value, cast):
+    try:
+        return cast(float(value)) if _text(value) is not None else None
+    except ValueError:
+        return None
+
+
+def archive_table(rows: list, partition_by_affiliation: bool = False, keys: tuple = ()):
+    """행 목록 -> 고정 스키마(archive_schema(keys)) pyarrow.Table + 파티션 컬럼(제출일, 소속구분)"""
+    import pyarrow as pa
+
+    schema = archive_schema(keys)
+    columns = {field.name: [] for field in schema}
+    partitions = {"제출일": [], "소속구분": []}
+    index = affiliation_index()
+    for row in rows:
+        submitted = parse_submit_time(row.get("제출시간"))
+        columns["id"].append(_number(row.get("id"), int))
+        columns["created_at"].append(parse_submit_time(row.get("created_at")))
+        # 이벤트·소속키 컬럼이 생기기 전의 행도 앱과 같은 값으로 채움
+        values = {col: _text(row.get(col)) for col in TEXT_COLUMNS}
+        values["이벤트"] = values["이벤트"] or DEFAULT_EVENT_ID
+        values["소속키"] = values["소속키"] or index.key(row.get("소속")) or None
+        for col, value in values.items():
+            columns[col].append(value)
+        columns["나이"].append(_number(row.get("나이"), int))
+        columns["신장"].append(_number(row.get("신장"), float))
+        columns["체중"].append(_number(row.get("체중"), float))
+        columns["제출시간"].append(submitted)
+        response = row_to_response(row)
+        for key in keys:
+            columns[RESPONSE_PREFIX + key].append(_text(response.get(key)))
+        columns["응답데이터"].append(json.dumps(response, ensure_ascii=False))
+        partitions["제출일"].append(submitted.strftime("%Y-%m-%d") if submitted else "미상")
+        # 경로 구분자가 들어간 소속은 디렉터리 이름으로 쓸 수 없으므로 치환
+        partitions["소속구분"].append(re.sub(r"[\\/]", "_", values["소속키"] or "") or "미상")
+
+    table = pa.Table.from_pydict(columns, schema=schema)
+    table = table.append_column("제출일", pa.array(partitions["제출일"], pa.string()))
+    if partition_by_affiliation:
+        table = table.append_column("소속구분", pa.array(partitions["소속구분"], pa.string()))
+    return table
+
+
+def export_incremental(sb, root: str, key: str = "id", partition_by_affiliation: bool = False,
+                       taste_tests: str = TASTE_TESTS_PATH) -> int:
+    """새 응답만 데이터셋에 추가하고 내보낸 행 수를 반환"""
+    import pyarrow.parquet as pq
+
+    os.makedirs(root, exist_ok=True)
+    watermark = read_watermark(root)
+    if watermark and watermark.get("key") != key:
+        raise ValueError(f"기존 워터마크 기준 컬럼({watermark.get('key')})과 다릅니다: {key}")
+    keys = response_keys(taste_tests)
+    # 시식 구성이 바뀌면 파트 파일마다 컬럼이 달라지므로 같은 데이터셋에 이어 쓰지 않음
+    if watermark and tuple(watermark.get("response_keys", ())) != keys:
+        raise ValueError(f"기존 데이터셋의 응답 컬럼({', '.join(watermark.get('response_keys', ())) or '없음'})과 "
+                         f"시식 정의가 다릅니다: {', '.join(keys) or '없음'} - 새 디렉터리로 내보내 주세요")
+
+    rows = fetch_new_rows(sb, key, watermark.get("last"))
+    if not rows:
+        return 0
+
+    table = archive_table(rows, partition_by_affiliation, keys)
+    partition_cols = ["제출일", "소속구분"] if partition_by_affiliation else ["제출일"]
+    pq.write_to_dataset(
+        table,
+        root_path=root,
+        partition_cols=partition_cols,
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        compression="zstd",
+    )
+
+    last = rows[-1][key]
+    write_watermark(root, {"key": key, "last": last, "rows": watermark.get("rows", 0) + len(rows),
+                           "response_keys": list(keys)})
+    return len(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="미각 MPTI 응답 Parquet 증분 내보내기")
+    parser.add_argument("root", help="Parquet 데이터셋 디렉터리")
+    parser.add_argument("--key", default="id", help="증분 기준 컬럼 (기본: id)")
+    parser.add_argument("--partition-by-affiliation", action="store_true", help="제출일 아래 소속키로도 파티션")
+    parser.add_argument("--taste-tests", default=TASTE_TESTS_PATH, help="응답_ 컬럼을 정할 시식 정의 파일")
+    args = parser.parse_args(argv)
+
+    count = export_incremental(create_client_from_env(), args.root, key=args.key,
+                               partition_by_affiliation=args.partition_by_affiliation,
+                               taste_tests=args.taste_tests)
+    print(f"{args.root}: {count}건 추가" if count else f"{args.root}: 새 응답 없음", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""오프라인·종이 응답 일괄 가져오기
+
+page_complete에서 내려받은 `미각MPTI_<이름>_<시각>.json` 파일이 든 디렉터리나
+관리자 CSV 내보내기 형식의 파일을 읽어 taste_mpti_responses에 일괄 저장합니다.
+
+    python import_responses.py responses_dir/ paper_session.csv --batch-size 500
+
+이미 저장한 응답은 상태 파일(--state)에 기록되어 다시 실행해도 건너뜁니다.
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+
+from mpti_core import (
+    DEFAULT_EVENT_ID,
+    PAYLOAD_MODES,
+    RESPONSE_TABLE,
+    build_response_row,
+    create_client_from_env,
+    normalize_response,
+    row_to_response,
+)
+
+
+def iter_source(path: str):
+    """(출처, 응답 dict) 목록 생성 - 디렉터리/JSON/CSV 지원"""
+    if os.path.isdir(path):
+        for root, _, files in os.walk(path):
+            for name in sorted(files):
+                if name.lower().endswith((".json", ".csv")):
+                    yield from iter_source(os.path.join(root, name))
+    elif path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        records = data if isinstance(data, list) else [data]
+        for i, record in enumerate(records):
+            yield f"{path}#{i}", record
+    elif path.lower().endswith(".csv"):
+        # 관리자 CSV 다운로드는 utf-8-sig로 저장됨
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            for i, row in enumerate(csv.DictReader(f), start=2):
+                yield f"{path}:{i}", row_to_response(row)
+    else:
+        raise ValueError(f"지원하지 않는 파일 형식: {path}")
+
+
+def record_key(response: dict) -> str:
+    """중복 판단용 키 (이벤트 + 이메일 + 제출시간 + 시료)"""
+    raw = "|".join(str(response.get(k, "")) for k in
+                   ("email", "제출시간", "sweet_preference", "salty_preference"))
+    if response.get("event", DEFAULT_EVENT_ID) != DEFAULT_EVENT_ID:
+        raw = f"{response['event']}|{raw}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def load_state(path: str) -> set:
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def run_import(paths, sb, state_path: str, batch_size: int = 500, dry_run: bool = False,
+               payload_mode: str = "full", event: str = DEFAULT_EVENT_ID) -> dict:
+    done = load_state(state_path)
+    stats = {"inserted": 0, "skipped": 0, "invalid": 0}
+    batch, keys = [], []
+
+    def flush():
+        if not batch:
+            return
+        if not dry_run:
+            sb.table(RESPONSE_TABLE).insert(batch).execute()
+            # 배치가 성공한 뒤에만 기록 -> 중단 후 재실행 시 이어서 진행
+            with open(state_path, "a", encoding="utf-8") as f:
+                f.writelines(k + "\n" for k in keys)
+        done.update(keys)
+        stats["inserted"] += len(batch)
+        batch.clear()
+        keys.clear()
+
+    def progress(final=False):
+        print(f"\r가져옴 {stats['inserted']} · 건너뜀 {stats['skipped']} · 오류 {stats['invalid']}",
+              end="\n" if final else "", file=sys.stderr, flush=True)
+
+    for path in paths:
+        for source, record in iter_source(path):
+            try:
+                response = normalize_response(record, default_event=event)
+            except ValueError as e:
+                stats["invalid"] += 1
+                print(f"\n⚠️ {source}: {e}", file=sys.stderr)
+                continue
+
+            key = record_key(response)
+            if key in done or key in keys:
+                stats["skipped"] += 1
+                continue
+
+            batch.append(build_response_row(response, payload_mode=payload_mode))
+            keys.append(key)
+            if len(batch) >= batch_size:
+                flush()
+                progress()
+
+    flush()
+    progress(final=True)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="미각 MPTI 응답 일괄 가져오기")
+    parser.add_argument("paths", nargs="+", help="JSON 파일/디렉터리 또는 관리자 CSV 내보내기 파일")
+    parser.add_argument("--batch-size", type=int, default=500, help="한 번에 저장할 행 수 (기본 500)")
+    parser.add_argument("--state", default=".import_state", help="가져온 응답 키를 기록할 상태 파일")
+    parser.add_argument("--dry-run", action="store_true", help="검증만 하고 저장하지 않음")
+    parser.add_argument("--payload-mode", choices=PAYLOAD_MODES, default="full", help="응답데이터 저장 방식")
+    parser.add_argument("--event", default=DEFAULT_EVENT_ID, help="이벤트 정보가 없는 응답에 붙일 이벤트 ID")
+    args = parser.parse_args(argv)
+
+    sb = None if args.dry_run else create_client_from_env()
+    stats = run_import(args.paths, sb, args.state, batch_size=args.batch_size, dry_run=args.dry_run,
+                       payload_mode=args.payload_mode, event=args.event)
+    return 1 if stats["invalid"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
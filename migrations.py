@@ -0,0 +1,226 @@
+"""taste_mpti_responses / taste_mpti_events 스키마 마이그레이션
+
+버전별 SQL을 순서대로 적용하고 schema_migrations 테이블에 기록합니다.
+Supabase(PostgreSQL)와 로컬 대체 DB(SQLite)에 같은 버전을 적용할 수 있습니다.
+
+    python migrations.py --database-url postgresql://...   # psycopg 필요
+    python migrations.py --sqlite local_responses.db
+    python migrations.py --print                           # SQL 편집기용 출력
+"""
+import argparse
+import os
+import sys
+
+from mpti_core import DEFAULT_EVENT_ID, EVENTS_TABLE, RESPONSE_TABLE
+
+T = RESPONSE_TABLE
+E = EVENTS_TABLE
+
+# (버전, 설명, {방언: [SQL 문장, ...]})
+MIGRATIONS = [
+    (1, "기본 응답 테이블", {
+        "postgres": [f"""
+            create table if not exists {T} (
+                id bigint generated by default as identity primary key,
+                created_at timestamptz not null default now(),
+                "이메일" text, "성명" text, "소속" text, "성별" text,
+                "나이" integer, "신장" double precision, "체중" double precision,
+                "단맛선호" text, "짠맛선호" text,
+                "제출시간" text, "응답데이터" text
+            )"""],
+        "sqlite": [f"""
+            create table if not exists {T} (
+                id integer primary key autoincrement,
+                created_at text not null default (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+                "이메일" text, "성명" text, "소속" text, "성별" text,
+                "나이" integer, "신장" real, "체중" real,
+                "단맛선호" text, "짠맛선호" text,
+                "제출시간" text, "응답데이터" text
+            )"""],
+    }),
+    (2, "제출시간 timestamptz 변환, 조회 인덱스, BMI·연령대 생성 컬럼", {
+        "postgres": [
+            # 기존 값은 시간대 없는 한국 시각 문자열
+            f"""alter table {T} alter column "제출시간" type timestamptz
+                using (case when "제출시간"::text ~ '[+-]\\d\\d(:?\\d\\d)?$|Z$'
+                            then "제출시간"::text::timestamptz
+                            else nullif("제출시간"::text, '')::timestamp at time zone 'Asia/Seoul' end)""",
+            f'create index if not exists {T}_submitted_idx on {T} ("제출시간" desc)',
+            f'create index if not exists {T}_affiliation_idx on {T} ("소속")',
+            f'create index if not exists {T}_email_idx on {T} ("이메일")',
+            f"""alter table {T} add column if not exists "BMI" numeric
+                generated always as (case when "신장" > 0
+                    then round(("체중"::numeric / power("신장"::numeric / 100, 2)), 1) end) stored""",
+            f"""alter table {T} add column if not exists "연령대" integer
+                generated always as (("나이"::integer / 10) * 10) stored""",
+        ],
+        "sqlite": [
+            # SQLite에는 timestamptz가 없으므로 오프셋이 붙은 ISO 8601 문자열로 통일 (정렬 가능)
+            f"""update {T} set "제출시간" = replace("제출시간", ' ', 'T') || '+09:00'
+                where length("제출시간") = 19""",
+            f'create index if not exists {T}_submitted_idx on {T} ("제출시간" desc)',
+            f'create index if not exists {T}_affiliation_idx on {T} ("소속")',
+            f'create index if not exists {T}_email_idx on {T} ("이메일")',
+            # ALTER로는 VIRTUAL 생성 컬럼만 추가 가능
+            f"""alter table {T} add column "BMI" real
+                generated always as (case when "신장" > 0
+                    then round("체중" / (("신장" / 100.0) * ("신장" / 100.0)), 1) end) virtual""",
+            f"""alter table {T} add column "연령대" integer
+                generated always as ((cast("나이" as integer) / 10) * 10) virtual""",
+        ],
+    }),
+    (3, "이벤트 구분 컬럼과 이벤트별 조회 인덱스", {
+        "postgres": [
+            f"""alter table {T} add column if not exists "이벤트" text not null default '{DEFAULT_EVENT_ID}'""",
+            f'create index if not exists {T}_event_submitted_idx on {T} ("이벤트", "제출시간" desc)',
+            f'create index if not exists {T}_event_affiliation_idx on {T} ("이벤트", "소속")',
+        ],
+        "sqlite": [
+            f"""alter table {T} add column "이벤트" text not null default '{DEFAULT_EVENT_ID}'""",
+            f'create index if not exists {T}_event_submitted_idx on {T} ("이벤트", "제출시간" desc)',
+            f'create index if not exists {T}_event_affiliation_idx on {T} ("이벤트", "소속")',
+        ],
+    }),
+    (4, "참여 단계 이벤트(퍼널) 테이블", {
+        "postgres": [
+            f"""create table if not exists {E} (
+                id bigint generated by default as identity primary key,
+                "세션" text not null, "이벤트" text not null, "페이지" text not null,
+                "동작" text not null, "값" text, "발생시간" timestamptz not null
+            )""",
+            f'create index if not exists {E}_event_time_idx on {E} ("이벤트", "발생시간")',
+        ],
+        "sqlite": [
+            f"""create table if not exists {E} (
+                id integer primary key autoincrement,
+                "세션" text not null, "이벤트" text not null, "페이지" text not null,
+                "동작" text not null, "값" text, "발생시간" text not null
+            )""",
+            f'create index if not exists {E}_event_time_idx on {E} ("이벤트", "발생시간")',
+        ],
+    }),
+    # 기존 행의 값은 backfill_affiliation_keys.py로 채움 (규칙 파일은 파이썬 쪽에만 있음)
+    (5, "소속 정규화 키 컬럼과 이벤트별 소속키 인덱스", {
+        "postgres": [
+            f'alter table {T} add column if not exists "소속키" text',
+            f'create index if not exists {T}_event_affiliation_key_idx on {T} ("이벤트", "소속키")',
+        ],
+        "sqlite": [
+            f'alter table {T} add column "소속키" text',
+            f'create index if not exists {T}_event_affiliation_key_idx on {T} ("이벤트", "소속키")',
+        ],
+    }),
+    # 앱은 이메일을 소문자·공백 제거해 저장하고 재참여 조회·삭제를 eq로 함
+    (6, "이메일 정규화와 이벤트별 이메일 인덱스", {
+        "postgres": [
+            f'update {T} set "이메일" = lower(trim("이메일")) where "이메일" <> lower(trim("이메일"))',
+            f'create index if not exists {T}_event_email_idx on {T} ("이벤트", "이메일")',
+        ],
+        "sqlite": [
+            f'update {T} set "이메일" = lower(trim("이메일")) where "이메일" <> lower(trim("이메일"))',
+            f'create index if not exists {T}_event_email_idx on {T} ("이벤트", "이메일")',
+        ],
+    }),
+]
+
+_TRACKING_SQL = {
+    "postgres": """create table if not exists schema_migrations (
+        version integer primary key, description text, applied_at timestamptz not null default now())""",
+    "sqlite": """create table if not exists schema_migrations (
+        version integer primary key, description text,
+        applied_at text not null default (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')))""",
+}
+
+_PARAM = {"postgres": "%s", "sqlite": "?"}
+
+
+def pending(applied: set, dialect: str) -> list:
+    return [(v, desc, sql[dialect]) for v, desc, sql in MIGRATIONS if v not in applied]
+
+
+def apply_migrations(conn, dialect: str, log=print) -> list:
+    """아직 적용되지 않은 버전을 순서대로 적용 (버전마다 하나의 트랜잭션)"""
+    cur = conn.cursor()
+    cur.execute(_TRACKING_SQL[dialect])
+    conn.commit()
+    cur.execute("select version from schema_migrations")
+    applied = {row[0] for row in cur.fetchall()}
+
+    done = []
+    p = _PARAM[dialect]
+    for version, description, statements in pending(applied, dialect):
+        try:
+            for statement in statements:
+                cur.execute(statement)
+            cur.execute(f"insert into schema_migrations (version, description) values ({p}, {p})",
+                        (version, description))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        log(f"✅ {version:03d} {description}")
+        done.append(version)
+    return done
+
+
+def connect_sqlite(path: str):
+    import sqlite3
+    # 트랜잭션을 직접 관리 (DDL도 버전 단위로 롤백되도록)
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute("begin")
+
+    class _Conn:
+        def cursor(self):
+            return conn.cursor()
+
+        def commit(self):
+            conn.execute("commit")
+            conn.execute("begin")
+
+        def rollback(self):
+            conn.execute("rollback")
+            conn.execute("begin")
+
+        def close(self):
+            conn.execute("commit")
+            conn.close()
+
+    return _Conn()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="미각 MPTI 스키마 마이그레이션")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--database-url", nargs="?", const=os.environ.get("DATABASE_URL"),
+                        help="PostgreSQL 접속 URL (기본: DATABASE_URL)")
+    target.add_argument("--sqlite", help="로컬 대체 SQLite 파일 경로")
+    target.add_argument("--print", action="store_true", help="PostgreSQL SQL을 출력만 함")
+    args = parser.parse_args(argv)
+
+    if args.print:
+        print(_TRACKING_SQL["postgres"] + ";")
+        for version, description, sql in MIGRATIONS:
+            print(f"\n-- {version:03d} {description}\nbegin;")
+            for statement in sql["postgres"]:
+                print(statement.strip() + ";")
+            print(f"insert into schema_migrations (version, description) values ({version}, '{description}') on conflict do nothing;\ncommit;")
+        return
+
+    if args.sqlite:
+        conn, dialect = connect_sqlite(args.sqlite), "sqlite"
+    else:
+        if not args.database_url:
+            parser.error("--database-url 또는 DATABASE_URL 이 필요합니다")
+        import psycopg
+        conn, dialect = psycopg.connect(args.database_url), "postgres"
+
+    try:
+        done = apply_migrations(conn, dialect)
+    finally:
+        conn.close()
+    if not done:
+        print("이미 최신 스키마입니다.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
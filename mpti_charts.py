@@ -0,0 +1,135 @@
+"""관리자 대시보드 차트 (Streamlit 비의존)
+
+figure만 만들고 화면 표시는 호출 측(st.pyplot 등)에서 합니다.
+"""
+import io
+
+import matplotlib.pyplot as plt
+
+# 파스텔 색상
+PASTEL_COLORS = ['#A5D6A7', '#C5A5D8', '#FFB6B9', '#FED8B1', '#B4E7FF',
+                 '#C8E6C9', '#B2DFDB', '#FFCCBC', '#F8BBD0', '#E1BEE7']
+
+
+def sample_counts(series):
+    """값 분포 (빈 값 제외, 시료 번호순) - 비어 있으면 빈 Series"""
+    s = series.dropna().astype(str)
+    s = s[s != ""]
+    return s.value_counts().sort_index()
+
+
+def donut_figure(counts):
+    """시료별 응답 수 -> 도넛 차트 figure (제목은 한글 폰트 문제로 호출 측에서 표시)"""
+    colors = (PASTEL_COLORS * (len(counts) // len(PASTEL_COLORS) + 1))[:len(counts)]
+
+    fig = plt.figure(figsize=(6, 6), dpi=100)
+    fig.patch.set_facecolor('white')
+    ax = fig.add_subplot(111)
+
+    wedges, texts, autotexts = ax.pie(
+        counts.values,
+        labels=[str(label) for label in counts.index],
+        autopct='%1.1f%%',
+        startangle=90,
+        colors=colors,
+        textprops={
+            'fontsize': 14,
+            'weight': 'bold',
+            'color': '#2E5945'
+        }
+    )
+
+    # 라벨 / 퍼센트 텍스트 스타일
+    for text in texts:
+        text.set_fontsize(15)
+        text.set_weight('bold')
+        text.set_color('#2E5945')
+    for autotext in autotexts:
+        autotext.set_fontsize(13)
+        autotext.set_weight('bold')
+        autotext.set_color('#2E5945')
+
+    # 도넛 효과
+    centre_circle = plt.Circle((0, 0), 0.65, fc='white', edgecolor='white', linewidth=2)
+    ax.add_artist(centre_circle)
+
+    ax.axis('equal')
+    fig.tight_layout()
+    return fig
+
+
+def figure_png(fig, dpi: int = 100) -> bytes:
+    """figure -> PNG (렌더링 후 figure를 닫음)"""
+    try:
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", dpi=dpi, bbox_inches="tight")
+        return buf.getvalue()
+    finally:
+        plt.close(fig)
+
+
+def donut_png(counts, dpi: int = 100) -> bytes:
+    """도넛 차트를 PNG로 렌더링 (같은 분포는 호출 측에서 캐시해 재사용)"""
+    return figure_png(donut_figure(counts), dpi)
+
+
+def share_matrices(df, columns=("단맛선호", "짠맛선호"), by="소속키", samples=None, limit: int = 50):
+    """소속별 시료 선택 비율 행렬을 한 번의 groupby로 계산
+
+    -> ({컬럼: 소속 x 시료 비율 DataFrame}, 소속별 응답 수 Series). 응답이 많은 순으로
+    limit개까지 두고 나머지는 "기타"로 합칩니다.
+    """
+    import pandas as pd
+
+    long = df[[by, *columns]].melt(id_vars=by, var_name="컬럼", value_name="시료")
+    long = long[long[by].notna() & long["시료"].notna()].astype({by: str, "시료": str})
+    long = long[(long[by] != "") & (long["시료"] != "")]
+    counts = long.groupby(["컬럼", by, "시료"]).size()
+    if counts.empty:
+        return {}, pd.Series(dtype=int)
+
+    # 응답 수는 행을 직접 셈 (컬럼마다 비어 있는 값이 달라도 맞도록)
+    groups = df[by].astype(object).where(df[by].notna(), "").astype(str)
+    n = groups[groups != ""].value_counts()
+    keep = list(n.index[:limit])
+    if len(n) > limit:
+        counts = counts.rename(lambda aff: aff if aff in keep else "기타", level=by).groupby(level=[0, 1, 2]).sum()
+        n = pd.concat([n.iloc[:limit], pd.Series({"기타": n.iloc[limit:].sum()})])
+        keep.append("기타")
+
+    shares = {}
+    for col in columns:
+        matrix = counts.xs(col, level="컬럼").unstack(fill_value=0) if col in counts.index.get_level_values(0) else pd.DataFrame()
+        matrix = matrix.reindex(index=keep, columns=list(samples) if samples else sorted(matrix.columns), fill_value=0)
+        shares[col] = matrix.div(matrix.sum(axis=1).replace(0, 1), axis=0)
+    return shares, n
+
+
+def comparison_figure(shares: dict, n, titles: dict | None = None):
+    """소속별 시료 선택 비율 -> 컬럼마다 100% 누적 가로 막대를 나란히 놓은 figure 하나"""
+    first = next(iter(shares.values()))
+    rows = len(first.index)
+    fig, axes = plt.subplots(1, len(shares), figsize=(6 * len(shares), 0.38 * rows + 1.6), dpi=100, sharey=True, squeeze=False)
+    fig.patch.set_facecolor('white')
+    labels = [f"{aff} ({n.get(aff, 0)})" for aff in first.index]
+
+    for ax, (col, matrix) in zip(axes[0], shares.items()):
+        left = [0.0] * rows
+        colors = (PASTEL_COLORS * (len(matrix.columns) // len(PASTEL_COLORS) + 1))
+        for sample, color in zip(matrix.columns, colors):
+            values = matrix[sample].tolist()
+            ax.barh(labels, values, left=left, color=color, edgecolor='white', label=str(sample))
+            for y, (x0, v) in enumerate(zip(left, values)):
+                if v >= 0.08:
+                    ax.text(x0 + v / 2, y, f"{v:.0%}", ha='center', va='center', fontsize=9, color='#2E5945')
+            left = [a + b for a, b in zip(left, values)]
+        ax.set_title((titles or {}).get(col, col), color='#2E5945', fontsize=13, weight='bold')
+        ax.set_xlim(0, 1)
+        ax.xaxis.set_major_formatter(plt.FuncFormatter(lambda v, _: f"{v:.0%}"))
+        ax.spines[['top', 'right']].set_visible(False)
+    # y축을 공유하므로 한 번만 뒤집음 (응답이 많은 소속이 위)
+    axes[0][0].invert_yaxis()
+    handles, legend_labels = axes[0][0].get_legend_handles_labels()
+    fig.legend(handles, legend_labels, title="시료", ncol=len(legend_labels), loc='lower center', frameon=False)
+    fig.tight_layout(rect=(0, 0.6 / fig.get_figheight(), 1, 1))
+    return fig
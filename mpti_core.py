@@ -0,0 +1,1525 @@
+"""미각 MPTI 공용 로직 (Streamlit 비의존)
+
+앱(taste_test_app.py)과 명령행 도구가 함께 사용하는 행 변환·집계 코드입니다.
+"""
+import base64
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from collections import Counter, defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+
+RESPONSE_TABLE = "taste_mpti_responses"
+FETCH_PAGE_SIZE = 1000  # PostgREST 기본 max-rows (이보다 많은 행은 range로 나눠 받음)
+
+# 이벤트(클래스) 구분 - 이 키가 생기기 전의 응답은 모두 기본 이벤트로 간주
+DEFAULT_EVENT_ID = "pyeongchang"
+DEFAULT_EVENT_TITLE = "평창 웰니스 클래스"
+_EVENT_ID_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# 세션 응답 키 -> 테이블 컬럼
+FIELD_COLUMNS = {
+    "email": "이메일",
+    "name": "성명",
+    "affiliation": "소속",
+    "gender": "성별",
+    "age": "나이",
+    "height": "신장",
+    "weight": "체중",
+    "sweet_preference": "단맛선호",
+    "salty_preference": "짠맛선호",
+    "제출시간": "제출시간",
+    "event": "이벤트",
+}
+
+FIELD_DEFAULTS = {
+    "email": "",
+    "name": "",
+    "affiliation": "",
+    "gender": "",
+    "age": 0,
+    "height": 0,
+    "weight": 0,
+    "sweet_preference": "",
+    "salty_preference": "",
+    "제출시간": "",
+    "event": DEFAULT_EVENT_ID,
+}
+
+
+# 응답데이터 저장 방식
+#   full         : 세션 응답 전체 JSON (기존 방식)
+#   compact      : 컬럼에 없는 항목만 JSON
+#   compact_zlib : compact JSON을 zlib 압축 후 base64 ("z:" 접두어)
+PAYLOAD_MODES = ("full", "compact", "compact_zlib")
+_ZLIB_PREFIX = "z:"
+
+
+def encode_payload(response_data: dict, mode: str = "full") -> str:
+    """응답데이터 컬럼 값 생성"""
+    if mode not in PAYLOAD_MODES:
+        raise ValueError(f"알 수 없는 응답데이터 저장 방식: {mode}")
+    if mode == "full":
+        return json.dumps(response_data, ensure_ascii=False)
+    extra = {k: v for k, v in response_data.items() if k not in FIELD_COLUMNS and k not in COLUMN_FIELDS}
+    text = json.dumps(extra, ensure_ascii=False, separators=(",", ":"))
+    if mode == "compact":
+        return text
+    packed = _ZLIB_PREFIX + base64.b64encode(zlib.compress(text.encode("utf-8"), 9)).decode("ascii")
+    # 짧은 JSON은 압축하면 오히려 길어지므로 그대로 둠
+    return packed if len(packed) < len(text) else text
+
+
+def decode_payload(value) -> dict:
+    """응답데이터 컬럼 값 -> dict (세 저장 방식 모두 지원, 읽을 수 없으면 빈 dict)"""
+    if not isinstance(value, str) or not value.strip():
+        return {}
+    try:
+        if value.startswith(_ZLIB_PREFIX):
+            value = zlib.decompress(base64.b64decode(value[len(_ZLIB_PREFIX):])).decode("utf-8")
+        data = json.loads(value)
+    except (ValueError, zlib.error):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def build_response_row(response_data: dict, payload_mode: str = "full", affiliations=None) -> dict:
+    """세션 응답(dict)을 taste_mpti_responses 행으로 변환 (소속키·이메일 정규화는 저장 시점에 한 번)"""
+    row = {col: response_data.get(key, FIELD_DEFAULTS[key]) for key, col in FIELD_COLUMNS.items()}
+    row[AFFILIATION_KEY_COLUMN] = (affiliations or affiliation_index()).key(row["소속"])
+    # 재참여 조회·삭제가 eq로 맞도록 정규화해 저장
+    row["이메일"] = normalize_email(row["이메일"])
+    submitted = parse_submit_time(row["제출시간"])
+    row["제출시간"] = submitted.isoformat() if submitted else None
+    row["응답데이터"] = encode_payload(response_data, payload_mode)
+    return row
+
+
+# 테이블 컬럼 -> 세션 응답 키
+COLUMN_FIELDS = {col: key for key, col in FIELD_COLUMNS.items()}
+
+SAMPLE_CHOICES = ("1", "2", "3", "4", "5")
+SUBMIT_TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+# 제출시간은 한국 시각 기준 (timestamptz 컬럼에는 오프셋을 붙여 저장)
+SUBMIT_TZ = timezone(timedelta(hours=9), "KST")
+
+
+def parse_submit_time(value) -> datetime | None:
+    """제출시간 값 -> 한국 시각 datetime (시간대 없는 값은 한국 시각으로 간주)"""
+    text = _to_text(value)
+    if not text:
+        return None
+    try:
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=SUBMIT_TZ)
+    return parsed.astimezone(SUBMIT_TZ)
+
+
+def format_submit_time(value) -> str:
+    """화면 표시용 제출시간 ("%Y-%m-%d %H:%M:%S", 한국 시각)"""
+    parsed = parse_submit_time(value)
+    return parsed.strftime(SUBMIT_TIME_FORMAT) if parsed else _to_text(value)
+
+
+def submit_time_bound(day) -> str:
+    """날짜의 0시(한국 시각)를 timestamptz 비교용 ISO 문자열로"""
+    return datetime.combine(date.fromisoformat(str(day)), datetime.min.time(), SUBMIT_TZ).isoformat()
+
+
+def normalize_response(response_data: dict, default_event: str = DEFAULT_EVENT_ID) -> dict:
+    """외부에서 들어온 응답(dict)을 검증하고 앱과 같은 형태로 정리
+
+    잘못된 값이 있으면 ValueError를 발생시킵니다.
+    """
+    data = dict(response_data)
+    data["event"] = normalize_event_id(data.get("event"), default_event)
+
+    for key in ("email", "name", "affiliation", "gender"):
+        data[key] = _to_text(data.get(key))
+    if "@" not in data["email"]:
+        raise ValueError(f"유효하지 않은 이메일: {data['email']!r}")
+    if not data["name"]:
+        raise ValueError("성명이 비어 있습니다")
+    if data["gender"] not in ("남", "여", ""):
+        raise ValueError(f"알 수 없는 성별: {data['gender']!r}")
+
+    for key in ("age", "height", "weight"):
+        num = _to_number(data.get(key))
+        if num is None:
+            raise ValueError(f"숫자가 아닌 {FIELD_COLUMNS[key]}: {data.get(key)!r}")
+        data[key] = int(num) if num == int(num) else num
+
+    for key in ("sweet_preference", "salty_preference"):
+        choice = _to_text(data.get(key))
+        if choice.endswith(".0"):
+            choice = choice[:-2]
+        if choice not in SAMPLE_CHOICES:
+            raise ValueError(f"알 수 없는 {FIELD_COLUMNS[key]} 시료: {data.get(key)!r}")
+        data[key] = choice
+
+    # 오프셋이 붙은 값(UTC 등)은 한국 시각으로 바꾼 뒤 표기 - 오프셋만 떼면 시각이 어긋남
+    submitted = parse_submit_time(data.get("제출시간"))
+    if submitted is None:
+        raise ValueError(f"제출시간 형식 오류: {_to_text(data.get('제출시간'))!r}")
+    data["제출시간"] = submitted.strftime(SUBMIT_TIME_FORMAT)
+
+    return data
+
+
+def row_to_response(row: dict) -> dict:
+    """테이블 행을 세션 응답(dict) 전체로 복원 (컬럼 값 + 응답데이터 추가 항목)"""
+    response = {}
+    for col, key in COLUMN_FIELDS.items():
+        if col in row and _to_text(row[col]) != "":
+            response[key] = format_submit_time(row[col]) if col == "제출시간" else row[col]
+    payload = decode_payload(row.get("응답데이터"))
+    # full 방식으로 저장된 행은 원래 값(타입 포함)을 그대로 사용
+    response.update(payload)
+    return response
+
+
+def expand_payloads(df):
+    """내보내기용 - DataFrame의 응답데이터 컬럼을 전체 응답 JSON으로 복원"""
+    if "응답데이터" not in df.columns or df.empty:
+        return df
+    full = [json.dumps(row_to_response(row), ensure_ascii=False) for row in df.to_dict("records")]
+    return df.assign(응답데이터=full)
+
+
+# CSV로 받을 때 문자열로 고정할 컬럼 (시료 번호 "3"이 숫자로 바뀌지 않도록)
+# 숫자 컬럼은 JSON 경로와 같게 추론 (결측이 없으면 int64, 있으면 float64)
+_CSV_TEXT_COLUMNS = [col for col in FIELD_COLUMNS.values() if col not in ("나이", "신장", "체중")]
+_CSV_TEXT_COLUMNS += ["응답데이터", "created_at", "소속키"]
+
+
+def read_responses_arrow(text):
+    """PostgREST CSV 응답(.csv()) -> pyarrow.Table (pyarrow가 없으면 ImportError)"""
+    import io
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    if not isinstance(text, str) or not text.strip():
+        return pa.table({})
+    return pacsv.read_csv(io.BytesIO(text.encode("utf-8")), convert_options=pacsv.ConvertOptions(
+        column_types={col: pa.string() for col in _CSV_TEXT_COLUMNS},
+        null_values=[""],
+        strings_can_be_null=True,
+    ))
+
+
+def read_responses_csv(text):
+    """PostgREST CSV 응답(.csv()) -> DataFrame
+
+    행마다 dict를 만들지 않고 pyarrow CSV 리더(없으면 pandas C 파서)가 바로 컬럼을 만듭니다.
+    NULL은 빈 칸으로 옵니다.
+    """
+    import io
+    import pandas as pd
+
+    if not isinstance(text, str) or not text.strip():
+        return pd.DataFrame()
+    try:
+        return read_responses_arrow(text).to_pandas()
+    except ImportError:
+        return pd.read_csv(io.StringIO(text), dtype={col: str for col in _CSV_TEXT_COLUMNS},
+                           keep_default_na=False, na_values=[""])
+
+
+def with_submit_timestamps(table):
+    """제출시간 문자열 컬럼을 한국 시각 timestamp로 변환 (시간대 없는 값은 한국 시각으로 간주)"""
+    import pandas as pd
+    import pyarrow as pa
+
+    if "제출시간" not in table.column_names or pa.types.is_timestamp(table["제출시간"].type):
+        return table
+    text = table["제출시간"].to_pandas()
+    # 시간대 표기: Z, +09:00, +0900, +00 (PostgREST CSV의 timestamptz는 시만 붙음)
+    naive = text.notna() & ~text.str.contains(r"\d\d:\d\d(?::\d\d(?:\.\d+)?)?(?:[+-]\d\d(?::?\d\d)?|Z)$", na=False)
+    text = text.where(~naive, text + "+09:00")
+    submitted = pd.to_datetime(text, utc=True, format="ISO8601", errors="coerce").dt.tz_convert("Asia/Seoul")
+    index = table.column_names.index("제출시간")
+    return table.set_column(index, "제출시간", pa.Array.from_pandas(submitted))
+
+
+def fetch_pages(fetch_page, size_of=len, page_size: int = FETCH_PAGE_SIZE):
+    """fetch_page(start, end)를 page_size보다 작은 페이지가 올 때까지 이어 호출해 페이지를 차례로 생성
+
+    max-rows에서 잘리지 않도록 전체 조회는 모두 이 함수로 나눠 받습니다.
+    페이지 사이에 행이 추가돼도 건너뛰지 않도록 fetch_page는 id 같은 고정 순서로 정렬합니다.
+    """
+    start = 0
+    while True:
+        page = fetch_page(start, start + page_size - 1)
+        yield page
+        if size_of(page) < page_size:
+            return
+        start += page_size
+
+
+def concat_response_tables(tables):
+    """페이지별 pyarrow.Table을 하나로 (페이지마다 추론된 타입이 다르면 넓은 쪽으로 맞춤)"""
+    import pyarrow as pa
+
+    tables = [table for table in tables if table.num_columns]
+    if not tables:
+        return pa.table({})
+    return pa.concat_tables(tables, promote_options="permissive")
+
+
+def responses_to_csv(df) -> str:
+    """관리자 CSV 내보내기 (응답데이터는 전체 응답 JSON으로 복원)"""
+    return expand_payloads(df).to_csv(index=False)
+
+
+def build_participant_labels(df) -> list:
+    """상세 보기 선택 목록용 "성명 (이메일)" 라벨"""
+    return (df["성명"].astype(str) + " (" + df["이메일"].astype(str) + ")").tolist()
+
+
+def compact_payload_row(row: dict, mode: str = "compact") -> str | None:
+    """기존 행의 응답데이터를 mode 방식으로 다시 인코딩 (변화가 없으면 None)"""
+    encoded = encode_payload(row_to_response(row), mode)
+    return None if encoded == row.get("응답데이터") else encoded
+
+
+def normalize_event_id(value, default: str = DEFAULT_EVENT_ID) -> str:
+    """URL 등에서 받은 이벤트 ID 정리 (형식이 맞지 않으면 default)"""
+    text = _to_text(value)
+    return text if _EVENT_ID_RE.match(text) else default
+
+
+# 시식 페이지 정의 (페이지 순서대로)
+TASTE_TESTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "taste_tests.json")
+_TASTE_REQUIRED = ("id", "label", "emoji", "marker", "scenario", "instruction", "response_key", "colors")
+_TASTE_COLORS = ("background", "border", "accent", "outline")
+SAMPLES_PER_ROW = 3
+
+
+def load_taste_tests(path: str = TASTE_TESTS_PATH) -> tuple:
+    """시식 정의 파일을 읽고 검증 (잘못되면 ValueError)
+
+    각 항목에 시료 버튼 배치(rows)와 안내 문구용 순서(sequence)를 미리 계산해 둡니다.
+    column이 없는 시식은 응답데이터에만 저장됩니다.
+    """
+    with open(path, encoding="utf-8") as f:
+        tests = json.load(f).get("tests") or []
+    if not tests:
+        raise ValueError(f"{path}: 시식 정의가 없습니다")
+
+    compiled, ids, keys = [], set(), set()
+    for i, test in enumerate(tests):
+        where = f"{path} tests[{i}]"
+        missing = [k for k in _TASTE_REQUIRED if not test.get(k)]
+        missing += [f"colors.{k}" for k in _TASTE_COLORS if not (test.get("colors") or {}).get(k)]
+        if missing:
+            raise ValueError(f"{where}: 필수 항목 누락 {', '.join(missing)}")
+        if not _EVENT_ID_RE.match(test["id"]) or test["id"] in ids:
+            raise ValueError(f"{where}: id가 잘못되었거나 중복됩니다: {test['id']}")
+
+        key = test["response_key"]
+        if key in keys or (key in FIELD_COLUMNS and FIELD_COLUMNS[key] != test.get("column")):
+            raise ValueError(f"{where}: response_key를 사용할 수 없습니다: {key}")
+        if test.get("column") and FIELD_COLUMNS.get(key) != test["column"]:
+            raise ValueError(f"{where}: {test['column']} 컬럼은 {key}와 연결되어 있지 않습니다")
+
+        samples = tuple(str(s) for s in test.get("samples") or SAMPLE_CHOICES)
+        if len(set(samples)) != len(samples):
+            raise ValueError(f"{where}: 시료 번호가 중복됩니다")
+
+        ids.add(test["id"])
+        keys.add(key)
+        compiled.append({
+            **test,
+            "column": test.get("column"),
+            "samples": samples,
+            "rows": tuple(samples[j:j + SAMPLES_PER_ROW] for j in range(0, len(samples), SAMPLES_PER_ROW)),
+            "sequence": " → ".join(samples),
+        })
+    return tuple(compiled)
+
+
+# 소속 정규화 규칙 (대표 소속키 -> 별칭 목록)
+AFFILIATIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "affiliations.json")
+AFFILIATION_KEY_COLUMN = "소속키"
+_AFF_NOISE_RE = re.compile(r"[\W_]+")
+# 기관 종류 접미사 (정리된 표기 기준, 긴 것부터 비교) - 둘 다 알려진 종류인데 서로 다르면 다른 기관
+_AFF_TYPE_SUFFIXES = tuple(sorted((
+    "대학교", "대학원", "병원", "의원", "연구원", "연구소", "연구실", "보건소", "보건의료원", "센터",
+    "군청", "시청", "구청", "도청", "공사", "공단", "재단", "협회",
+    "university", "hospital", "institute", "college", "center", "centre",
+), key=len, reverse=True))
+
+
+def load_affiliation_rules(path: str = AFFILIATIONS_PATH) -> dict:
+    """소속 규칙 파일을 읽고 검증 (잘못되면 ValueError)"""
+    with open(path, encoding="utf-8") as f:
+        rules = json.load(f)
+    entries = rules.get("affiliations") or []
+    keys = set()
+    for i, entry in enumerate(entries):
+        if not _to_text(entry.get("key")) or entry["key"] in keys:
+            raise ValueError(f"{path} affiliations[{i}]: key가 비었거나 중복됩니다")
+        if not isinstance(entry.get("aliases", []), list):
+            raise ValueError(f"{path} affiliations[{i}]: aliases는 목록이어야 합니다")
+        keys.add(entry["key"])
+    threshold = float(rules.get("threshold", 0.75))
+    if not 0 < threshold <= 1:
+        raise ValueError(f"{path}: threshold는 0~1 사이여야 합니다")
+    return {"threshold": threshold, "strip": list(rules.get("strip") or []), "affiliations": entries}
+
+
+class AffiliationIndex:
+    """자유 입력 소속 -> 대표 소속키
+
+    규칙의 별칭과 정확히 같으면(공백·기호·대소문자 무시) 그 키, 아니면 별칭 bigram 색인에서
+    Dice 유사도가 threshold 이상인 가장 가까운 별칭의 키를 씁니다. 이때 입력과 별칭이 모두
+    알려진 기관 종류(대학교/병원/연구원/연구소 등)로 끝나는데 종류가 다르면 후보에서 뺍니다.
+    어느 쪽도 아니면 공백·기호·대소문자를 없앤 정리된 표기가 키가 되므로 "Foo Univ"와
+    "FOO-UNIV."는 같은 키입니다. 같은 입력은 캐시해 한 번만 계산합니다.
+    """
+
+    def __init__(self, rules: dict | None = None, cache_size: int = 4096):
+        rules = rules or {"threshold": 0.75, "strip": [], "affiliations": []}
+        self.threshold = rules["threshold"]
+        self._strip = [unicodedata.normalize("NFKC", s).lower() for s in rules["strip"]]
+        self._exact = {}
+        self._aliases = []      # (bigram 집합, 기관 종류, 키)
+        self._postings = defaultdict(list)  # bigram -> 별칭 번호
+        for entry in rules["affiliations"]:
+            for alias in (entry["key"], *entry.get("aliases", [])):
+                cleaned = self._clean(alias)
+                if not cleaned:
+                    continue
+                self._exact.setdefault(cleaned, entry["key"])
+                grams = self._grams(cleaned)
+                for gram in grams:
+                    self._postings[gram].append(len(self._aliases))
+                self._aliases.append((grams, self._kind(cleaned), entry["key"]))
+        self.key = lru_cache(maxsize=cache_size)(self._key)
+
+    def _clean(self, text: str) -> str:
+        text = unicodedata.normalize("NFKC", text).lower()
+        for token in self._strip:
+            text = text.replace(token, "")
+        return _AFF_NOISE_RE.sub("", text)
+
+    @staticmethod
+    def _kind(cleaned: str) -> str | None:
+        return next((suffix for suffix in _AFF_TYPE_SUFFIXES if cleaned.endswith(suffix)), None)
+
+    @staticmethod
+    def _grams(text: str) -> frozenset:
+        return frozenset(text[i:i + 2] for i in range(len(text) - 1)) or frozenset([text])
+
+    def _key(self, raw) -> str:
+        display = " ".join(unicodedata.normalize("NFKC", _to_text(raw)).split())
+        cleaned = self._clean(display)
+        if not cleaned:
+            return display
+        if cleaned in self._exact:
+            return self._exact[cleaned]
+
+        # 서울대학교병원/서울대학교, 식품연구소/한국식품연구원처럼 글자가 많이 겹쳐도
+        # 기관 종류가 다르면 다른 기관으로 봄 (종류를 모르는 끝 글자 오타는 유사도로만 판단)
+        grams = self._grams(cleaned)
+        kind = self._kind(cleaned)
+        shared = Counter(i for gram in grams for i in self._postings.get(gram, ()))
+        best, best_score = None, self.threshold
+        for i, n in shared.items():
+            alias_grams, alias_kind, key = self._aliases[i]
+            if kind and alias_kind and kind != alias_kind:
+                continue
+            score = 2 * n / (len(grams) + len(alias_grams))
+            if score >= best_score:
+                best, best_score = key, score
+        return best or cleaned
+
+
+@lru_cache(maxsize=8)
+def affiliation_index(path: str = AFFILIATIONS_PATH) -> AffiliationIndex:
+    """규칙 파일별 공용 색인 (파일이 없으면 공백 정리만 하는 빈 색인)"""
+    if not os.path.exists(path):
+        return AffiliationIndex()
+    return AffiliationIndex(load_affiliation_rules(path))
+
+
+def apply_response_filters(query, filters: dict):
+    """관리자 필터(dict)를 PostgREST 쿼리 조건으로 변환
+
+    filters 키: event, affiliation(소속키), date_from, date_to(포함), gender, sweet, salty
+    """
+    if filters.get("event"):
+        query = query.eq("이벤트", filters["event"])
+    if filters.get("affiliation"):
+        query = query.eq(AFFILIATION_KEY_COLUMN, filters["affiliation"])
+    if filters.get("date_from"):
+        query = query.gte("제출시간", submit_time_bound(filters["date_from"]))
+    if filters.get("date_to"):
+        end = date.fromisoformat(str(filters["date_to"])) + timedelta(days=1)
+        query = query.lt("제출시간", submit_time_bound(end))
+    if filters.get("gender"):
+        query = query.eq("성별", filters["gender"])
+    if filters.get("sweet"):
+        query = query.eq("단맛선호", filters["sweet"])
+    if filters.get("salty"):
+        query = query.eq("짠맛선호", filters["salty"])
+    return query
+
+
+def filter_response_table(table, filters: dict):
+    """apply_response_filters와 같은 조건을 pyarrow.Table에 적용 (제출시간은 timestamp 컬럼)"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if not table.num_columns:
+        return table
+    conditions = [
+        pc.equal(table[col], str(filters[key]))
+        for key, col in (("event", "이벤트"), ("affiliation", AFFILIATION_KEY_COLUMN), ("gender", "성별"),
+                         ("sweet", "단맛선호"), ("salty", "짠맛선호"))
+        if filters.get(key) and col in table.column_names
+    ]
+    if filters.get("date_from"):
+        start = datetime.fromisoformat(submit_time_bound(filters["date_from"]))
+        conditions.append(pc.greater_equal(table["제출시간"], pa.scalar(start).cast(table["제출시간"].type)))
+    if filters.get("date_to"):
+        end = datetime.fromisoformat(submit_time_bound(date.fromisoformat(str(filters["date_to"])) + timedelta(days=1)))
+        conditions.append(pc.less(table["제출시간"], pa.scalar(end).cast(table["제출시간"].type)))
+    if not conditions:
+        return table
+    mask = conditions[0]
+    for condition in conditions[1:]:
+        mask = pc.and_(mask, condition)
+    return table.filter(pc.fill_null(mask, False))
+
+
+def create_client_from_env():
+    """명령행 도구용 Supabase 클라이언트 (.env 또는 .streamlit/secrets.toml)"""
+    from supabase import create_client
+
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+
+    url = os.environ.get("SUPABASE_URL")
+    key = os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
+    if not (url and key) and os.path.exists(os.path.join(".streamlit", "secrets.toml")):
+        import tomllib
+        with open(os.path.join(".streamlit", "secrets.toml"), "rb") as f:
+            secrets = tomllib.load(f)
+        url = url or secrets.get("SUPABASE_URL")
+        key = key or secrets.get("SUPABASE_SERVICE_ROLE_KEY")
+    if not (url and key):
+        raise RuntimeError("SUPABASE_URL / SUPABASE_SERVICE_ROLE_KEY 가 설정되지 않았습니다")
+    return create_client(url, key)
+
+
+def _to_text(value) -> str:
+    if value is None or value != value:  # None, NaN 제외
+        return ""
+    return str(value).strip()
+
+
+def _to_number(value):
+    try:
+        if value is None or value == "":
+            return None
+        num = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if num != num else num  # NaN 제외
+
+
+def normalize_email(value) -> str:
+    """재참여 판별·참여자 수 집계용 이메일 (앞뒤 공백 제거, 소문자)"""
+    return _to_text(value).lower()
+
+
+class BloomFilter:
+    """집합 포함 여부 근사 (거짓 양성만 있고 거짓 음성은 없음)
+
+    capacity개를 넣었을 때 거짓 양성 비율이 error_rate가 되도록 비트 수와 해시 수를 정합니다.
+    그보다 많이 넣으면 거짓 양성 비율이 점점 올라갑니다.
+    """
+
+    def __init__(self, capacity: int = 100_000, error_rate: float = 0.01):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str) -> range:
+        # 두 해시의 선형 결합으로 k개 위치 (Kirsch-Mitzenmacher) - h1, h1+h2, ... 를 size로 나눈 나머지
+        h = int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+        h1, h2 = h >> 32, (h & 0xFFFFFFFF) | 1
+        return range(h1, h1 + self.hashes * h2, h2)
+
+    def add(self, value: str):
+        bits, size = self.bits, self.size
+        for h in self._positions(value):
+            pos = h % size
+            bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, value: str) -> bool:
+        bits, size = self.bits, self.size
+        for h in self._positions(value):
+            pos = h % size
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+
+class HyperLogLog:
+    """고유 값 수 근사 (2^p바이트 고정 메모리, 표준 오차 약 1.04/sqrt(2^p))"""
+
+    def __init__(self, p: int = 12):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(self.m)
+
+    def add(self, value: str):
+        h = int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+        rest = h & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        index = h >> (64 - self.p)
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.p != self.p:
+            raise ValueError("정밀도(p)가 다른 HyperLogLog는 합칠 수 없습니다")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self) -> int:
+        zeros = self.registers.count(0)
+        if zeros == self.m:
+            return 0
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / sum(2.0 ** -r for r in self.registers)
+        if estimate <= 2.5 * self.m and zeros:
+            # 작은 범위는 빈 레지스터 비율로 추정 (linear counting)
+            estimate = self.m * math.log(self.m / zeros)
+        return round(estimate)
+
+
+class TDigest:
+    """분위수 근사 (병합형 t-digest) - 중심점 수는 compression에 비례하고 값 개수에는 로그로만 늘어남
+
+    양 끝 분위수는 작은 중심점으로 정밀하게, 가운데는 큰 중심점으로 묶습니다.
+    """
+
+    def __init__(self, compression: int = 100):
+        self.compression = compression
+        self.centroids = []  # (평균, 가중치), 평균 순
+        self._buffer = []
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, weight: float = 1):
+        # 버퍼에 모았다가 한꺼번에 정렬·병합 (min/max도 그때 갱신)
+        self._buffer.append((value, weight))
+        self.count += weight
+        if len(self._buffer) >= self.compression * 20:
+            self._compress()
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        items = sorted(self.centroids + self._buffer)
+        self._buffer = []
+        self.min = min(self.min, items[0][0])
+        self.max = max(self.max, items[-1][0])
+        merged = []
+        cumulative = 0.0
+        mean, weight = items[0]
+        for m, w in items[1:]:
+            q = (cumulative + (weight + w) / 2) / self.count
+            if weight + w <= max(1.0, 4 * self.count * q * (1 - q) / self.compression):
+                mean += (m - mean) * w / (weight + w)
+                weight += w
+            else:
+                merged.append((mean, weight))
+                cumulative += weight
+                mean, weight = m, w
+        merged.append((mean, weight))
+        self.centroids = merged
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        if other.count:
+            self._buffer.extend(other.centroids)
+            self._buffer.extend(other._buffer)
+            self.count += other.count
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._compress()
+        return self
+
+    def quantile(self, q: float) -> float | None:
+        self._compress()
+        if not self.centroids:
+            return None
+        target = q * self.count
+        cumulative = 0.0
+        prev_mean, prev_mid = self.min, 0.0
+        for mean, weight in self.centroids:
+            mid = cumulative + weight / 2
+            if target < mid:
+                if mid == prev_mid:
+                    return mean
+                return prev_mean + (mean - prev_mean) * (target - prev_mid) / (mid - prev_mid)
+            cumulative += weight
+            prev_mean, prev_mid = mean, mid
+        if self.count == prev_mid:
+            return self.max
+        return prev_mean + (self.max - prev_mean) * (target - prev_mid) / (self.count - prev_mid)
+
+
+class ResponseSketch:
+    """응답 수와 무관한 고정 메모리 요약 - 이벤트끼리 merge()로 합칠 수 있음
+
+    참여자 수는 HyperLogLog, 시료 선택·소속키별 응답 수는 값 종류가 적어 정확한 카운터,
+    나이·BMI 분포는 t-digest입니다. ResponseAggregates.sketch()로 만듭니다.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.participants = HyperLogLog()
+        self.sweet = Counter()
+        self.salty = Counter()
+        self.by_affiliation = Counter()
+        self.age = TDigest()
+        self.bmi = TDigest()
+
+    def merge(self, other: "ResponseSketch") -> "ResponseSketch":
+        self.count += other.count
+        self.participants.merge(other.participants)
+        self.sweet.update(other.sweet)
+        self.salty.update(other.salty)
+        self.by_affiliation.update(other.by_affiliation)
+        self.age.merge(other.age)
+        self.bmi.merge(other.bmi)
+        return self
+
+    def quantiles(self, field: str, qs=(0.1, 0.5, 0.9)) -> list:
+        """field: 'age' 또는 'bmi'"""
+        digest = {"age": self.age, "bmi": self.bmi}[field]
+        return [digest.quantile(q) for q in qs]
+
+
+class ResponseAggregates:
+    """응답 테이블의 누적 집계
+
+    저장에 성공할 때마다 add()로 한 행씩 갱신하므로 대시보드 통계는
+    응답 수와 무관하게 O(1)로 읽을 수 있습니다. approximate=True이면 이메일 집합을
+    두지 않고 참여자 수를 스케치(HyperLogLog)에서 읽어 메모리가 응답 수와 무관해집니다.
+    이때 재참여 판별(has_participant)은 블룸 필터로 하므로 드물게 처음 온 참여자를
+    재참여로 볼 수 있습니다.
+    """
+
+    def __init__(self, approximate: bool = False):
+        self.approximate = approximate
+        # 바뀔 때마다 증가 (재구성 후에도 되돌아가지 않음) - 외부 캐시·ETag 키
+        self.version = 0
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._reset_locked()
+
+    def _reset_locked(self):
+        self.version += 1
+        self.count = 0
+        # 이벤트 간 병합용 스케치 재료 (카운터는 아래 정확한 집계를 그대로 씀)
+        self.participants = HyperLogLog()
+        self.age_digest = TDigest()
+        self.bmi_digest = TDigest()
+        self.emails = set()
+        self.seen = BloomFilter() if self.approximate else None
+        self.age_sum = 0.0
+        self.age_n = 0
+        self.bmi_sum = 0.0
+        self.bmi_n = 0
+        self.by_date = Counter()
+        self.by_affiliation = Counter()
+        self.sweet = Counter()
+        self.salty = Counter()
+        self.sweet_by_affiliation = defaultdict(Counter)
+        self.salty_by_affiliation = defaultdict(Counter)
+
+    def _add_locked(self, row: dict):
+        self.version += 1
+        self.count += 1
+
+        email = normalize_email(row.get("이메일"))
+        if email:
+            self.participants.add(email)
+            if self.approximate:
+                self.seen.add(email)
+            else:
+                self.emails.add(email)
+
+        age = _to_number(row.get("나이"))
+        if age is not None:
+            self.age_sum += age
+            self.age_n += 1
+            self.age_digest.add(age)
+
+        height = _to_number(row.get("신장"))
+        weight = _to_number(row.get("체중"))
+        bmi = weight / ((height / 100) ** 2) if height and weight is not None else None
+        if bmi is not None:
+            self.bmi_sum += bmi
+            self.bmi_n += 1
+            self.bmi_digest.add(bmi)
+
+        submitted = parse_submit_time(row.get("제출시간"))
+        if submitted:
+            self.by_date[submitted.date().isoformat()] += 1
+
+        # 소속키가 채워지기 전에 저장된 행은 읽을 때 계산
+        aff = _to_text(row.get(AFFILIATION_KEY_COLUMN)) or affiliation_index().key(row.get("소속"))
+        if aff:
+            self.by_affiliation[aff] += 1
+
+        sweet = _to_text(row.get("단맛선호"))
+        if sweet:
+            self.sweet[sweet] += 1
+            if aff:
+                self.sweet_by_affiliation[aff][sweet] += 1
+
+        salty = _to_text(row.get("짠맛선호"))
+        if salty:
+            self.salty[salty] += 1
+            if aff:
+                self.salty_by_affiliation[aff][salty] += 1
+
+    def add(self, row: dict):
+        """저장된 한 행을 집계에 반영"""
+        with self._lock:
+            self._add_locked(row)
+
+    def rebuild(self, rows):
+        """테이블 전체(행 dict 목록)로부터 집계를 다시 계산"""
+        with self._lock:
+            self._reset_locked()
+            for row in rows:
+                self._add_locked(row)
+
+    def has_participant(self, email: str) -> bool:
+        """이미 응답을 저장한 이메일인지 (O(1), 조회 없음)"""
+        email = normalize_email(email)
+        if not email:
+            return False
+        with self._lock:
+            return email in (self.seen if self.approximate else self.emails)
+
+    @property
+    def unique_emails(self) -> int:
+        if self.approximate:
+            return self.participants.count()
+        return len(self.emails)
+
+    def sketch(self) -> ResponseSketch:
+        """다른 이벤트와 합칠 수 있는 스케치 사본"""
+        with self._lock:
+            sketch = ResponseSketch()
+            sketch.count = self.count
+            sketch.participants.merge(self.participants)
+            sketch.sweet.update(self.sweet)
+            sketch.salty.update(self.salty)
+            sketch.by_affiliation.update(self.by_affiliation)
+            sketch.age.merge(self.age_digest)
+            sketch.bmi.merge(self.bmi_digest)
+            return sketch
+
+    def summary(self, samples=SAMPLE_CHOICES) -> dict:
+        """공개 화면용 집계 (시료별·소속별 응답 수만, 개인 정보 없음)"""
+        with self._lock:
+            return {
+                "version": self.version,
+                "count": self.count,
+                "participants": self.unique_emails,
+                "approximate": self.approximate,
+                "sweet": {s: self.sweet.get(s, 0) for s in samples},
+                "salty": {s: self.salty.get(s, 0) for s in samples},
+                "affiliations": {
+                    aff: {
+                        "count": n,
+                        "sweet": {s: self.sweet_by_affiliation.get(aff, {}).get(s, 0) for s in samples},
+                        "salty": {s: self.salty_by_affiliation.get(aff, {}).get(s, 0) for s in samples},
+                    }
+                    for aff, n in self.by_affiliation.most_common()
+                },
+            }
+
+    @property
+    def mean_age(self) -> float:
+        return self.age_sum / self.age_n if self.age_n else 0.0
+
+    @property
+    def mean_bmi(self) -> float:
+        return self.bmi_sum / self.bmi_n if self.bmi_n else 0.0
+
+    def count_on(self, date_str: str) -> int:
+        return self.by_date.get(date_str, 0)
+
+    def affiliations(self) -> list:
+        with self._lock:
+            return sorted(self.by_affiliation)
+
+    def sample_counts(self, column: str, affiliation: str | None = None) -> dict:
+        """시료별 선택 수 (column: '단맛선호' 또는 '짠맛선호')"""
+        with self._lock:
+            if column == "단맛선호":
+                counts = self.sweet if affiliation is None else self.sweet_by_affiliation.get(affiliation, {})
+            elif column == "짠맛선호":
+                counts = self.salty if affiliation is None else self.salty_by_affiliation.get(affiliation, {})
+            else:
+                raise KeyError(column)
+            return dict(counts)
+
+
+class TokenBucket:
+    """초당 rate개씩 채워지고 최대 burst개까지 쌓이는 토큰 버킷 (잠금은 호출자가 관리)"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """토큰 하나를 얻기까지 남은 시간 (0이면 바로 가능)"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class WaitStats:
+    """대기 시간 지표 (건수, 평균, 최대, 최근 p95)"""
+
+    def __init__(self, window: int = 200):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def snapshot(self) -> dict:
+        recent = sorted(self.recent)
+        p95 = recent[min(len(recent) - 1, int(len(recent) * 0.95))] if recent else 0.0
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p95_ms": p95 * 1000,
+            "max_ms": self.max * 1000,
+        }
+
+
+class AdmissionController:
+    """Supabase 요청 수 제한 (프로세스 공용)
+
+    요청 종류마다 자체 버킷이 있고, 모든 요청은 전체 버킷(요금제 한도)도 함께 씁니다.
+    한도를 넘은 요청은 실패하지 않고 대기하며, 전체 한도를 두고 경쟁할 때는
+    우선순위가 높은 종류(숫자가 작은 쪽)가 먼저 통과합니다. 자기 버킷 한도로 기다리는
+    요청에는 양보하지 않으므로 한 종류가 밀려도 다른 종류는 막히지 않습니다.
+    """
+
+    def __init__(self, budgets: dict, total: tuple, priorities: dict):
+        self._cond = threading.Condition()
+        self._buckets = {kind: TokenBucket(*budget) for kind, budget in budgets.items()}
+        self._total = TokenBucket(*total)
+        self._priorities = priorities
+        self._waiting = Counter()
+        self._stats = {kind: WaitStats() for kind in budgets}
+
+    def _blocked_by_higher(self, kind: str, now: float) -> bool:
+        """우선순위가 높은 종류가 전체 버킷 차례를 기다리는 중인지 (자기 버킷이 비어 기다리는 중이면 제외)"""
+        mine = self._priorities[kind]
+        return any(n and self._priorities[k] < mine and self._buckets[k].delay(now) == 0
+                   for k, n in self._waiting.items())
+
+    def acquire(self, kind: str) -> float:
+        """토큰을 얻을 때까지 대기하고 대기한 시간(초)을 반환"""
+        start = time.monotonic()
+        bucket = self._buckets[kind]
+        with self._cond:
+            self._waiting[kind] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._blocked_by_higher(kind, now):
+                        self._cond.wait(max(self._total.delay(now), 0.01))
+                        continue
+                    delay = max(bucket.delay(now), self._total.delay(now))
+                    if delay == 0:
+                        bucket.take()
+                        self._total.take()
+                        break
+                    self._cond.wait(delay)
+            finally:
+                self._waiting[kind] -= 1
+                self._cond.notify_all()
+            waited = time.monotonic() - start
+            self._stats[kind].record(waited)
+        return waited
+
+    def queued(self) -> dict:
+        with self._cond:
+            return dict(self._waiting)
+
+    def metrics(self) -> dict:
+        with self._cond:
+            return {kind: stats.snapshot() for kind, stats in self._stats.items()}
+
+
+class SingleFlight:
+    """같은 키로 동시에 들어온 호출을 하나로 합침 (프로세스 공용)
+
+    먼저 온 호출만 fn을 실행하고, 그동안 들어온 같은 키의 호출은 그 결과(또는 예외)를
+    함께 받습니다. 끝난 결과는 보관하지 않으므로 캐시가 아니라 진행 중인 중복만 없앱니다.
+    지표는 키의 첫 요소(조회 종류)별로 모읍니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._issued = Counter()
+        self._coalesced = Counter()
+
+    def do(self, key: tuple, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event(), "value": None, "error": None}
+                self._issued[key[0]] += 1
+            else:
+                self._coalesced[key[0]] += 1
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["value"]
+        try:
+            call["value"] = fn()
+            return call["value"]
+        except BaseException as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def metrics(self) -> dict:
+        """{종류: {"issued": 실제 실행 수, "coalesced": 합류한 호출 수}}"""
+        with self._lock:
+            return {kind: {"issued": self._issued[kind], "coalesced": self._coalesced[kind]}
+                    for kind in self._issued}
+
+
+class BackgroundPool:
+    """관리자 무거운 작업(조회·집계·차트·내보내기)용 저우선 작업 풀 (프로세스 공용)
+
+    참여자 페이지 실행 시간을 observe()로 받아 지수 이동 평균이 목표를 넘으면
+    동시 실행 상한을 절반으로 줄이고, 목표의 절반 아래면 하나씩 늘립니다.
+    참여자 요청은 이 풀을 거치지 않으므로 관리자 작업 뒤에 줄 서지 않습니다.
+    """
+
+    def __init__(self, max_workers: int = 4, target_ms: float = 500.0, min_workers: int = 1,
+                 adjust_interval: float = 1.0, idle_after: float = 10.0):
+        self.max_workers = max(1, max_workers)
+        self.min_workers = max(1, min(min_workers, self.max_workers))
+        self.target = target_ms / 1000
+        self.adjust_interval = adjust_interval
+        self.idle_after = idle_after
+        self.limit = self.max_workers
+        self.latency = 0.0
+        self.observed = 0
+        self.completed = 0
+        self._running = 0
+        self._waiting = 0
+        self._last_seen = 0.0
+        self._last_adjust = 0.0
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="mpti-admin")
+
+    def observe(self, seconds: float):
+        """참여자 페이지 한 번 실행에 걸린 시간"""
+        with self._cond:
+            self.latency = seconds if not self.observed else 0.8 * self.latency + 0.2 * seconds
+            self.observed += 1
+            self._last_seen = time.monotonic()
+            self._adjust_locked(self._last_seen)
+
+    def _adjust_locked(self, now: float):
+        if now - self._last_adjust < self.adjust_interval:
+            return
+        self._last_adjust = now
+        # 한동안 참여자 실행이 없으면 지연이 없는 것으로 보고 상한을 회복
+        idle = now - self._last_seen > self.idle_after
+        if not idle and self.latency > self.target:
+            self.limit = max(self.min_workers, self.limit // 2)
+        elif (idle or self.latency < self.target / 2) and self.limit < self.max_workers:
+            self.limit += 1
+            self._cond.notify_all()
+
+    def _run(self, fn, args, kwargs):
+        with self._cond:
+            self._waiting += 1
+            while self._running >= self.limit:
+                self._cond.wait(self.adjust_interval)
+                self._adjust_locked(time.monotonic())
+            self._waiting -= 1
+            self._running += 1
+        self._local.worker = True
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._local.worker = False
+            with self._cond:
+                self._running -= 1
+                self.completed += 1
+                self._cond.notify_all()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """상한 안에서 차례가 오면 실행 (기다리지 않음)"""
+        return self._executor.submit(self._run, fn, args, kwargs)
+
+    def run(self, fn, *args, **kwargs):
+        """풀에서 실행하고 결과를 기다림 (풀 작업 안에서 부르면 그 자리에서 실행 - 상한 1일 때 교착 방지)"""
+        if getattr(self._local, "worker", False):
+            return fn(*args, **kwargs)
+        return self.submit(fn, *args, **kwargs).result()
+
+    def metrics(self) -> dict:
+        with self._cond:
+            return {
+                "limit": self.limit, "max_workers": self.max_workers, "running": self._running,
+                "waiting": self._waiting, "completed": self.completed,
+                "latency_ms": self.latency * 1000, "target_ms": self.target * 1000, "observed": self.observed,
+            }
+
+
+class CircuitOpenError(RuntimeError):
+    """차단기가 열려 있어 요청을 보내지 않음"""
+
+
+class CircuitBreaker:
+    """연속 오류가 나면 요청을 즉시 실패시키는 차단기
+
+    failure_threshold번 연속 실패하면 열리고, 열려 있는 동안 call()은 바로
+    CircuitOpenError를 냅니다. 백그라운드 프로브가 probe_interval마다 probe()를
+    시도해 성공하면 다시 닫습니다.
+    """
+
+    def __init__(self, probe, failure_threshold: int = 3, probe_interval: float = 15.0):
+        self._probe = probe
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.last_error = None
+        self._probing = False
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def check(self):
+        """열려 있으면 바로 CircuitOpenError (한도 대기 같은 준비 작업 전에 먼저 확인)"""
+        if self.is_open:
+            raise CircuitOpenError(f"Supabase 연결 차단 중 (최근 오류: {self.last_error})")
+
+    def call(self, fn, *args, **kwargs):
+        self.check()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        with self._lock:
+            self.failures = 0
+        return result
+
+    def _record_failure(self, error: Exception):
+        with self._lock:
+            self.failures += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+            if self.failures < self.failure_threshold or self.opened_at is not None:
+                return
+            self.opened_at = time.monotonic()
+            start_probe = not self._probing
+            self._probing = True
+        if start_probe:
+            threading.Thread(target=self._probe_loop, name="supabase-probe", daemon=True).start()
+
+    def _probe_loop(self):
+        while True:
+            time.sleep(self.probe_interval)
+            try:
+                self._probe()
+            except Exception as e:
+                with self._lock:
+                    self.last_error = f"{type(e).__name__}: {e}"
+                continue
+            with self._lock:
+                self.failures = 0
+                self.opened_at = None
+                self._probing = False
+            return
+
+
+class SnapshotStore:
+    """키별 마지막 정상 응답 (차단기가 열렸을 때 대신 제공)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._items = {}
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = (value, time.time())
+
+    def get(self, key):
+        """(값, 경과 초) 또는 None"""
+        with self._lock:
+            item = self._items.get(key)
+        if item is None:
+            return None
+        value, saved_at = item
+        return value, time.time() - saved_at
+
+
+class RerunProfiler:
+    """관리자가 지정한 페이지 함수의 다음 N번 실행을 cProfile로 기록
+
+    대상이 지정되지 않은 동안에는 호출 측에서 target 비교 한 번만 합니다.
+    cProfile은 한 번에 하나만 켤 수 있으므로 동시에 들어온 실행은 기록하지 않고 그대로 통과시킵니다.
+    """
+
+    def __init__(self, directory: str, keep: int = 50):
+        self.directory = directory
+        self.keep = keep
+        self.target = None
+        self.remaining = 0
+        self._lock = threading.Lock()
+        self._busy = threading.Lock()
+        self._captures = deque(maxlen=keep)
+
+    def arm(self, target: str, runs: int):
+        with self._lock:
+            self.target, self.remaining = target, max(1, int(runs))
+
+    def disarm(self):
+        with self._lock:
+            self.target, self.remaining = None, 0
+
+    def run(self, fn, *args, **kwargs):
+        """fn이 대상이고 기록 횟수가 남아 있으면 프로파일링하며 실행"""
+        if not self._busy.acquire(blocking=False):
+            return fn(*args, **kwargs)
+        with self._lock:
+            take = self.target == fn.__name__ and self.remaining > 0
+            if take:
+                self.remaining -= 1
+                if not self.remaining:
+                    self.target = None
+        if not take:
+            self._busy.release()
+            return fn(*args, **kwargs)
+
+        import cProfile
+        profile = cProfile.Profile()
+        started = datetime.now(SUBMIT_TZ)
+        t0 = time.perf_counter()
+        try:
+            # st.rerun()/st.stop()도 예외로 빠져나오므로 finally에서 저장
+            return profile.runcall(fn, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - t0
+            self._busy.release()
+            self._save(profile, fn.__name__, started, elapsed)
+
+    def _save(self, profile, name: str, started: datetime, elapsed: float):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{started:%Y%m%d_%H%M%S_%f}_{name}.prof")
+        profile.dump_stats(path)
+        with self._lock:
+            self._captures.append({"path": path, "page": name, "started": started, "seconds": elapsed})
+            # 목록에서 밀려난 기록(이전 실행이 남긴 파일 포함)은 디스크에서도 지움 - 파일명이 시작 시각순
+            stale = sorted(f for f in os.listdir(self.directory) if f.endswith(".prof"))[:-self.keep]
+        for f in stale:
+            try:
+                os.remove(os.path.join(self.directory, f))
+            except OSError:
+                pass
+
+    def captures(self) -> list:
+        """최근 기록 (최신순)"""
+        with self._lock:
+            return list(reversed(self._captures))
+
+    @staticmethod
+    def summarize(path: str, limit: int = 25) -> list:
+        """.prof 파일 -> 누적 시간 상위 함수 목록"""
+        import pstats
+        stats = pstats.Stats(path)
+        rows = []
+        for (filename, line, func), (_, calls, tottime, cumtime, _) in stats.stats.items():
+            rows.append({
+                "함수": f"{func} ({os.path.basename(filename)}:{line})",
+                "호출 수": calls,
+                "자체(ms)": round(tottime * 1000, 2),
+                "누적(ms)": round(cumtime * 1000, 2),
+                "누적 비율": min(1.0, cumtime / stats.total_tt) if stats.total_tt else 0.0,
+            })
+        rows.sort(key=lambda r: r["누적(ms)"], reverse=True)
+        return rows[:limit]
+
+
+def run_warmup(steps, log=None) -> list:
+    """(이름, 함수) 단계를 차례로 실행하고 단계별 소요 시간을 기록
+
+    실패한 단계는 오류만 남기고 다음 단계로 넘어갑니다 (예열은 서비스에 필수가 아님).
+    """
+    results = []
+    for name, fn in steps:
+        t0 = time.perf_counter()
+        error = None
+        try:
+            fn()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        results.append({"단계": name, "소요(ms)": round(elapsed_ms, 1), "오류": error})
+        if log:
+            log(f"[warmup] {name}: {elapsed_ms:.0f} ms" + (f" ({error})" if error else ""))
+    if log:
+        log(f"[warmup] 완료: {sum(r['소요(ms)'] for r in results):.0f} ms")
+    return results
+
+
+# 참여 단계 이벤트 (퍼널) 저장 테이블
+EVENTS_TABLE = "taste_mpti_events"
+
+
+class FunnelRecorder:
+    """참여 단계 이벤트 링 버퍼
+
+    화면 쪽은 record()에서 deque에 한 번 추가만 하고, 저장은 백그라운드 스레드가
+    interval마다 batch_size 단위로 sink(이벤트 튜플 목록)에 넘깁니다. 저장에 실패한 묶음은
+    다음 주기에 다시 시도하며, 버퍼가 가득 차면 가장 오래된 이벤트부터 버립니다.
+    """
+
+    def __init__(self, sink, capacity: int = 10000, batch_size: int = 500, interval: float = 5.0):
+        self._buffer = deque(maxlen=capacity)
+        self._sink = sink
+        self.batch_size = batch_size
+        self.interval = interval
+        self._flush_lock = threading.Lock()
+        self._retry = None
+        self.flushed = 0
+        self.failures = 0
+        self.last_error = None
+        threading.Thread(target=self._loop, name="funnel-flush", daemon=True).start()
+
+    def record(self, session: str, event: str, page: str, action: str, value=None):
+        self._buffer.append((time.time(), session, event, page, action, value))
+
+    def pending(self) -> int:
+        return len(self._buffer) + len(self._retry or ())
+
+    def flush(self):
+        """버퍼를 비울 때까지 묶음 단위로 저장 (실패하면 다음 주기로 미룸)"""
+        with self._flush_lock:
+            while True:
+                batch, self._retry = self._retry, None
+                if not batch:
+                    batch = []
+                    while self._buffer and len(batch) < self.batch_size:
+                        batch.append(self._buffer.popleft())
+                if not batch:
+                    return
+                try:
+                    self._sink(batch)
+                except Exception as e:
+                    self.failures += 1
+                    self.last_error = f"{type(e).__name__}: {e}"
+                    self._retry = batch
+                    return
+                self.flushed += len(batch)
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+
+def funnel_rows(batch) -> list:
+    """이벤트 튜플 -> taste_mpti_events 행"""
+    return [
+        {"세션": session, "이벤트": event, "페이지": page, "동작": action,
+         "값": None if value is None else str(value),
+         "발생시간": datetime.fromtimestamp(ts, SUBMIT_TZ).isoformat(timespec="milliseconds")}
+        for ts, session, event, page, action, value in batch
+    ]
+
+
+def jsonl_sink(path: str):
+    """Supabase 대신 로컬 JSONL 파일에 이벤트를 추가하는 sink"""
+    def write(batch):
+        with open(path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(row, ensure_ascii=False) + "\n" for row in funnel_rows(batch))
+    return write
+
+
+def read_jsonl_events(path: str, event: str) -> list:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [row for row in rows if row.get("이벤트") == event]
+
+
+def funnel_tables(rows: list, steps: list):
+    """이벤트 행 -> 단계별 도달 세션 수와 체류 시간 DataFrame
+
+    steps: [(페이지 이름, 표시 이름), ...] 순서대로. 체류 시간은 같은 세션의 다음
+    페이지 진입까지 걸린 시간이며, 마지막으로 본 페이지(이탈 지점)는 제외됩니다.
+    """
+    import pandas as pd
+
+    names = [name for name, _ in steps]
+    df = pd.DataFrame(rows, columns=["세션", "페이지", "동작", "발생시간"])
+    views = df[df["동작"] == "view"].copy()
+    views["발생시간"] = pd.to_datetime(views["발생시간"], utc=True, format="ISO8601")
+    views = views.sort_values(["세션", "발생시간"])
+
+    reached = views.groupby("페이지")["세션"].nunique().reindex(names, fill_value=0)
+    funnel = pd.DataFrame({"단계": [label for _, label in steps], "도달 세션": reached.to_numpy()})
+    first = funnel["도달 세션"].iloc[0] if len(funnel) else 0
+    funnel["시작 대비"] = funnel["도달 세션"] / first if first else 0.0
+
+    views["체류(초)"] = (views.groupby("세션")["발생시간"].shift(-1) - views["발생시간"]).dt.total_seconds()
+    dwell = views.dropna(subset=["체류(초)"]).groupby("페이지")["체류(초)"]
+    dwell = pd.DataFrame({"중앙값(초)": dwell.median(), "p90(초)": dwell.quantile(0.9), "세션 수": dwell.size()})
+    dwell = dwell.reindex(names).dropna(how="all").astype({"세션 수": int})
+    dwell.index = [dict(steps)[name] for name in dwell.index]
+    return funnel, dwell.round(1)
+
+
+class ArrowSnapshot:
+    """응답 테이블 스냅샷 - 로컬 Arrow IPC 파일을 메모리 매핑으로 공유
+
+    같은 서버의 모든 프로세스·세션이 한 파일의 페이지를 함께 읽습니다. 갱신은 파일 잠금을
+    잡은 한 곳만 하며, 임시 파일에 쓴 뒤 교체하므로 읽는 쪽은 항상 완전한 파일을 봅니다.
+    교체 전에 매핑한 테이블은 참조가 남아 있는 동안 이전 파일 내용을 그대로 유지합니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._mapped = None  # (mtime_ns, Table)
+
+    def age(self) -> float | None:
+        """마지막 갱신 후 경과 초 (파일이 없으면 None)"""
+        try:
+            return time.time() - os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def version(self) -> int | None:
+        """스냅샷 데이터 버전 (파일 수정 시각 ns, 파일이 없으면 None) - 파생 결과의 캐시 키용"""
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def read(self):
+        """매핑된 pyarrow.Table (파일이 바뀌었으면 다시 매핑)"""
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+
+        mtime = os.stat(self.path).st_mtime_ns
+        with self._lock:
+            if self._mapped is None or self._mapped[0] != mtime:
+                self._mapped = (mtime, ipc.open_file(pa.memory_map(self.path)).read_all())
+            return self._mapped[1]
+
+    def refresh(self, load, max_age: float | None = None) -> bool:
+        """load()가 돌려준 Table로 파일을 교체 (실제로 갱신했으면 True)
+
+        다른 프로세스가 갱신 중이면 기다렸다가 그 결과를 쓰고, 그 사이 max_age보다
+        새로워졌으면 다시 조회하지 않습니다.
+        """
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # 갱신 중에도 다른 세션은 이전 파일을 계속 읽음
+        with self._write_lock, open(f"{self.path}.lock", "a") as lock_file:
+            _lock_file(lock_file)
+            try:
+                age = self.age()
+                if max_age is not None and age is not None and age <= max_age:
+                    return False
+                table = load()
+                tmp = f"{self.path}.{os.getpid()}.tmp"
+                # 압축하지 않아야 매핑한 페이지를 복사 없이 바로 읽을 수 있음
+                with pa.OSFile(tmp, "wb") as sink, ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+                os.replace(tmp, self.path)
+                return True
+            finally:
+                _unlock_file(lock_file)
+
+
+def _lock_file(f):
+    try:
+        import fcntl
+    except ImportError:  # Windows - 프로세스 내 잠금만 사용
+        return
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+
+def _unlock_file(f):
+    try:
+        import fcntl
+    except ImportError:
+        return
+    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
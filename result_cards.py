@@ -0,0 +1,251 @@
+"""참여자별 미각 MPTI 결과 카드 일괄 생성
+
+Agg 백엔드로 카드를 그려 프로세스 풀에서 병렬 렌더링하고, 결과를 ZIP으로 바로 씁니다.
+한글 폰트(fonts/NanumGothic.ttf)는 워커마다 한 번만 등록합니다.
+
+    python result_cards.py -o cards.zip --format pdf --group affiliation
+    python result_cards.py -o cards.zip --csv 미각MPTI_전체응답.csv
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import re
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+from mpti_core import DEFAULT_EVENT_TITLE, RESPONSE_TABLE, affiliation_index, create_client_from_env, fetch_pages
+
+FONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts", "NanumGothic.ttf")
+
+_font_registered = False
+
+
+def register_korean_font() -> str | None:
+    """NanumGothic을 matplotlib에 등록하고 기본 글꼴로 지정 (프로세스당 한 번)"""
+    global _font_registered
+    import matplotlib as mpl
+    import matplotlib.font_manager as fm
+
+    if not os.path.exists(FONT_PATH):
+        return None
+    try:
+        name = fm.FontProperties(fname=FONT_PATH).get_name()
+        if not _font_registered:
+            fm.fontManager.addfont(FONT_PATH)
+    except (OSError, RuntimeError):
+        # 손상된 폰트 파일이면 matplotlib 기본 글꼴 사용
+        return None
+    if not _font_registered:
+        mpl.rcParams["font.family"] = name
+        mpl.rcParams["axes.unicode_minus"] = False
+        _font_registered = True
+    return name
+
+
+def _init_worker():
+    matplotlib.use("Agg")
+    register_korean_font()
+
+
+def _text(value, default="-") -> str:
+    if value is None or value != value or str(value).strip() == "":
+        return default
+    return str(value).strip()
+
+
+def _bmi(row: dict) -> float | None:
+    try:
+        height_m = float(row.get("신장")) / 100
+        return float(row.get("체중")) / (height_m ** 2)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+
+
+def _draw_card(fig, row: dict, title: str = DEFAULT_EVENT_TITLE):
+    """카드 한 장을 fig에 그림 (A6 세로)"""
+    from matplotlib.patches import FancyBboxPatch
+
+    fig.patch.set_facecolor("#F0F8F5")
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.set_xlim(0, 1)
+    ax.set_ylim(0, 1)
+    ax.axis("off")
+
+    ax.text(0.5, 0.92, "나의 미각탐험 ! MPTI", ha="center", fontsize=18, weight="bold", color="#2E5945")
+    ax.text(0.5, 0.87, title, ha="center", fontsize=11, color="#5D8A6F")
+
+    bmi = _bmi(row)
+    lines = [
+        f"성명   {_text(row.get('성명'))}",
+        f"소속   {_text(row.get('소속'))}",
+        f"신장   {_text(row.get('신장'))} cm    체중   {_text(row.get('체중'))} kg",
+        f"BMI    {bmi:.1f}" if bmi is not None else "BMI    -",
+    ]
+    for i, line in enumerate(lines):
+        ax.text(0.1, 0.76 - i * 0.06, line, fontsize=11, color="#4A4A4A")
+
+    boxes = [
+        (0.07, "#EEF5F9", "#4A7899", "단맛 선호", row.get("단맛선호")),
+        (0.53, "#FDF6F4", "#A67C6D", "짠맛 선호", row.get("짠맛선호")),
+    ]
+    for x, face, color, label, value in boxes:
+        ax.add_patch(FancyBboxPatch(
+            (x, 0.2), 0.4, 0.25, boxstyle="round,pad=0.01", facecolor=face, edgecolor=color, linewidth=1.5))
+        ax.text(x + 0.2, 0.36, f"시료 {_text(value)}", ha="center", fontsize=20, weight="bold", color=color)
+        ax.text(x + 0.2, 0.26, label, ha="center", fontsize=11, color=color)
+
+    ax.text(0.5, 0.08, f"제출 {_text(row.get('제출시간'))[:16]}", ha="center", fontsize=9, color="#6B7B6A")
+    ax.text(0.5, 0.04, "서울대학교 정밀푸드솔루션연구실", ha="center", fontsize=9, color="#6B7B6A")
+
+
+def render_card(row: dict, fmt: str = "png", title: str = DEFAULT_EVENT_TITLE) -> bytes:
+    """참여자 한 명의 카드를 PNG/PDF 바이트로 렌더링"""
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(4.1, 5.8), dpi=150)
+    try:
+        _draw_card(fig, row, title)
+        buf = io.BytesIO()
+        fig.savefig(buf, format=fmt)
+        return buf.getvalue()
+    finally:
+        plt.close(fig)
+
+
+def render_card_pages(rows: list, title: str = DEFAULT_EVENT_TITLE) -> bytes:
+    """여러 카드를 한 PDF(쪽당 한 장)로 렌더링 - 소속별 묶음용"""
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    buf = io.BytesIO()
+    with PdfPages(buf) as pdf:
+        for row in rows:
+            fig = plt.figure(figsize=(4.1, 5.8), dpi=150)
+            try:
+                _draw_card(fig, row, title)
+                pdf.savefig(fig)
+            finally:
+                plt.close(fig)
+    return buf.getvalue()
+
+
+def _safe_name(value: str) -> str:
+    return re.sub(r'[\\/:*?"<>|\s]+', "_", _text(value, "unknown"))
+
+
+def _group_affiliation(row: dict):
+    """소속별 묶음 기준 - 정규화된 소속키 (예전 행처럼 없으면 소속 입력값에서 계산)"""
+    return _text(row.get("소속키"), "") or affiliation_index().key(row.get("소속"))
+
+
+def _render_job(job):
+    name, fmt, rows, title = job
+    if fmt == "pdf" and len(rows) > 1:
+        return name, render_card_pages(rows, title)
+    return name, render_card(rows[0], fmt, title)
+
+
+def _plan_jobs(rows: list, fmt: str, group: str, title: str) -> list:
+    """(ZIP 내 파일명, 형식, 행 목록, 카드 제목) 작업 목록"""
+    jobs, used = [], set()
+
+    def unique(name):
+        base, ext = os.path.splitext(name)
+        i = 1
+        while name in used:
+            i += 1
+            name = f"{base}_{i}{ext}"
+        used.add(name)
+        return name
+
+    if group == "affiliation" and fmt == "pdf":
+        by_aff = {}
+        for row in rows:
+            by_aff.setdefault(_safe_name(_group_affiliation(row)), []).append(row)
+        for aff, aff_rows in sorted(by_aff.items()):
+            jobs.append((unique(f"{aff}.pdf"), fmt, aff_rows, title))
+    else:
+        for row in rows:
+            name = f"{_safe_name(row.get('성명'))}_{_safe_name(str(row.get('이메일', '')).split('@')[0])}.{fmt}"
+            if group == "affiliation":
+                name = f"{_safe_name(_group_affiliation(row))}/{name}"
+            jobs.append((unique(name), fmt, [row], title))
+    return jobs
+
+
+def build_cards_zip(rows: list, out, fmt: str = "png", group: str = "participant",
+                    workers: int | None = None, progress=None, title: str = DEFAULT_EVENT_TITLE) -> int:
+    """카드를 병렬 렌더링해 ZIP(out: 경로 또는 파일 객체)으로 기록, 생성한 파일 수 반환
+
+    group="participant"는 참여자별 파일, group="affiliation"은 소속별 폴더
+    (PDF는 소속별 한 파일)로 묶습니다.
+    """
+    if fmt not in ("png", "pdf"):
+        raise ValueError(f"지원하지 않는 형식: {fmt}")
+    jobs = _plan_jobs(rows, fmt, group, title)
+    if not jobs:
+        return 0
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(jobs) // (workers * 4))
+    # PNG는 이미 압축되어 있으므로 다시 압축하지 않음
+    compression = zipfile.ZIP_STORED if fmt == "png" else zipfile.ZIP_DEFLATED
+
+    # 앱(스레드가 여럿 도는 Streamlit 서버) 안에서도 부르므로 fork 대신 spawn으로 워커를 띄움
+    # (fork는 다른 스레드가 잡고 있던 잠금까지 복사해 워커가 멈출 수 있음)
+    with zipfile.ZipFile(out, "w", compression) as zf, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                mp_context=multiprocessing.get_context("spawn")) as pool:
+        for done, (name, data) in enumerate(pool.map(_render_job, jobs, chunksize=chunksize), start=1):
+            zf.writestr(name, data)
+            if progress:
+                progress(done, len(jobs))
+    return len(jobs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="미각 MPTI 결과 카드 일괄 생성")
+    parser.add_argument("-o", "--output", default="미각MPTI_결과카드.zip", help="출력 ZIP 경로")
+    parser.add_argument("--format", choices=["png", "pdf"], default="png")
+    parser.add_argument("--group", choices=["participant", "affiliation"], default="participant")
+    parser.add_argument("--affiliation", help="이 소속의 참여자만 생성")
+    parser.add_argument("--csv", help="Supabase 대신 관리자 CSV 내보내기 파일에서 읽기")
+    parser.add_argument("--workers", type=int, help="워커 프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--event", help="이 이벤트의 참여자만 생성")
+    parser.add_argument("--title", default=DEFAULT_EVENT_TITLE, help="카드에 표시할 클래스 이름")
+    args = parser.parse_args(argv)
+
+    if args.csv:
+        import pandas as pd
+        rows = pd.read_csv(args.csv, encoding="utf-8-sig", dtype=str).to_dict("records")
+    else:
+        client = create_client_from_env()
+
+        def page(start, end):
+            query = client.table(RESPONSE_TABLE).select("*")
+            if args.event:
+                query = query.eq("이벤트", args.event)
+            return query.order("id").range(start, end).execute().data or []
+        rows = [row for chunk in fetch_pages(page) for row in chunk]
+
+    if args.event and args.csv:
+        rows = [r for r in rows if _text(r.get("이벤트"), "") == args.event]
+    if args.affiliation:
+        # 묶음과 같은 기준(소속키)으로 - "서울대"로 지정해도 서울대학교의 모든 표기가 포함됨
+        key = affiliation_index().key(args.affiliation)
+        rows = [r for r in rows if _group_affiliation(r) == key]
+
+    def progress(done, total):
+        print(f"\r카드 {done}/{total}", end="", file=sys.stderr, flush=True)
+
+    count = build_cards_zip(rows, args.output, fmt=args.format, group=args.group,
+                            workers=args.workers, progress=progress, title=args.title)
+    print(f"\n{args.output}: {count}개 파일", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""대형 화면·휴대폰용 읽기 전용 집계 HTTP 서비스
+
+앱 프로세스 안에서 스레드로 실행되며(secrets의 STATS_PORT) 누적 집계(ResponseAggregates)만 읽습니다.
+집계 버전이 같으면 응답 본문을 다시 만들지 않고, If-None-Match가 ETag와 같으면 304를 돌려주므로
+보기만 하는 화면이 많아도 Supabase 조회나 Streamlit 세션이 늘지 않습니다.
+
+    GET /                   이벤트 목록 (JSON)
+    GET /<이벤트>           자동 갱신 현황판 (HTML)
+    GET /<이벤트>.json      시료별·소속별 응답 수 (JSON)
+"""
+import html
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+from mpti_core import SAMPLE_CHOICES
+
+_PAGE = """<!doctype html>
+<html lang="ko">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title} - 미각 MPTI 실시간 현황</title>
+<style>
+body {{ font-family: sans-serif; background: #F5FAF7; color: #2E5945; margin: 0; padding: 2rem; }}
+h1 {{ text-align: center; margin: 0 0 .5rem; }}
+#total {{ text-align: center; font-size: 1.4rem; color: #5D8A6F; margin-bottom: 2rem; }}
+.grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(320px, 1fr)); gap: 2rem; }}
+.card {{ background: #fff; border-radius: 12px; padding: 1.5rem; box-shadow: 0 3px 10px rgba(93, 138, 111, .12); }}
+.row {{ display: flex; align-items: center; margin: .4rem 0; }}
+.label {{ width: 7rem; }}
+.bar {{ height: 1.4rem; background: #8FBC8F; border-radius: 4px; margin-right: .5rem; }}
+table {{ width: 100%; border-collapse: collapse; }}
+td, th {{ padding: .3rem; text-align: right; border-bottom: 1px solid #E0EDE5; }}
+td:first-child, th:first-child {{ text-align: left; }}
+</style>
+</head>
+<body>
+<h1>🍽️ {title}</h1>
+<div id="total">불러오는 중...</div>
+<div class="grid">
+  <div class="card"><h2>🍑 단맛 시료</h2><div id="sweet"></div></div>
+  <div class="card"><h2>🥣 짠맛 시료</h2><div id="salty"></div></div>
+  <div class="card"><h2>🏫 소속별 응답</h2><table id="affiliations"></table></div>
+</div>
+<script>
+const SAMPLES = {samples};
+function bars(el, counts) {{
+  const max = Math.max(1, ...Object.values(counts));
+  el.innerHTML = SAMPLES.map(s => `<div class="row"><span class="label">시료 ${{s}}</span>` +
+    `<span class="bar" style="width:${{counts[s] / max * 60}}%"></span>${{counts[s]}}</div>`).join("");
+}}
+function text(value) {{
+  const span = document.createElement("span");
+  span.textContent = value;
+  return span.innerHTML;
+}}
+async function refresh() {{
+  try {{
+    // 브라우저가 ETag로 재검증하므로 바뀌지 않았으면 본문 없이 304
+    const res = await fetch("{event}.json", {{cache: "no-cache"}});
+    if (!res.ok) return;
+    const data = await res.json();
+    const approx = data.approximate ? "≈" : "";
+    document.getElementById("total").textContent = `응답 ${{data.count}}건 · 참여자 ${{approx}}${{data.participants}}명`;
+    bars(document.getElementById("sweet"), data.sweet);
+    bars(document.getElementById("salty"), data.salty);
+    document.getElementById("affiliations").innerHTML = "<tr><th>소속</th><th>응답 수</th></tr>" +
+      Object.entries(data.affiliations).map(([aff, a]) => `<tr><td>${{text(aff)}}</td><td>${{a.count}}</td></tr>`).join("");
+  }} catch (e) {{}}
+}}
+refresh();
+setInterval(refresh, {refresh_ms});
+</script>
+</body>
+</html>
+"""
+
+
+class StatsServer:
+    """읽기 전용 집계 서버 - aggregates(이벤트)는 준비된 ResponseAggregates 또는 None(준비 중)을 반환"""
+
+    def __init__(self, events: dict, aggregates, host: str = "127.0.0.1", port: int = 8502, refresh: float = 5.0):
+        self.events = events
+        self.aggregates = aggregates
+        self.host = host
+        self.port = port
+        self.refresh = refresh
+        self.requests = 0
+        self.not_modified = 0
+        # 프로세스가 바뀌면 집계 버전이 처음부터 다시 세어지므로 ETag에 실행 토큰을 넣음
+        self._token = uuid.uuid4().hex[:8]
+        self._lock = threading.Lock()
+        self._bodies = {}
+        self._httpd = None
+
+    def count(self, name: str):
+        """요청 수 집계 (처리 스레드마다 부르므로 잠금 안에서)"""
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats_body(self, event: str):
+        """(ETag, JSON 본문) - 집계 버전이 같으면 만들어 둔 본문을 그대로, 집계가 준비 전이면 None"""
+        agg = self.aggregates(event)
+        if agg is None:
+            return None
+        with self._lock:
+            cached = self._bodies.get(event)
+            if cached and cached[0] == agg.version:
+                return cached[1:]
+        summary = agg.summary(SAMPLE_CHOICES)
+        etag = f'"{self._token}-{event}-{summary["version"]}"'
+        body = json.dumps({"event": event, "title": self.events[event], **summary}, ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            self._bodies[event] = (summary["version"], etag, body)
+        return etag, body
+
+    def page_body(self, event: str):
+        """(ETag, HTML 본문) - 이벤트마다 고정"""
+        with self._lock:
+            cached = self._bodies.get(("page", event))
+            if cached:
+                return cached
+        body = _PAGE.format(
+            title=html.escape(self.events[event]), event=event, samples=json.dumps(list(SAMPLE_CHOICES)),
+            refresh_ms=int(self.refresh * 1000),
+        ).encode("utf-8")
+        cached = (f'"{self._token}-{event}-page"', body)
+        with self._lock:
+            self._bodies[("page", event)] = cached
+        return cached
+
+    def start(self) -> threading.Thread:
+        """백그라운드 스레드에서 서비스 시작 (포트를 열 수 없으면 OSError)"""
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _StatsHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.stats = self
+        self.port = self._httpd.server_address[1]
+        thread = threading.Thread(target=self._httpd.serve_forever, name="mpti-stats", daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+
+
+class _StatsHandler(BaseHTTPRequestHandler):
+    server_version = "mpti-stats"
+
+    def do_GET(self):
+        self._respond(head=False)
+
+    def do_HEAD(self):
+        self._respond(head=True)
+
+    def _respond(self, head: bool):
+        stats = self.server.stats
+        stats.count("requests")
+        path = unquote(urlsplit(self.path).path).strip("/")
+        if path == "":
+            listing = {event: {"title": title, "page": f"/{event}", "json": f"/{event}.json"}
+                       for event, title in stats.events.items()}
+            return self._send(200, json.dumps(listing, ensure_ascii=False).encode("utf-8"), "application/json", None, head)
+
+        event, is_json = (path[:-5], True) if path.endswith(".json") else (path, False)
+        if event not in stats.events:
+            return self._send(404, b'{"error": "unknown event"}', "application/json", None, head)
+        result = stats.stats_body(event) if is_json else stats.page_body(event)
+        if result is None:
+            self.send_response(503)
+            self.send_header("Retry-After", "2")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        etag, body = result
+        if _etag_matches(self.headers.get("If-None-Match"), etag):
+            stats.count("not_modified")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self._send(200, body, "application/json" if is_json else "text/html", etag, head)
+
+    def _send(self, status: int, body: bytes, content_type: str, etag, head: bool):
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        # 캐시는 하되 매번 ETag로 재검증
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def log_request(self, code="-", size="-"):
+        # 화면마다 몇 초 간격으로 요청하므로 요청 로그는 남기지 않음 (오류는 log_error로 남음)
+        pass
+
+
+def _etag_matches(header, etag: str) -> bool:
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
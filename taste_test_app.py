@@ -3,15 +3,63 @@ import pandas as pd
 from datetime import datetime
 import json
 import base64
+import io
 import time
 import os
-import matplotlib.pyplot as plt
-import matplotlib as mpl
+import queue
+import sys
+import threading
+import uuid
 import matplotlib.font_manager as fm
 
 
 # ===== Supabase helpers ======================================
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from mpti_core import (
+    RESPONSE_TABLE,
+    SAMPLE_CHOICES,
+    DEFAULT_EVENT_ID,
+    DEFAULT_EVENT_TITLE,
+    EVENTS_TABLE,
+    AdmissionController,
+    ArrowSnapshot,
+    BackgroundPool,
+    CircuitBreaker,
+    FunnelRecorder,
+    SingleFlight,
+    SnapshotStore,
+    SAMPLES_PER_ROW,
+    SUBMIT_TIME_FORMAT,
+    SUBMIT_TZ,
+    TASTE_TESTS_PATH,
+    ResponseAggregates,
+    ResponseSketch,
+    RerunProfiler,
+    affiliation_index,
+    apply_response_filters,
+    filter_response_table,
+    concat_response_tables,
+    fetch_pages,
+    build_participant_labels,
+    build_response_row,
+    format_submit_time,
+    funnel_rows,
+    funnel_tables,
+    jsonl_sink,
+    load_taste_tests,
+    normalize_email,
+    normalize_event_id,
+    read_jsonl_events,
+    read_responses_arrow,
+    responses_to_csv,
+    row_to_response,
+    run_warmup,
+    with_submit_timestamps,
+)
+from mpti_charts import comparison_figure, donut_png, figure_png, sample_counts, share_matrices
+from result_cards import build_cards_zip, register_korean_font
+from stats_server import StatsServer
 
 def peek_role(jwt: str):
     if not jwt or '.' not in jwt:
@@ -27,46 +75,498 @@ def get_supabase(version: str = "v1") -> Client | None:
     try:
         url = st.secrets["SUPABASE_URL"]
         key = st.secrets["SUPABASE_SERVICE_ROLE_KEY"]
-        return create_client(url, key)
+        # 기본 120초 대신 짧은 제한시간 - 장애 시 차단기가 빨리 열리도록
+        timeout = float(st.secrets.get("SUPABASE_TIMEOUT", 10))
+        return create_client(url, key, options=ClientOptions(postgrest_client_timeout=timeout))
     except Exception:
         return None
 
 sb = get_supabase(version=st.secrets.get("SUPABASE_CLIENT_VERSION", "v1"))
 
-def insert_taste_response(response_data: dict):
-    """미각테스트 응답을 Supabase에 저장"""
+# 응답데이터 저장 방식 (full / compact / compact_zlib)
+PAYLOAD_MODE = st.secrets.get("PAYLOAD_MODE", "full")
+
+# 이벤트(클래스) 목록 - secrets의 [events.<id>] title = "..." 로 추가
+EVENTS = {DEFAULT_EVENT_ID: DEFAULT_EVENT_TITLE}
+EVENTS.update({event_id: conf.get("title", event_id) for event_id, conf in st.secrets.get("events", {}).items()})
+
+def current_event() -> str:
+    """URL의 ?event= 값 (등록되지 않은 이벤트면 기본 이벤트)"""
+    default = st.secrets.get("DEFAULT_EVENT", DEFAULT_EVENT_ID)
+    event_id = normalize_event_id(st.query_params.get("event"), default)
+    return event_id if event_id in EVENTS else default
+
+# 시식 정의 파일 (단맛/짠맛 외 시식은 이 파일에 추가)
+TASTE_TESTS_FILE = st.secrets.get("TASTE_TESTS_PATH", TASTE_TESTS_PATH)
+
+@st.cache_resource
+def get_taste_tests(path: str) -> tuple:
+    """시식 정의를 프로세스당 한 번 읽어 페이지 HTML까지 만들어 둠"""
+    tests = load_taste_tests(path)
+    for test in tests:
+        c = test["colors"]
+        test["header_html"] = f"""
+    <div style="text-align: center; padding: 1rem 0;">
+        <h1>{test['emoji']} {test['label']} 선호도 조사</h1>
+    </div>
+    """
+        test["guide_html"] = f"""
+    <div style="background: {c['background']};
+                padding: 2rem; border-radius: 16px; border-left: 6px solid {c['border']};
+                margin: 2rem 0; box-shadow: 0 4px 12px {c['border']}26;">
+        <h4 style="color: {c['accent']}; margin-bottom: 1rem;">{test['marker']}</h4>
+        <p style="font-size: 1.05rem; line-height: 1.8; color: #4A4A4A;">
+            <strong>{test['scenario']}</strong>,
+            시료 순서대로 <strong>({test['sequence']})</strong> 맛을 보고
+            <strong style="color: {c['accent']};">{test['instruction']}</strong>해주세요
+        </p>
+    </div>
+    """
+        # 완료 페이지 결과 상자 ({value}만 채워 씀)
+        test["result_html"] = f"""
+            <div style="text-align: center; padding: 1.5rem; background: {c['background']}; border-radius: 12px; flex: 1; margin: 0 1rem; border: 1px solid {c['outline']};">
+                <div style="font-size: 2.5rem;">{test['emoji']}</div>
+                <div style="font-size: 1.5rem; font-weight: 700; color: {c['accent']}; margin: 0.5rem 0;">시료 {{value}}</div>
+                <div style="color: {c['border']};">{test['label']} 선호</div>
+            </div>"""
+    return tests
+
+@st.cache_resource
+def get_admission() -> AdmissionController:
+    """Supabase 요청 한도 관리 - 참여자 저장(우선) / 관리자 조회"""
+    return AdmissionController(
+        budgets={
+            "insert": (float(st.secrets.get("RATE_LIMIT_INSERTS_PER_SEC", 10)), 20),
+            "read": (float(st.secrets.get("RATE_LIMIT_READS_PER_SEC", 4)), 4),
+            "telemetry": (float(st.secrets.get("RATE_LIMIT_TELEMETRY_PER_SEC", 1)), 2),
+        },
+        total=(float(st.secrets.get("RATE_LIMIT_TOTAL_PER_SEC", 10)), 20),
+        priorities={"insert": 0, "read": 1, "telemetry": 2},
+    )
+
+def _probe_supabase():
+    get_supabase().table(RESPONSE_TABLE).select("*", count="exact", head=True).execute()
+
+@st.cache_resource
+def get_breaker() -> CircuitBreaker:
+    """조회용 차단기 (프로세스 공용)"""
+    return CircuitBreaker(
+        _probe_supabase,
+        failure_threshold=int(st.secrets.get("BREAKER_FAILURES", 3)),
+        probe_interval=float(st.secrets.get("BREAKER_PROBE_SECONDS", 15)),
+    )
+
+@st.cache_resource
+def get_snapshots() -> SnapshotStore:
+    return SnapshotStore()
+
+@st.cache_resource
+def get_flights() -> SingleFlight:
+    return SingleFlight()
+
+def issue_read(key: tuple, execute):
+    """조회 요청 (한도 대기 + 차단기) - 같은 key의 조회가 진행 중이면 새로 보내지 않고 그 응답을 함께 받음
+
+    합류한 호출끼리 같은 응답 객체를 공유하므로 호출 측은 결과를 고치지 않습니다.
+    """
+    def issue():
+        breaker = get_breaker()
+        # 차단 중이면 한도 토큰을 기다리지 않고 바로 실패 (기다린 사이에 열렸으면 call에서 다시 거름)
+        breaker.check()
+        get_admission().acquire("read")
+        return breaker.call(execute)
+    return get_flights().do(key, issue)
+
+@st.cache_resource
+def get_admin_pool() -> BackgroundPool:
+    """관리자 무거운 작업용 저우선 작업 풀 - 참여자 페이지가 느려지면 동시 실행 수를 줄임"""
+    return BackgroundPool(
+        max_workers=int(st.secrets.get("ADMIN_WORKERS", 4)),
+        target_ms=float(st.secrets.get("PARTICIPANT_LATENCY_TARGET_MS", 500)),
+    )
+
+def in_session(fn):
+    """현재 세션의 스크립트 컨텍스트에서 fn을 실행하는 함수 (작업 풀 스레드용)"""
+    ctx = get_script_run_ctx()
+    
+    def run(*args, **kwargs):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn(*args, **kwargs)
+    return run
+
+def offload(fn, *args, **kwargs):
+    """관리자 작업 풀에서 실행하고 결과를 기다림 (참여자 지연이 크면 차례를 기다림)"""
+    return get_admin_pool().run(in_session(fn), *args, **kwargs)
+
+# 관리자 프로파일링 대상 페이지 함수
+PROFILE_TARGETS = ("admin_page", "page_intro", "page_basic_info", "page_taste_test", "page_complete")
+
+@st.cache_resource
+def get_profiler() -> RerunProfiler:
+    """프로세스 공용 - 다른 참여자 세션의 실행도 기록됨"""
+    return RerunProfiler(st.secrets.get("PROFILE_DIR", "profiles"))
+
+def run_page(fn, *args, **kwargs):
+    """페이지 함수 실행 (프로파일링 대상일 때만 기록, 참여자 페이지는 실행 시간을 작업 풀에 알림)"""
+    profiler = get_profiler()
+    start = time.perf_counter()
+    try:
+        if profiler.target is None:
+            return fn(*args, **kwargs)
+        return profiler.run(fn, *args, **kwargs)
+    finally:
+        if fn is not admin_page:
+            get_admin_pool().observe(time.perf_counter() - start)
+
+def read_with_fallback(fn, *args):
+    """조회 성공 시 스냅샷을 갱신하고, 실패하면 마지막 정상 스냅샷을 반환 -> (값, 경과 초 또는 None)"""
+    key = (fn.__name__, repr(args))
+    try:
+        value = fn(*args)
+    except Exception:
+        cached = get_snapshots().get(key)
+        if cached is None:
+            raise
+        return cached
+    get_snapshots().put(key, value)
+    return value, None
+
+def read_concurrently(reads: dict):
+    """{이름: (함수, *인자)} 조회를 관리자 작업 풀에서 동시에 시작하고 끝나는 순서대로 (이름, read) 생성
+
+    read()는 read_with_fallback 결과 (값, 경과 초)를 돌려주거나 조회 중 난 예외를 다시 발생시킵니다.
+    """
+    done = queue.Queue()
+    
+    def worker(name, fn, args):
+        try:
+            outcome = read_with_fallback(fn, *args)
+        except Exception as e:
+            error = e
+            def read():
+                raise error
+        else:
+            def read():
+                return outcome
+        done.put((name, read))
+    
+    # 캐시 함수가 현재 세션의 스크립트 컨텍스트에서 동작하도록 연결
+    task = in_session(worker)
+    for name, (fn, *args) in reads.items():
+        get_admin_pool().submit(task, name, fn, args)
+    for _ in reads:
+        yield done.get()
+
+# 참여 단계 기록 위치 - supabase(taste_mpti_events) / file(로컬 JSONL) / off
+TELEMETRY_SINK = st.secrets.get("TELEMETRY_SINK", "supabase")
+TELEMETRY_FILE = st.secrets.get("TELEMETRY_FILE", "telemetry.jsonl")
+
+@st.cache_resource
+def get_funnel() -> FunnelRecorder | None:
+    """참여 단계 이벤트 버퍼 (프로세스 공용, 백그라운드 스레드가 묶어서 저장)"""
+    if TELEMETRY_SINK == "off":
+        return None
+    sb, admission = get_supabase(), get_admission()
+    if TELEMETRY_SINK == "supabase" and sb is not None:
+        def sink(batch):
+            # 참여자 저장·관리자 조회보다 낮은 우선순위
+            admission.acquire("telemetry")
+            sb.table(EVENTS_TABLE).insert(funnel_rows(batch)).execute()
+    else:
+        sink = jsonl_sink(TELEMETRY_FILE)
+    return FunnelRecorder(sink, interval=float(st.secrets.get("TELEMETRY_FLUSH_SECONDS", 5)))
+
+def track(page: str, action: str, value=None):
+    """참여 단계 이벤트 기록 (버퍼에 추가만 함)"""
+    funnel = get_funnel()
+    if funnel is not None:
+        funnel.record(st.session_state.session_id, st.session_state.event, page, action, value)
+
+def funnel_steps(taste_tests) -> list:
+    """참여 페이지 순서 [(페이지 이름, 표시 이름), ...] - st.session_state.page 번호와 같은 순서"""
+    return [
+        ("intro", "시작"),
+        ("basic_info", "기본정보"),
+        *((f"taste:{test['id']}", test["label"]) for test in taste_tests),
+        ("complete", "완료"),
+    ]
+
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_funnel_events(event: str) -> list:
+    """퍼널 차트용 이벤트 행 전체 조회 (id 순, 페이지 단위 - 시간 순 정렬은 funnel_tables에서)"""
+    sb = get_supabase()
+    if TELEMETRY_SINK != "supabase" or sb is None:
+        return read_jsonl_events(TELEMETRY_FILE, event)
+    
+    def page(start, end):
+        query = sb.table(EVENTS_TABLE).select("세션,페이지,동작,발생시간").eq("이벤트", event).order("id").range(start, end)
+        return issue_read(("funnel", event, start), query.execute).data or []
+    return [row for rows in fetch_pages(page) for row in rows]
+
+def insert_taste_response(response_data: dict, replace: bool = False):
+    """미각테스트 응답을 Supabase에 저장 (replace=True면 저장 후 같은 이메일의 이전 응답 삭제)"""
     sb = get_supabase()
     if sb is None:
         raise RuntimeError("Supabase client not configured")
     
-    row = {
-        "이메일": response_data.get("email", ""),
-        "성명": response_data.get("name", ""),
-        "소속": response_data.get("affiliation", ""),
-        "성별": response_data.get("gender", ""),
-        "나이": response_data.get("age", 0),
-        "신장": response_data.get("height", 0),
-        "체중": response_data.get("weight", 0),
-        "단맛선호": response_data.get("sweet_preference", ""),
-        "짠맛선호": response_data.get("salty_preference", ""),
-        "제출시간": response_data.get("제출시간", ""),
-        "응답데이터": json.dumps(response_data, ensure_ascii=False)
-    }
-    sb.table("taste_mpti_responses").insert(row).execute()
+    row = build_response_row(response_data, payload_mode=PAYLOAD_MODE)
+    get_admission().acquire("insert")
+    res = sb.table(RESPONSE_TABLE).insert(row).execute()
+    event = row["이벤트"]
+    new_id = res.data[0].get("id") if res.data else None
+    if replace and new_id is not None:
+        # 새 응답이 저장된 뒤에 지우므로 저장이 실패해도 이전 응답은 남음
+        get_admission().acquire("insert")
+        (sb.table(RESPONSE_TABLE).delete()
+         .eq("이벤트", event).eq("이메일", row["이메일"]).neq("id", new_id)
+         .execute())
+    # 저장 성공 시에만 누적 집계 갱신 - 참여자는 기다리지 않음 (작업 풀에서)
+    # 아직 만들어지지 않은 집계는 처음 만들 때 이 행까지 읽으므로 건드리지 않음 (두 번 세지 않도록)
+    agg = get_ready_aggregates().get(event)
+    if agg is None:
+        return
+    if replace and new_id is not None:
+        # 지운 행은 누적 집계에서 뺄 수 없으므로 다시 구성
+        get_admin_pool().submit(in_session(lambda: agg.rebuild(fetch_taste_rows(event))))
+    else:
+        get_admin_pool().submit(agg.add, row)
+
+def fetch_previous_response(event: str, email: str) -> dict | None:
+    """재참여자의 가장 최근 응답 (이어서 보기를 고른 경우에만 조회)"""
+    sb = get_supabase()
+    if sb is None:
+        return None
+    # 참여자 요청이므로 관리자 조회 한도가 아니라 저장과 같은 (우선) 한도를 씀
+    get_admission().acquire("insert")
+    res = (sb.table(RESPONSE_TABLE).select("*")
+           .eq("이벤트", event).eq("이메일", normalize_email(email))
+           .order("id", desc=True).limit(1).execute())
+    return row_to_response(res.data[0]) if res.data else None
+
+def fetch_taste_rows(event: str = DEFAULT_EVENT_ID) -> list:
+    """Supabase에서 이벤트의 미각테스트 응답 행(dict 목록) 전체 조회 (id 순, 페이지 단위)"""
+    sb = get_supabase()
+    if sb is None:
+        return []
+    
+    def page(start, end):
+        query = sb.table(RESPONSE_TABLE).select("*").eq("이벤트", event).order("id").range(start, end)
+        return issue_read(("rows", event, start), query.execute).data or []
+    return [row for rows in fetch_pages(page) for row in rows]
 
-def fetch_taste_responses_df() -> pd.DataFrame:
+def fetch_taste_responses_df(event: str = DEFAULT_EVENT_ID) -> pd.DataFrame:
     """Supabase에서 미각테스트 응답 조회"""
+    return fetch_filtered_responses_df({"event": event})
+
+def response_filters(event: str, affiliation=None, date_from=None, date_to=None,
+                     gender=None, sweet=None, salty=None) -> dict:
+    """관리자 조회 필터 (키 순서가 캐시 키에 들어가므로 항상 이 함수로 만듦)"""
+    return {"event": event, "affiliation": affiliation, "date_from": date_from, "date_to": date_to,
+            "gender": gender, "sweet": sweet, "salty": salty}
+
+ADMIN_PAGE_SIZE = 50
+
+@st.cache_data(ttl=60, show_spinner=False)
+def count_taste_responses(event: str = DEFAULT_EVENT_ID) -> tuple:
+    """이벤트의 전체 응답 수 (행은 받지 않고 개수만 조회) -> (응답 수, 조회 시점의 누적 집계 버전)
+
+    조회하는 동안 집계가 바뀌었으면 버전은 None입니다. 집계 버전이 그대로일 때만
+    집계 건수와 비교할 수 있습니다 (캐시된 개수는 그 뒤의 저장을 모름).
+    """
     sb = get_supabase()
     if sb is None:
+        return 0, None
+    # 아직 만들어지지 않은 집계는 비교할 대상이 없음 (여기서 만들지 않음)
+    agg = get_ready_aggregates().get(event)
+    version = agg.version if agg is not None else None
+    query = sb.table(RESPONSE_TABLE).select("*", count="exact", head=True).eq("이벤트", event)
+    res = issue_read(("count", event), query.execute)
+    return res.count or 0, version if agg is not None and agg.version == version else None
+
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_taste_responses_page(filters: dict, page: int, page_size: int = ADMIN_PAGE_SIZE):
+    """필터를 DB에서 적용해 한 페이지만 조회 -> (DataFrame, 필터 결과 전체 건수)"""
+    sb = get_supabase()
+    if sb is None:
+        return pd.DataFrame(), 0
+    start = page * page_size
+    query = apply_response_filters(sb.table(RESPONSE_TABLE).select("*", count="exact"), filters)
+    # 같은 제출시간(일괄 가져오기 등)이 페이지 경계에서 겹치거나 빠지지 않도록 id로 순서를 고정
+    query = query.order("제출시간", desc=True).order("id", desc=True).range(start, start + page_size - 1)
+    res = issue_read(("page", tuple(filters.items()), page, page_size), query.execute)
+    return pd.DataFrame(res.data or []), res.count or 0
+
+# 이벤트 전체 응답 스냅샷 (Arrow IPC 파일, 모든 프로세스가 메모리 매핑으로 공유)
+SNAPSHOT_DIR = st.secrets.get("SNAPSHOT_DIR", ".snapshots")
+SNAPSHOT_TTL = float(st.secrets.get("SNAPSHOT_TTL", 60))
+
+@st.cache_resource
+def get_snapshot(event: str) -> ArrowSnapshot:
+    return ArrowSnapshot(os.path.join(SNAPSHOT_DIR, f"{event}.arrow"))
+
+def fetch_response_table(event: str):
+    """스냅샷 갱신용 - 이벤트 전체 행을 CSV로 페이지 단위로 받아 Arrow Table로 변환 (제출시간 역순)"""
+    sb = get_supabase()
+    
+    def page(start, end):
+        query = sb.table(RESPONSE_TABLE).select("*").eq("이벤트", event).order("id").range(start, end)
+        return read_responses_arrow(issue_read(("table", event, start), query.csv().execute).data)
+    table = with_submit_timestamps(concat_response_tables(fetch_pages(page, size_of=lambda t: t.num_rows)))
+    if "제출시간" in table.column_names:
+        # 응답 목록 페이지와 같은 순서 (같은 제출시간은 id 역순)
+        keys = [(c, "descending") for c in ("제출시간", "id") if c in table.column_names]
+        table = table.sort_by(keys)
+    return table
+
+def load_response_table(event: str, max_age: float = SNAPSHOT_TTL):
+    """이벤트 전체 응답 pyarrow.Table (max_age초보다 오래된 스냅샷이면 먼저 갱신)"""
+    snapshot = get_snapshot(event)
+    age = snapshot.age()
+    if age is None or age > max_age:
+        # 동시에 갱신하려는 세션은 진행 중인 갱신 하나를 함께 기다림
+        get_flights().do(("refresh", event), lambda: snapshot.refresh(lambda: fetch_response_table(event), max_age=max_age))
+    return snapshot.read()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def fetch_sample_choices_df(filters: dict) -> pd.DataFrame:
+    """차트용 - 필터 조건의 시료 선택 컬럼만 (공유 스냅샷에서 필요한 열만 꺼냄)"""
+    if get_supabase() is None:
         return pd.DataFrame()
-    res = sb.table("taste_mpti_responses").select("*").order("제출시간", desc=True).execute()
-    return pd.DataFrame(res.data or [])
+    table = filter_response_table(load_response_table(filters["event"]), filters)
+    return table.select([col for col in ("단맛선호", "짠맛선호") if col in table.column_names]).to_pandas()
+
+def fetch_filtered_responses_df(filters: dict) -> pd.DataFrame:
+    """내보내기용 - 필터 조건의 전체 행 (제출시간 순, 내보내기 직전 상태로 스냅샷 갱신)"""
+    if get_supabase() is None:
+        return pd.DataFrame()
+    table = load_response_table(filters["event"], max_age=5)
+    return filter_response_table(table, filters).to_pandas()
+
+# 통계 방식 - exact(참여자 수를 이메일 집합으로) / approx(HyperLogLog, 응답 수와 무관한 메모리)
+STATS_MODE = st.secrets.get("STATS_MODE", "exact")
+
+@st.cache_resource
+def get_ready_aggregates() -> dict:
+    """재구성이 끝난 이벤트별 누적 집계 {이벤트: ResponseAggregates} - 참여자 화면은 여기서만 읽음"""
+    return {}
+
+@st.cache_resource
+def get_response_aggregates(event: str = DEFAULT_EVENT_ID) -> ResponseAggregates:
+    """이벤트별 프로세스 공용 누적 집계 (처음 사용할 때 테이블에서 한 번 재구성)
+
+    조회에 실패하면 예외를 그대로 내므로 빈 집계가 캐시되거나 준비된 것으로 표시되지 않고,
+    다음 호출에서 다시 만듭니다.
+    """
+    agg = ResponseAggregates(approximate=STATS_MODE == "approx")
+    agg.rebuild(fetch_taste_rows(event))
+    get_ready_aggregates()[event] = agg
+    return agg
+
+@st.cache_resource
+def get_pending_builds() -> tuple[threading.Lock, dict]:
+    """작업 풀에 맡긴 이벤트별 집계 재구성 {이벤트: Future}"""
+    return threading.Lock(), {}
+
+def ready_aggregates(event: str, build=None) -> ResponseAggregates | None:
+    """준비된 집계를 바로 반환 - 아직이면 이벤트마다 재구성을 한 번만 맡기고 None
+
+    맡겨 둔 재구성이 진행 중이면 다시 맡기지 않고, 실패로 끝났을 때만 새로 맡깁니다.
+    """
+    agg = get_ready_aggregates().get(event)
+    if agg is None:
+        lock, pending = get_pending_builds()
+        with lock:
+            future = pending.get(event)
+            if future is None or future.done():
+                pending[event] = get_admin_pool().submit(build or in_session(get_response_aggregates), event)
+    return agg
+
+def is_returning_participant(event: str, email: str) -> bool | None:
+    """이미 응답한 이메일인지 메모리 집계로 바로 판단 (조회 없음)
+
+    집계가 아직 준비되지 않았으면 작업 풀에 재구성을 맡기고 None (참여자는 기다리지 않음).
+    다른 서버 프로세스에 방금 저장된 응답은 그 프로세스의 집계가 다시 맞춰질 때까지 모를 수 있습니다.
+    """
+    agg = ready_aggregates(event)
+    return None if agg is None else agg.has_participant(email)
+
+# 서버 예열 - 프로세스에서 처음 스크립트가 실행될 때(main 시작) 백그라운드로 한 번 실행
+# (클라이언트·무거운 모듈·이벤트별 집계/스냅샷/첫 화면 조회·"전체" 차트를 미리 준비)
+WARMUP = str(st.secrets.get("WARMUP", "on")).lower() not in ("off", "false", "0")
+WARMUP_EVENTS = [e for e in st.secrets.get("WARMUP_EVENTS", list(EVENTS)) if e in EVENTS]
+
+def _warm_imports():
+    import pyarrow.compute, pyarrow.csv, pyarrow.ipc  # noqa: F401 - 스냅샷·필터 경로
+    from matplotlib.backends import backend_agg  # noqa: F401 - 차트 렌더링 백엔드
+    import result_cards  # noqa: F401
+    fm.findfont(fm.FontProperties())  # 기본(한글) 글꼴 조회 - 글꼴 캐시 적재
+    affiliation_index()  # 소속 규칙 n-gram 색인
+
+def _warm_event(event: str):
+    """관리자 첫 화면이 읽는 캐시를 같은 키로 채움"""
+    get_response_aggregates(event)
+    filters = response_filters(event)
+    count_taste_responses(event)
+    fetch_taste_responses_page(filters, 0)
+    df = fetch_sample_choices_df(filters)
+    for col in ("단맛선호", "짠맛선호"):
+        if col in df.columns and not sample_counts(df[col]).empty:
+            render_donut(sample_counts(df[col]))
+    render_affiliation_comparison(filters, get_snapshot(event).version())
+
+@st.cache_resource(show_spinner=False)
+def start_warmup() -> dict:
+    """예열 시작 (프로세스당 한 번) - 결과는 관리자 프로파일링 패널과 서버 로그에 표시"""
+    status = {"steps": [], "done": threading.Event()}
+    steps = [
+        ("supabase", lambda: get_supabase(version=st.secrets.get("SUPABASE_CLIENT_VERSION", "v1"))),
+        ("imports", _warm_imports),
+    ]
+    if get_supabase() is not None:
+        steps += [(f"event:{event}", lambda event=event: _warm_event(event)) for event in WARMUP_EVENTS]
+    
+    def work():
+        status["steps"] = run_warmup(steps, log=lambda line: print(line, file=sys.stderr, flush=True))
+        status["done"].set()
+    
+    # 예열도 관리자 작업과 같은 저우선 풀에서 (먼저 온 참여자를 늦추지 않음)
+    get_admin_pool().submit(in_session(work))
+    return status
+
+# 대형 화면용 읽기 전용 집계 서비스 - 포트를 지정하면 앱 프로세스 안에서 함께 실행 (stats_server.py)
+STATS_PORT = st.secrets.get("STATS_PORT")
+STATS_HOST = st.secrets.get("STATS_HOST", "127.0.0.1")
+
+@st.cache_resource(show_spinner=False)
+def start_stats_server() -> StatsServer | None:
+    """집계 서비스 시작 (프로세스당 한 번, 포트를 열 수 없으면 None)"""
+    ready = get_ready_aggregates()
+    build = in_session(get_response_aggregates)
+    
+    def aggregates(event):
+        # 준비된 집계만 읽음 - 아직이면 재구성을 (이벤트마다 한 번만) 맡기고 503
+        if get_supabase() is None:
+            return ready.get(event)
+        return ready_aggregates(event, build)
+    
+    server = StatsServer(EVENTS, aggregates, host=STATS_HOST, port=int(STATS_PORT),
+                         refresh=float(st.secrets.get("STATS_REFRESH_SECONDS", 5)))
+    try:
+        server.start()
+    except OSError as e:
+        print(f"[stats] {STATS_HOST}:{STATS_PORT} 에서 시작하지 못했습니다: {e}", file=sys.stderr, flush=True)
+        return None
+    print(f"[stats] http://{STATS_HOST}:{server.port}/", file=sys.stderr, flush=True)
+    return server
 
 # ===================================================================
 
+# 한글 폰트 등록 (fonts/NanumGothic.ttf)
+register_korean_font()
+
 # 페이지 설정
 st.set_page_config(
-    page_title="평창 웰니스 클래스 - 미각 MPTI",
+    page_title=f"{EVENTS[current_event()]} - 미각 MPTI",
     page_icon="🍽️",
     layout="wide"
 )
@@ -688,16 +1188,21 @@ if 'responses' not in st.session_state:
     st.session_state.responses = {}
 if 'admin_authenticated' not in st.session_state:
     st.session_state.admin_authenticated = False
+if 'event' not in st.session_state:
+    st.session_state.event = current_event()
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
 
 # 관리자 비밀번호
 ADMIN_PASSWORD = "admin123"
 
 def page_intro():
+    event_title = EVENTS[st.session_state.event]
     # 헤더 이미지 또는 타이틀
-    st.markdown("""
+    st.markdown(f"""
     <div style="text-align: center; padding: 2rem 0 1rem 0;">
         <h1 style="font-size: 3rem; color: #2E5945; margin-bottom: 0.5rem;">
-            🍽️ 평창 웰니스 클래스
+            🍽️ {event_title}
         </h1>
         <p style="font-size: 1.3rem; color: #5D8A6F; font-weight: 500;">
             나의 미각탐험 ! MPTI
@@ -708,10 +1213,10 @@ def page_intro():
     </div>
     """, unsafe_allow_html=True)
     
-    st.markdown("""
+    st.markdown(f"""
     ### 🌿 안녕하세요!
     
-    '평창 웰니스 클래스'에서 '미각 MPTI(맛 선호도 평가를 통한 나의 미각 MPTI 확인하기)' 프로그램을 기획한 
+    '{event_title}'에서 '미각 MPTI(맛 선호도 평가를 통한 나의 미각 MPTI 확인하기)' 프로그램을 기획한 
     **서울대학교 정밀푸드솔루션연구실**입니다.
     
     먼저 귀중한 시간을 내어 테스트에 참여해주셔서 진심으로 감사드립니다. 🙏
@@ -750,11 +1255,53 @@ def page_intro():
     with col2:
         if st.button("🚀 테스트 시작하기", type="primary", use_container_width=True):
             if email and "@" in email:
-                st.session_state.responses['email'] = email
-                st.session_state.page = 1
-                st.rerun()
+                if is_returning_participant(st.session_state.event, email):
+                    st.session_state.returning_email = email
+                else:
+                    _start_test(email)
             else:
                 st.error("❌ 유효한 이메일 주소를 입력해주세요.")
+    
+    # 이미 응답한 이메일 - 이전 결과를 보거나 새 응답으로 바꿈 (중복 응답 방지)
+    returning = st.session_state.get("returning_email")
+    if returning and returning == email:
+        st.info(f"📌 **{returning}** 으로 이미 참여하신 기록이 있습니다. 어떻게 진행할까요?")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            if st.button("📄 이전 결과 보기", use_container_width=True, key="returning_resume"):
+                try:
+                    previous = fetch_previous_response(st.session_state.event, returning)
+                except Exception as e:
+                    st.warning(f"⚠️ 이전 응답을 불러오지 못했습니다: {e}")
+                else:
+                    if previous is None:
+                        st.warning("⚠️ 이전 응답을 찾지 못했습니다. 새로 시작해 주세요.")
+                    else:
+                        st.session_state.responses = previous
+                        # 이미 저장된 응답이므로 완료 페이지에서 다시 저장하지 않음
+                        st.session_state.saved_to_db = True
+                        del st.session_state.returning_email
+                        st.session_state.page = len(get_taste_tests(TASTE_TESTS_FILE)) + 2
+                        st.rerun()
+        with col2:
+            if st.button("🔄 새로 응답하기 (이전 응답 대체)", use_container_width=True, key="returning_replace"):
+                _start_test(returning, replace=True)
+        with col3:
+            if st.button("취소", use_container_width=True, key="returning_cancel"):
+                del st.session_state.returning_email
+                st.rerun()
+
+def _start_test(email: str, replace: bool = False):
+    """테스트 시작 - replace=True(이전 응답 대체)가 아니면 예전 선택이 남지 않도록 지움"""
+    st.session_state.pop("returning_email", None)
+    if replace:
+        st.session_state.replace_previous = True
+    else:
+        st.session_state.pop("replace_previous", None)
+    st.session_state.responses['email'] = email
+    st.session_state.responses['event'] = st.session_state.event
+    st.session_state.page = 1
+    st.rerun()
 
 def page_basic_info():
     st.markdown("""
@@ -825,155 +1372,33 @@ def page_basic_info():
             else:
                 st.error("❌ 모든 필수 항목을 입력해주세요.")
 
-def page_sweet_preference():
-    st.markdown("""
-    <div style="text-align: center; padding: 1rem 0;">
-        <h1>🍑 단맛 선호도 조사</h1>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    st.markdown("""
-    <div style="background: #EEF5F9; 
-                padding: 2rem; border-radius: 16px; border-left: 6px solid #6B9AB8; 
-                margin: 2rem 0; box-shadow: 0 4px 12px rgba(107, 154, 184, 0.15);">
-        <h4 style="color: #4A7899; margin-bottom: 1rem;">🔵 파란 글씨 표시된 시료</h4>
-        <p style="font-size: 1.05rem; line-height: 1.8; color: #4A4A4A;">
-            <strong>복숭아 음료를 마신다고 생각하면서</strong>,
-            시료 순서대로 <strong>(1 → 2 → 3 → 4 → 5)</strong> 맛을 보고
-            <strong style="color: #4A7899;">가장 높은 선호도의 시료 하나만 체크</strong>해주세요
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    st.markdown("<br>", unsafe_allow_html=True)
-    st.markdown("### 🧪 시료 선택")
-    
-    # 현재 선택된 값
-    current_value = st.session_state.responses.get('sweet_preference', None)
-    
-    # 1행: 시료 1, 2, 3
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        if st.button("🧪 1", key="sweet_1", use_container_width=True, 
-                    type="primary" if current_value == "1" else "secondary"):
-            st.session_state.responses['sweet_preference'] = "1"
-            st.rerun()
-    
-    with col2:
-        if st.button("🧪 2", key="sweet_2", use_container_width=True,
-                    type="primary" if current_value == "2" else "secondary"):
-            st.session_state.responses['sweet_preference'] = "2"
-            st.rerun()
-    
-    with col3:
-        if st.button("🧪 3", key="sweet_3", use_container_width=True,
-                    type="primary" if current_value == "3" else "secondary"):
-            st.session_state.responses['sweet_preference'] = "3"
-            st.rerun()
-    
-    # 2행: 시료 4, 5 (5번 중앙)
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        if st.button("🧪 4", key="sweet_4", use_container_width=True,
-                    type="primary" if current_value == "4" else "secondary"):
-            st.session_state.responses['sweet_preference'] = "4"
-            st.rerun()
-    
-    with col2:
-        if st.button("🧪 5", key="sweet_5", use_container_width=True,
-                    type="primary" if current_value == "5" else "secondary"):
-            st.session_state.responses['sweet_preference'] = "5"
-            st.rerun()
-    
-    with col3:
-        st.write("")  # 빈 공간
-    
-    # 선택된 시료 표시
-    if current_value:
-        st.success(f"✅ 시료 {current_value}번이 선택되었습니다.")
-    
-    st.markdown("---")
-    
-    col1, col2 = st.columns([1, 5])
-    with col1:
-        if st.button("← 이전", key="prev_sweet"):
-            st.session_state.page = 1
-            st.rerun()
-    
-    with col2:
-        if st.button("다음 단계로 →", type="primary", key="next_sweet", use_container_width=True):
-            if current_value:
-                st.session_state.page = 3
-                st.rerun()
-            else:
-                st.error("❌ 시료를 선택해주세요.")
+def _choose_sample(response_key: str, sample: str, page: str):
+    st.session_state.responses[response_key] = sample
+    track(page, "sample", sample)
 
-def page_salty_preference():
-    st.markdown("""
-    <div style="text-align: center; padding: 1rem 0;">
-        <h1>🥣 짠맛 선호도 조사</h1>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    st.markdown("""
-    <div style="background: #FDF6F4; 
-                padding: 2rem; border-radius: 16px; border-left: 6px solid #C89B8C; 
-                margin: 2rem 0; box-shadow: 0 4px 12px rgba(200, 155, 140, 0.15);">
-        <h4 style="color: #A67C6D; margin-bottom: 1rem;">🔴 빨간 글씨 표시된 시료</h4>
-        <p style="font-size: 1.05rem; line-height: 1.8; color: #4A4A4A;">
-            <strong>콩나물국을 먹는다고 생각하면서</strong>,
-            시료 순서대로 <strong>(1 → 2 → 3 → 4 → 5)</strong> 맛을 보고
-            <strong style="color: #A67C6D;">가장 높은 선호도의 시료를 하나만 체크</strong>해주세요
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
+
+def _go_to_page(page: int):
+    st.session_state.page = page
+
+
+def page_taste_test(test: dict, page: int, last: bool):
+    """taste_tests.json 항목 하나로 시료 선택 페이지를 그림 (버튼은 콜백으로 처리)"""
+    st.markdown(test["header_html"], unsafe_allow_html=True)
+    st.markdown(test["guide_html"], unsafe_allow_html=True)
     
     st.markdown("<br>", unsafe_allow_html=True)
     st.markdown("### 🧪 시료 선택")
     
     # 현재 선택된 값
-    current_value = st.session_state.responses.get('salty_preference', None)
-    
-    # 1행: 시료 1, 2, 3
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        if st.button("🧪 1", key="salty_1", use_container_width=True, 
-                    type="primary" if current_value == "1" else "secondary"):
-            st.session_state.responses['salty_preference'] = "1"
-            st.rerun()
-    
-    with col2:
-        if st.button("🧪 2", key="salty_2", use_container_width=True,
-                    type="primary" if current_value == "2" else "secondary"):
-            st.session_state.responses['salty_preference'] = "2"
-            st.rerun()
-    
-    with col3:
-        if st.button("🧪 3", key="salty_3", use_container_width=True,
-                    type="primary" if current_value == "3" else "secondary"):
-            st.session_state.responses['salty_preference'] = "3"
-            st.rerun()
-    
-    # 2행: 시료 4, 5 (5번 중앙)
-    col1, col2, col3 = st.columns(3)
+    response_key = test["response_key"]
+    current_value = st.session_state.responses.get(response_key, None)
     
-    with col1:
-        if st.button("🧪 4", key="salty_4", use_container_width=True,
-                    type="primary" if current_value == "4" else "secondary"):
-            st.session_state.responses['salty_preference'] = "4"
-            st.rerun()
-    
-    with col2:
-        if st.button("🧪 5", key="salty_5", use_container_width=True,
-                    type="primary" if current_value == "5" else "secondary"):
-            st.session_state.responses['salty_preference'] = "5"
-            st.rerun()
-    
-    with col3:
-        st.write("")  # 빈 공간
+    for row in test["rows"]:
+        for col, sample in zip(st.columns(SAMPLES_PER_ROW), row):
+            with col:
+                st.button(f"🧪 {sample}", key=f"{test['id']}_{sample}", use_container_width=True,
+                          type="primary" if current_value == sample else "secondary",
+                          on_click=_choose_sample, args=(response_key, sample, f"taste:{test['id']}"))
     
     # 선택된 시료 표시
     if current_value:
@@ -983,17 +1408,15 @@ def page_salty_preference():
     
     col1, col2 = st.columns([1, 5])
     with col1:
-        if st.button("← 이전", key="prev_salty"):
-            st.session_state.page = 2
-            st.rerun()
+        st.button("← 이전", key=f"prev_{test['id']}", on_click=_go_to_page, args=(page - 1,))
     
     with col2:
-        if st.button("✅ 제출하기", type="primary", key="submit", use_container_width=True):
-            if current_value:
-                st.session_state.page = 4
-                st.rerun()
-            else:
-                st.error("❌ 시료를 선택해주세요.")
+        label, key = ("✅ 제출하기", "submit") if last else ("다음 단계로 →", f"next_{test['id']}")
+        if current_value:
+            st.button(label, type="primary", key=key, use_container_width=True,
+                      on_click=_go_to_page, args=(page + 1,))
+        elif st.button(label, type="primary", key=key, use_container_width=True):
+            st.error("❌ 시료를 선택해주세요.")
 
 def page_complete():
     st.markdown("""
@@ -1006,7 +1429,7 @@ def page_complete():
     # Supabase에 자동 저장
     if 'saved_to_db' not in st.session_state:
         response_data = {
-            "제출시간": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "제출시간": datetime.now(SUBMIT_TZ).strftime(SUBMIT_TIME_FORMAT),
             **st.session_state.responses
         }
         
@@ -1014,7 +1437,7 @@ def page_complete():
         sb = get_supabase()
         if sb:
             try:
-                insert_taste_response(response_data)
+                insert_taste_response(response_data, replace=st.session_state.get("replace_previous", False))
                 st.session_state.saved_to_db = True
                 st.success("**✅ 응답이 성공적으로 저장되었습니다!**")
             except Exception as e:
@@ -1066,20 +1489,14 @@ def page_complete():
         
         st.markdown("---")
         
+        boxes = "".join(
+            test["result_html"].format(value=st.session_state.responses.get(test["response_key"], '-'))
+            for test in get_taste_tests(TASTE_TESTS_FILE)
+        )
         st.markdown(f"""
         ### 🍽️ 미각 선호도 결과
         
-        <div style="display: flex; justify-content: space-around; margin: 2rem 0;">
-            <div style="text-align: center; padding: 1.5rem; background: #EEF5F9; border-radius: 12px; flex: 1; margin: 0 1rem; border: 1px solid #D1E3EC;">
-                <div style="font-size: 2.5rem;">🍑</div>
-                <div style="font-size: 1.5rem; font-weight: 700; color: #4A7899; margin: 0.5rem 0;">시료 {st.session_state.responses.get('sweet_preference', '-')}</div>
-                <div style="color: #6B9AB8;">단맛 선호</div>
-            </div>
-            <div style="text-align: center; padding: 1.5rem; background: #FDF6F4; border-radius: 12px; flex: 1; margin: 0 1rem; border: 1px solid #E8D5CF;">
-                <div style="font-size: 2.5rem;">🥣</div>
-                <div style="font-size: 1.5rem; font-weight: 700; color: #A67C6D; margin: 0.5rem 0;">시료 {st.session_state.responses.get('salty_preference', '-')}</div>
-                <div style="color: #C89B8C;">짠맛 선호</div>
-            </div>
+        <div style="display: flex; justify-content: space-around; margin: 2rem 0;">{boxes}
         </div>
         """, unsafe_allow_html=True)
     
@@ -1088,7 +1505,7 @@ def page_complete():
     
     with col1:
         response_data = {
-            "제출시간": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "제출시간": datetime.now(SUBMIT_TZ).strftime(SUBMIT_TIME_FORMAT),
             **st.session_state.responses
         }
         
@@ -1106,8 +1523,11 @@ def page_complete():
         if st.button("🔄 처음으로 돌아가기", use_container_width=True):
             st.session_state.page = 0
             st.session_state.responses = {}
+            # 같은 기기에서 다음 참여자가 시작하므로 새 세션으로 기록
+            st.session_state.session_id = uuid.uuid4().hex
             if 'saved_to_db' in st.session_state:
                 del st.session_state.saved_to_db
+            st.session_state.pop("replace_previous", None)
             st.rerun()
 
 def admin_login():
@@ -1136,75 +1556,42 @@ def admin_login():
             st.rerun()
 
 
+@st.cache_data(show_spinner=False, max_entries=64)
+def render_donut(counts: pd.Series) -> bytes:
+    """시료별 응답 수 -> 도넛 차트 PNG (분포가 같으면 다시 그리지 않음)"""
+    return donut_png(counts)
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def render_affiliation_comparison(filters: dict, version: int | None) -> bytes | None:
+    """전체 소속의 시료 선택 비율을 한 장으로 (version은 스냅샷 데이터 버전 - 같으면 다시 그리지 않음)"""
+    table = filter_response_table(get_snapshot(filters["event"]).read(), filters)
+    columns = ["소속키", "단맛선호", "짠맛선호"]
+    if not all(col in table.column_names for col in columns):
+        return None
+    shares, n = share_matrices(table.select(columns).to_pandas(), samples=SAMPLE_CHOICES)
+    if not shares:
+        return None
+    return figure_png(comparison_figure(shares, n, {"단맛선호": "단맛 시료 선택 비율", "짠맛선호": "짠맛 시료 선택 비율"}))
+
 # 추가
 def donut_chart_counts(series: pd.Series, title: str):
     """
     값 분포를 도넛 차트로 시각화 - 파스텔 색상
     한글 폰트 문제 해결: 제목을 matplotlib이 아닌 Streamlit으로 표시
     """
-    s = series.dropna().astype(str)
-    s = s[s != ""]
-    if s.empty:
+    counts = sample_counts(series)
+    if counts.empty:
         st.info(f"📝 {title}: 데이터가 없습니다.")
         return
-
-    counts = s.value_counts().sort_index()
-
-    # ============ 파스텔 색상 정의 ============
-    pastel_colors = ['#A5D6A7', '#C5A5D8', '#FFB6B9', '#FED8B1', '#B4E7FF', 
-                     '#C8E6C9', '#B2DFDB', '#FFCCBC', '#F8BBD0', '#E1BEE7']
-    
-    colors = pastel_colors[:len(counts)] if len(counts) <= len(pastel_colors) else (
-        pastel_colors * (len(counts) // len(pastel_colors) + 1))[:len(counts)]
-    
-    # ============ Figure & Axis 생성 ============
-    fig = plt.figure(figsize=(6, 6), dpi=100)
-    fig.patch.set_facecolor('white')
-    ax = fig.add_subplot(111)
-    
-    # ============ 파이 차트 그리기 (제목 없음!) ============
-    wedges, texts, autotexts = ax.pie(
-        counts.values,
-        labels=[str(label) for label in counts.index],
-        autopct='%1.1f%%',
-        startangle=90,
-        colors=colors,
-        textprops={
-            'fontsize': 14,
-            'weight': 'bold',
-            'color': '#2E5945'
-        }
-    )
-    
-    # ============ 라벨 스타일 설정 ============
-    for text in texts:
-        text.set_fontsize(15)
-        text.set_weight('bold')
-        text.set_color('#2E5945')
-    
-    # ============ 퍼센트 텍스트 스타일 설정 ============
-    for autotext in autotexts:
-        autotext.set_fontsize(13)
-        autotext.set_weight('bold')
-        autotext.set_color('#2E5945')
-    
-    # ============ 도넛 효과 ============
-    centre_circle = plt.Circle((0, 0), 0.65, fc='white', edgecolor='white', linewidth=2)
-    ax.add_artist(centre_circle)
-    
-    ax.axis('equal')
-    plt.tight_layout()
     
     # ============ Streamlit으로 제목 표시 (한글 정상!) ============
     st.markdown(f"### {title}")
     
-    # ============ 차트 렌더링 ============
+    # ============ 차트 렌더링 (같은 분포면 캐시된 PNG) ============
     try:
-        st.pyplot(fig, use_container_width=True, dpi=100)
+        st.image(offload(render_donut, counts), use_container_width=True)
     except Exception as e:
         st.error(f"차트 렌더링 중 오류: {e}")
-    finally:
-        plt.close(fig)
     
     # ============ 데이터 테이블 ============
     st.dataframe(
@@ -1213,133 +1600,341 @@ def donut_chart_counts(series: pd.Series, title: str):
         hide_index=True
     )
 
-def admin_page():
-    """관리자 페이지"""
-    st.markdown("""
-    <div style="background: #5D8A6F; color: white; padding: 2rem; border-radius: 16px; text-align: center; margin-bottom: 2rem; box-shadow: 0 6px 20px rgba(46, 89, 69, 0.2);">
-        <h1 style="color: white;">🔧 관리자 대시보드</h1>
-        <p style="font-size: 1.1rem; margin-top: 0.5rem;">미각 MPTI 응답 관리 시스템</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    # 로그아웃 버튼
-    col1, col2, col3 = st.columns([4, 1, 1])
-    with col3:
-        if st.button("🚪 로그아웃"):
-            st.session_state.admin_authenticated = False
-            st.rerun()
-    
-    sb = get_supabase()
-    df_db = fetch_taste_responses_df() if sb else pd.DataFrame()
-
-    if not df_db.empty:
-        # 통계 카드
+def render_stat_cards(slot, agg: ResponseAggregates):
+    """통계 카드 4개를 slot(st.empty)에 그림 - 집계가 바뀌면 같은 자리에 다시 그림"""
+    with slot.container():
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
             st.markdown(f"""
             <div class="stat-card">
-                <div class="stat-number">{len(df_db)}</div>
+                <div class="stat-number">{agg.count}</div>
                 <div class="stat-label">📊 총 응답 수</div>
             </div>
             """, unsafe_allow_html=True)
         
         with col2:
-            unique_users = df_db['이메일'].nunique() if '이메일' in df_db.columns else 0
             st.markdown(f"""
             <div class="stat-card">
-                <div class="stat-number">{unique_users}</div>
+                <div class="stat-number">{"≈" if agg.approximate else ""}{agg.unique_emails}</div>
                 <div class="stat-label">👥 참여자 수</div>
             </div>
             """, unsafe_allow_html=True)
         
         with col3:
-            avg_age = int(df_db['나이'].mean()) if '나이' in df_db.columns else 0
             st.markdown(f"""
             <div class="stat-card">
-                <div class="stat-number">{avg_age}세</div>
+                <div class="stat-number">{int(agg.mean_age)}세</div>
                 <div class="stat-label">🎂 평균 나이</div>
             </div>
             """, unsafe_allow_html=True)
         
         with col4:
-            today_str = datetime.now().strftime('%Y-%m-%d')
-            today_count = df_db["제출시간"].astype(str).str.contains(today_str).sum() if "제출시간" in df_db.columns else 0
+            today_str = datetime.now(SUBMIT_TZ).strftime('%Y-%m-%d')
             st.markdown(f"""
             <div class="stat-card">
-                <div class="stat-number">{today_count}</div>
+                <div class="stat-number">{agg.count_on(today_str)}</div>
                 <div class="stat-label">📅 오늘 응답</div>
             </div>
             """, unsafe_allow_html=True)
+
+def admin_page():
+    """관리자 페이지"""
+    st.markdown("""
+    <div style="background: #5D8A6F; color: white; padding: 2rem; border-radius: 16px; text-align: center; margin-bottom: 2rem; box-shadow: 0 6px 20px rgba(46, 89, 69, 0.2);">
+        <h1 style="color: white;">🔧 관리자 대시보드</h1>
+        <p style="font-size: 1.1rem; margin-top: 0.5rem;">미각 MPTI 응답 관리 시스템</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # 로그아웃 버튼
+    col1, col2, col3 = st.columns([4, 1, 1])
+    with col3:
+        if st.button("🚪 로그아웃"):
+            st.session_state.admin_authenticated = False
+            st.rerun()
+    
+    sb = get_supabase()
+    
+    # DB 장애 시 마지막 정상 스냅샷으로 표시 (차단기가 열려 있으면 바로 대체)
+    stale_notice = st.empty()
+    stale_ages = []
+    
+    def settle(read, default):
+        try:
+            value, age = read()
+        except Exception as e:
+            stale_ages.append(None)
+            st.warning(f"⚠️ 데이터를 불러오지 못했습니다: {e}")
+            return default
+        if age is not None:
+            stale_ages.append(age)
+        return value
+    
+    def served(fn, *args, default=None):
+        return settle(lambda: read_with_fallback(fn, *args), default)
+    
+    event = st.session_state.event
+    st.caption(f"📍 이벤트: **{EVENTS[event]}** (`{event}`)")
+    stats_server = start_stats_server() if STATS_PORT else None
+    if stats_server is not None:
+        st.caption(f"📺 실시간 현황판: 포트 {stats_server.port}의 `/{event}` (JSON: `/{event}.json`) · "
+                   f"요청 {stats_server.requests}회 중 변경 없음(304) {stats_server.not_modified}회")
+    total_count = 0
+    
+    # 본문 - 응답이 없으면 안내 문구로 교체
+    body = st.empty()
+    with body.container():
+        # 통계 카드 (누적 집계에서 O(1)로 읽음) - 준비된 집계는 바로 표시하고, 아직이면
+        # 재구성을 아래 조회들과 함께 동시에 시작해 끝나는 대로 이 자리에 채움
+        agg = get_ready_aggregates().get(event) if sb else ResponseAggregates()
+        cards = st.empty()
+        if agg is not None:
+            render_stat_cards(cards, agg)
+        else:
+            cards.info("⏳ 통계를 집계하는 중입니다...")
         
         st.markdown("<br><br>", unsafe_allow_html=True)
         
-        st.markdown("### 🥧 소속별 시료 선택 분포(원형 그래프)")
-
-        # 소속 목록
-        if "소속" in df_db.columns:
-            aff_list = sorted([x for x in df_db["소속"].dropna().astype(str).unique() if x.strip() != ""])
-        else:
-            aff_list = []
-
-        selected_aff = st.selectbox(
-            "소속 선택",
-            options=["전체"] + aff_list,
-            index=0,
-            key="aff_filter"
+        # 요청 한도 대기 지표
+        with st.expander("⏱️ Supabase 요청 대기 지표"):
+            admission = get_admission()
+            queued = admission.queued()
+            metrics_df = pd.DataFrame([
+                {"요청": {"insert": "참여자 저장", "read": "관리자 조회", "telemetry": "참여 단계 기록"}[kind],
+                 "처리 수": m["count"], "대기 중": queued.get(kind, 0),
+                 "평균 대기(ms)": round(m["mean_ms"], 1), "p95 대기(ms)": round(m["p95_ms"], 1),
+                 "최대 대기(ms)": round(m["max_ms"], 1)}
+                for kind, m in admission.metrics().items()
+            ])
+            st.dataframe(metrics_df, use_container_width=True, hide_index=True)
+            
+            # 관리자 작업 풀 - 참여자 페이지 실행 시간(이동 평균)이 목표를 넘으면 동시 실행 상한이 줄어듦
+            pool = get_admin_pool().metrics()
+            st.caption(
+                f"관리자 작업 풀 · 동시 실행 {pool['running']}/{pool['limit']} (최대 {pool['max_workers']}) · "
+                f"대기 {pool['waiting']}건 · 완료 {pool['completed']}건 · "
+                f"참여자 페이지 평균 {pool['latency_ms']:.0f}ms (목표 {pool['target_ms']:.0f}ms, {pool['observed']}회)"
+            )
+            
+            # 동시에 들어온 같은 조회는 한 번만 보냄 (합류 = 보내지 않고 진행 중인 응답을 받은 호출)
+            flights = get_flights()
+            labels = {"count": "응답 수", "page": "응답 목록", "table": "전체 응답", "refresh": "스냅샷 갱신",
+                      "rows": "집계 재구성", "funnel": "참여 단계"}
+            flight_df = pd.DataFrame([
+                {"조회": labels.get(kind, kind), "실제 요청": m["issued"], "합류": m["coalesced"],
+                 "합류 비율": m["coalesced"] / (m["issued"] + m["coalesced"])}
+                for kind, m in flights.metrics().items()
+            ])
+            if not flight_df.empty:
+                st.caption(f"동시 조회 합치기 · 진행 중 {flights.in_flight()}건")
+                st.dataframe(
+                    flight_df,
+                    use_container_width=True,
+                    hide_index=True,
+                    column_config={"합류 비율": st.column_config.ProgressColumn("합류 비율", min_value=0.0, max_value=1.0, format="percent")},
+                )
+        
+        # 필터 (DB 쿼리 조건으로 적용)
+        st.markdown("### 🔎 응답 필터")
+        col1, col2, col3, col4, col5 = st.columns([2, 2, 1, 1, 1])
+        with col1:
+            # 집계가 준비되기 전에는 이미 고른 소속만 유지 (다음 실행에서 전체 목록)
+            chosen_aff = st.session_state.get("aff_filter", "전체")
+            selected_aff = st.selectbox(
+                "소속 선택",
+                options=["전체"] + (agg.affiliations() if agg is not None else [chosen_aff] if chosen_aff != "전체" else []),
+                index=0,
+                key="aff_filter"
+            )
+        with col2:
+            date_range = st.date_input("제출 기간", value=(), key="date_filter")
+        with col3:
+            selected_gender = st.selectbox("성별", ["전체", "남", "여"], key="gender_filter")
+        with col4:
+            selected_sweet = st.selectbox("단맛 시료", ["전체", *SAMPLE_CHOICES], key="sweet_filter")
+        with col5:
+            selected_salty = st.selectbox("짠맛 시료", ["전체", *SAMPLE_CHOICES], key="salty_filter")
+        
+        filters = response_filters(
+            event,
+            affiliation=None if selected_aff == "전체" else selected_aff,
+            date_from=date_range[0].isoformat() if len(date_range) > 0 else None,
+            date_to=date_range[-1].isoformat() if len(date_range) > 0 else None,
+            gender=None if selected_gender == "전체" else selected_gender,
+            sweet=None if selected_sweet == "전체" else selected_sweet,
+            salty=None if selected_salty == "전체" else selected_salty,
         )
-
-        # 소속 필터링
-        df_viz = df_db.copy()
-        if selected_aff != "전체" and "소속" in df_viz.columns:
-            df_viz = df_viz[df_viz["소속"].astype(str) == selected_aff]
-
-        colA, colB = st.columns(2)
-
-        with colA:
-            if "단맛선호" in df_viz.columns:
-                donut_chart_counts(df_viz["단맛선호"], f"🍑 단맛 시료 선택 분포 ({selected_aff})")
-            else:
-                st.info("단맛선호 컬럼이 없습니다.")
-
-        with colB:
-            if "짠맛선호" in df_viz.columns:
-                donut_chart_counts(df_viz["짠맛선호"], f"🥣 짠맛 시료 선택 분포 ({selected_aff})")
-            else:
-                st.info("짠맛선호 컬럼이 없습니다.")
-
-        # 응답 목록
+        extra_filters = any(v for k, v in filters.items() if k not in ("event", "affiliation"))
+        filter_label = f"{selected_aff}, 필터 적용" if extra_filters else selected_aff
+        
+        if st.button("🔄 새로고침", key="refresh_admin"):
+            count_taste_responses.clear()
+            fetch_taste_responses_page.clear()
+            fetch_sample_choices_df.clear()
+            try:
+                load_response_table(event, max_age=0)
+            except Exception:
+                pass  # 조회 실패는 다시 그릴 때 표시
+            st.rerun()
+        
+        # 개수·차트·표 조회를 동시에 시작하고, 끝나는 순서대로 해당 영역을 채움
+        page_guess = int(st.session_state.get("admin_page_no", 1))
+        reads = {
+            "count": (count_taste_responses, event),
+            "charts": (fetch_sample_choices_df, filters),
+            "page": (fetch_taste_responses_page, filters, page_guess - 1),
+            # 가장 오래 걸리는 재구성은 마지막에 맡김 (풀 상한이 작아도 빠른 조회가 먼저 시작)
+            **({"aggregates": (get_response_aggregates, event)} if agg is None else {}),
+        } if sb else {}
+        counted = None
+        
+        def reconcile():
+            # 개수를 센 뒤로 이 프로세스의 집계가 그대로인데 다르면
+            # 다른 프로세스에서 저장·삭제된 응답이 있으므로 집계를 다시 맞춤
+            total, version = counted
+            if version == agg.version and agg.count != total and not stale_ages:
+                try:
+                    offload(lambda: agg.rebuild(fetch_taste_rows(event)))
+                except Exception:
+                    pass
+                render_stat_cards(cards, agg)
+        
+        st.markdown("### 🥧 소속별 시료 선택 분포(원형 그래프)")
+        charts_slot = st.empty()
+        charts_slot.info("⏳ 차트 데이터를 불러오는 중입니다...")
+        compare_slot = st.empty()
         st.markdown("### 📊 응답 기록")
+        table_slot = st.empty()
+        table_slot.info("⏳ 응답 기록을 불러오는 중입니다...")
         
-        # 표시할 컬럼 선택
-        display_cols = ["성명", "소속", "이메일", "성별", "나이", "신장", "체중", "단맛선호", "짠맛선호", "제출시간"]
-        available_cols = [col for col in display_cols if col in df_db.columns]
+        df_page = pd.DataFrame()
+        for name, read in read_concurrently(reads):
+            if name == "count":
+                counted = settle(read, (0, None))
+                total_count = counted[0]
+                if agg is not None:
+                    reconcile()
+            
+            elif name == "aggregates":
+                try:
+                    agg, _ = read()
+                except Exception:
+                    # 집계를 만들지 못함 - 통계 카드는 비워 두고 다음 실행에서 다시 시도
+                    cards.warning("⚠️ 통계를 집계하지 못했습니다. 새로고침하면 다시 시도합니다.")
+                    agg = ResponseAggregates()
+                else:
+                    render_stat_cards(cards, agg)
+                    if counted is not None:
+                        reconcile()
+            
+            elif name == "charts":
+                df_viz = settle(read, pd.DataFrame())
+                with charts_slot.container():
+                    colA, colB = st.columns(2)
+                    
+                    with colA:
+                        if "단맛선호" in df_viz.columns:
+                            donut_chart_counts(df_viz["단맛선호"], f"🍑 단맛 시료 선택 분포 ({filter_label})")
+                        else:
+                            st.info("단맛선호 데이터가 없습니다.")
+                    
+                    with colB:
+                        if "짠맛선호" in df_viz.columns:
+                            donut_chart_counts(df_viz["짠맛선호"], f"🥣 짠맛 시료 선택 분포 ({filter_label})")
+                        else:
+                            st.info("짠맛선호 데이터가 없습니다.")
+            
+            elif name == "page":
+                # 응답 목록 (서버 측 페이지 단위 조회)
+                df_page, filtered_count = settle(read, (pd.DataFrame(), 0))
+                n_pages = max(1, -(-filtered_count // ADMIN_PAGE_SIZE))
+                with table_slot.container():
+                    col1, col2 = st.columns([1, 4])
+                    with col1:
+                        page_no = st.number_input("페이지", min_value=1, max_value=n_pages, value=1, step=1, key="admin_page_no")
+                    with col2:
+                        st.markdown(f"<br>총 **{filtered_count}**건 · {n_pages}쪽", unsafe_allow_html=True)
+                    if int(page_no) != page_guess:
+                        df_page, _ = served(fetch_taste_responses_page, filters, int(page_no) - 1, default=(pd.DataFrame(), 0))
+                    if "제출시간" in df_page.columns:
+                        df_page = df_page.assign(제출시간=df_page["제출시간"].map(format_submit_time))
+                    
+                    # 표시할 컬럼 선택
+                    display_cols = ["성명", "소속", "이메일", "성별", "나이", "신장", "체중", "단맛선호", "짠맛선호", "제출시간"]
+                    available_cols = [col for col in display_cols if col in df_page.columns]
+                    
+                    st.dataframe(df_page[available_cols], use_container_width=True, height=400)
         
-        st.dataframe(df_db[available_cols], use_container_width=True, height=400)
+        # 전체 소속 비교 - 소속을 하나씩 바꿔 보는 대신 한 번의 groupby·한 장의 그림으로
+        with compare_slot.container():
+            if st.toggle("🏫 전체 소속 한눈에 비교", key="compare_affiliations") and sb:
+                try:
+                    offload(load_response_table, event)
+                    png = offload(render_affiliation_comparison, {**filters, "affiliation": None}, get_snapshot(event).version())
+                except Exception as e:
+                    st.warning(f"⚠️ 소속 비교 데이터를 불러오지 못했습니다: {e}")
+                else:
+                    if png:
+                        st.image(png, use_container_width=True)
+                    else:
+                        st.info("📝 비교할 응답이 없습니다.")
         
-        # CSV 다운로드
-        csv = df_db.to_csv(index=False, encoding='utf-8-sig')
-        st.download_button(
-            label="📥 전체 데이터 CSV 다운로드",
-            data=csv,
-            file_name=f"미각MPTI_전체응답_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv",
-            use_container_width=True
-        )
+        # CSV 다운로드 (필터 결과 전체, 요청 시에만 조회)
+        if st.button("📄 CSV 준비하기", use_container_width=True, key="prepare_csv"):
+            st.session_state.admin_csv = offload(lambda: responses_to_csv(fetch_filtered_responses_df(filters)))
+        if st.session_state.get("admin_csv"):
+            st.download_button(
+                label="📥 필터 결과 CSV 다운로드",
+                data=st.session_state.admin_csv,
+                file_name=f"미각MPTI_전체응답_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                mime="text/csv",
+                use_container_width=True
+            )
+        
+        # 결과 카드 일괄 생성
+        with st.expander("🖨️ 참여자 결과 카드 일괄 생성"):
+            col1, col2 = st.columns(2)
+            with col1:
+                card_fmt = st.radio("형식", ["png", "pdf"], horizontal=True, key="card_fmt")
+            with col2:
+                card_group = st.radio("묶음", ["참여자별", "소속별"], horizontal=True, key="card_group")
+            if st.button("🖨️ 카드 생성", use_container_width=True, key="build_cards"):
+                card_rows = offload(lambda: fetch_filtered_responses_df(filters).to_dict("records"))
+                progress = st.progress(0.0)
+                buf = io.BytesIO()
+                with st.spinner("카드를 생성하는 중입니다..."):
+                    count = offload(
+                        build_cards_zip, card_rows, buf, fmt=card_fmt,
+                        group="affiliation" if card_group == "소속별" else "participant",
+                        progress=lambda done, total: progress.progress(done / total),
+                        title=EVENTS[event],
+                    )
+                st.session_state.cards_zip = buf.getvalue()
+                st.success(f"✅ {count}개 파일을 생성했습니다. ({filter_label})")
+            if st.session_state.get("cards_zip"):
+                st.download_button(
+                    label="📥 결과 카드 ZIP 다운로드",
+                    data=st.session_state.cards_zip,
+                    file_name=f"미각MPTI_결과카드_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip",
+                    mime="application/zip",
+                    use_container_width=True
+                )
         
-        # 개별 응답 상세보기
+        # 개별 응답 상세보기 (현재 페이지의 참여자)
         st.markdown("### 🔍 개별 응답 상세보기")
         
-        if '성명' in df_db.columns and '이메일' in df_db.columns:
+        if not df_page.empty and '성명' in df_page.columns and '이메일' in df_page.columns:
+            participant_labels = build_participant_labels(df_page)
             selected_option = st.selectbox(
                 "참여자 선택",
-                options=df_db.apply(lambda x: f"{x['성명']} ({x['이메일']})", axis=1).tolist(),
+                options=participant_labels,
                 key="admin_select"
             )
             
             if selected_option:
-                selected_idx = df_db.apply(lambda x: f"{x['성명']} ({x['이메일']})", axis=1).tolist().index(selected_option)
-                selected_row = df_db.iloc[selected_idx]
+                selected_idx = participant_labels.index(selected_option)
+                selected_row = df_page.iloc[selected_idx]
                 
                 # BMI 계산
                 if '신장' in selected_row and '체중' in selected_row:
@@ -1384,24 +1979,182 @@ def admin_page():
                 st.markdown('</div>', unsafe_allow_html=True)
                 
                 # 상세 응답 데이터 표시
-                if '응답데이터' in selected_row and selected_row['응답데이터']:
-                    try:
-                        response_detail = json.loads(selected_row['응답데이터'])
-                        with st.expander("📝 상세 응답 데이터 (JSON)"):
-                            st.json(response_detail)
-                    except:
-                        st.warning("⚠️ 응답 데이터를 불러올 수 없습니다.")
-    
-    else:
-        st.info("📝 아직 제출된 응답이 없습니다.")
+                # 컬럼 + 응답데이터로 전체 응답 복원 (저장 방식과 무관)
+                response_detail = row_to_response(selected_row.to_dict())
+                with st.expander("📝 상세 응답 데이터 (JSON)"):
+                    st.json(response_detail)
+    
+    if not total_count and not stale_ages:
+        body.info("📝 아직 제출된 응답이 없습니다.")
+    
+    sketch_panel(event)
+    funnel_panel(event)
+    profiler_panel()
+    
+    if stale_ages:
+        known = [age for age in stale_ages if age is not None]
+        age_note = f"{int(max(known))}초 전 데이터를 표시합니다." if known else "표시할 이전 데이터가 없습니다."
+        stale_notice.warning(f"⚠️ 데이터베이스 응답이 없어 {age_note} (자동으로 재연결을 시도합니다)")
+
+def sketch_panel(event: str):
+    """이벤트를 합친 근사 통계 - 이벤트별 스케치를 병합하므로 응답 수와 무관하게 바로 계산"""
+    with st.expander("📈 이벤트 통합 요약 (근사)"):
+        selected = st.multiselect(
+            "이벤트",
+            options=list(EVENTS),
+            default=[event],
+            format_func=lambda e: EVENTS[e],
+            key="sketch_events"
+        )
+        if not selected or get_supabase() is None:
+            st.caption("이벤트를 선택하세요.")
+            return
+        
+        sketch = ResponseSketch()
+        for event_id in selected:
+            try:
+                sketch.merge(offload(get_response_aggregates, event_id).sketch())
+            except Exception as e:
+                st.warning(f"⚠️ {EVENTS[event_id]} 집계를 불러오지 못했습니다: {e}")
+        if not sketch.count:
+            st.caption("아직 제출된 응답이 없습니다.")
+            return
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("응답 수", f"{sketch.count:,}")
+        with col2:
+            st.metric("참여자 수 (≈)", f"{sketch.participants.count():,}")
+        
+        fmt = lambda v: "-" if v is None else f"{v:.1f}"
+        st.dataframe(
+            pd.DataFrame(
+                [[fmt(v) for v in sketch.quantiles("age")], [fmt(v) for v in sketch.quantiles("bmi")]],
+                index=["나이", "BMI"], columns=["p10", "중앙값", "p90"],
+            ),
+            use_container_width=True
+        )
+        
+        choices = pd.DataFrame({"단맛": sketch.sweet, "짠맛": sketch.salty}).reindex(list(SAMPLE_CHOICES)).fillna(0).astype(int)
+        st.bar_chart(choices, height=220)
+        st.dataframe(
+            pd.Series(sketch.by_affiliation, name="응답 수").sort_values(ascending=False).rename_axis("소속").reset_index(),
+            use_container_width=True,
+            hide_index=True
+        )
+        st.caption("참여자 수는 HyperLogLog(오차 약 ±1.6%), 분위수는 t-digest 근사값입니다.")
+
+def funnel_panel(event: str):
+    """참여 단계별 도달 세션 수와 페이지 체류 시간"""
+    with st.expander("🚦 참여 단계별 이탈 · 체류 시간"):
+        try:
+            rows = fetch_funnel_events(event)
+        except Exception as e:
+            st.warning(f"⚠️ 참여 단계 기록을 불러오지 못했습니다: {e}")
+            return
+        if not rows:
+            st.caption("아직 기록된 참여 단계가 없습니다.")
+            return
+        
+        funnel, dwell = offload(funnel_tables, rows, funnel_steps(get_taste_tests(TASTE_TESTS_FILE)))
+        st.bar_chart(funnel, x="단계", y="도달 세션", sort=False, height=260)
+        st.dataframe(
+            funnel,
+            use_container_width=True,
+            hide_index=True,
+            column_config={"시작 대비": st.column_config.ProgressColumn("시작 대비", min_value=0.0, max_value=1.0, format="percent")},
+        )
+        st.markdown("##### ⏱️ 페이지 체류 시간 (다음 페이지로 넘어간 세션 기준)")
+        st.bar_chart(dwell, y="중앙값(초)", sort=False, height=220)
+        st.dataframe(dwell, use_container_width=True)
+        
+        funnel_buffer = get_funnel()
+        if funnel_buffer is not None:
+            note = f" · 저장 실패 {funnel_buffer.failures}회 ({funnel_buffer.last_error})" if funnel_buffer.failures else ""
+            st.caption(f"저장됨 {funnel_buffer.flushed}건 · 대기 {funnel_buffer.pending()}건{note}")
+
+def profiler_panel():
+    """페이지 실행 프로파일링 - 지정한 페이지의 다음 N번 실행을 기록"""
+    with st.expander("🔬 페이지 성능 프로파일링"):
+        profiler = get_profiler()
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            target = st.selectbox("대상 페이지", PROFILE_TARGETS, key="profile_target")
+        with col2:
+            runs = st.number_input("기록 횟수", min_value=1, max_value=50, value=5, key="profile_runs")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("⏺️ 기록 시작", key="profile_start", use_container_width=True):
+                profiler.arm(target, runs)
+        with col2:
+            if st.button("⏹️ 중지", key="profile_stop", use_container_width=True):
+                profiler.disarm()
+        
+        if profiler.target:
+            st.caption(f"`{profiler.target}` 의 다음 실행 {profiler.remaining}회를 기록합니다.")
+        
+        if WARMUP:
+            warmup = start_warmup()
+            if warmup["done"].is_set():
+                st.caption("서버 예열 단계별 소요 시간 (프로세스 시작 시 1회)")
+                st.dataframe(pd.DataFrame(warmup["steps"]), use_container_width=True, hide_index=True)
+            else:
+                st.caption("⏳ 서버 예열 중입니다...")
+        
+        captures = profiler.captures()
+        if not captures:
+            st.caption("아직 기록된 실행이 없습니다.")
+            return
+        
+        picked = st.selectbox(
+            "기록 선택",
+            options=range(len(captures)),
+            format_func=lambda i: f"{captures[i]['started']:%m-%d %H:%M:%S} · {captures[i]['page']} · {captures[i]['seconds'] * 1000:.0f}ms",
+            key="profile_pick"
+        )
+        capture = captures[picked]
+        try:
+            summary = pd.DataFrame(RerunProfiler.summarize(capture["path"]))
+            with open(capture["path"], "rb") as f:
+                data = f.read()
+        except OSError as e:
+            st.warning(f"⚠️ 기록 파일을 읽을 수 없습니다: {e}")
+            return
+        
+        # 누적 시간 상위 함수 (snakeviz 등에서는 .prof 파일로 전체 호출 관계 확인)
+        st.dataframe(
+            summary,
+            use_container_width=True,
+            hide_index=True,
+            column_config={"누적 비율": st.column_config.ProgressColumn("누적 비율", min_value=0.0, max_value=1.0, format="percent")},
+        )
+        st.download_button(
+            "📥 .prof 다운로드",
+            data=data,
+            file_name=os.path.basename(capture["path"]),
+            mime="application/octet-stream",
+            key="profile_download"
+        )
 
 # 메인 로직
 def main():
+    if WARMUP:
+        start_warmup()
+    if STATS_PORT:
+        start_stats_server()
+    
+    try:
+        taste_tests = get_taste_tests(TASTE_TESTS_FILE)
+    except (OSError, ValueError) as e:
+        st.error(f"❌ 시식 정의 파일을 읽을 수 없습니다: {e}")
+        st.stop()
+    
     # 사이드바
     with st.sidebar:
-        st.markdown("""
+        st.markdown(f"""
         <div style="text-align: center; padding: 1rem 0;">
-            <h2 style="color: #2E5945;">🌿 평창 웰니스</h2>
+            <h2 style="color: #2E5945;">🌿 {EVENTS[st.session_state.event]}</h2>
             <p style="color: #5D8A6F;">미각 MPTI</p>
         </div>
         """, unsafe_allow_html=True)
@@ -1411,15 +2164,16 @@ def main():
         admin_mode = st.checkbox("🔧 관리자 모드", value=st.session_state.get('admin_mode', False), key='admin_mode')
         
         # 진행률 표시
-        if not admin_mode and st.session_state.page > 0 and st.session_state.page < 4:
+        # 단계: 기본정보, 시식 페이지들, 완료
+        steps = ["기본정보", *(test["label"] for test in taste_tests), "완료"]
+        if not admin_mode and 0 < st.session_state.page < len(steps):
             st.markdown("### 📊 진행 상황")
-            progress = st.session_state.page / 4
+            progress = st.session_state.page / len(steps)
             st.progress(progress)
             st.markdown(f"**{int(progress * 100)}%** 완료")
-            st.markdown(f"**{st.session_state.page}** / 4 단계")
+            st.markdown(f"**{st.session_state.page}** / {len(steps)} 단계")
             
             # 단계 표시
-            steps = ["기본정보", "단맛", "짠맛", "완료"]
             for i, step in enumerate(steps, 1):
                 if i < st.session_state.page:
                     st.markdown(f"✅ {step}")
@@ -1447,20 +2201,24 @@ def main():
             admin_login()
             return
         else:
-            admin_page()
+            run_page(admin_page)
             return
     
-    # 일반 사용자 페이지
+    # 일반 사용자 페이지 (페이지가 바뀔 때만 진입 기록)
+    pages = funnel_steps(taste_tests)
+    if 0 <= st.session_state.page < len(pages) and st.session_state.get("funnel_page") != st.session_state.page:
+        st.session_state.funnel_page = st.session_state.page
+        track(pages[st.session_state.page][0], "view")
+    
     if st.session_state.page == 0:
-        page_intro()
+        run_page(page_intro)
     elif st.session_state.page == 1:
-        page_basic_info()
-    elif st.session_state.page == 2:
-        page_sweet_preference()
-    elif st.session_state.page == 3:
-        page_salty_preference()
-    elif st.session_state.page == 4:
-        page_complete()
+        run_page(page_basic_info)
+    elif st.session_state.page - 2 < len(taste_tests):
+        index = st.session_state.page - 2
+        run_page(page_taste_test, taste_tests[index], st.session_state.page, last=index == len(taste_tests) - 1)
+    elif st.session_state.page == len(taste_tests) + 2:
+        run_page(page_complete)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 저장소 최상위 모듈(mpti_core 등)을 그대로 import
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,70 @@
+"""Supabase 요청 수 제한 - 버킷 대기, 전체 한도 우선순위"""
+import threading
+import time
+
+from mpti_core import AdmissionController, TokenBucket
+
+PRIORITIES = {"insert": 0, "read": 1, "telemetry": 2}
+
+
+def make(budgets, total):
+    return AdmissionController(budgets=budgets, total=total, priorities=PRIORITIES)
+
+
+def acquire_in_thread(controller, kind, order):
+    def run():
+        controller.acquire(kind)
+        order.append(kind)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def wait_until_queued(controller, kind, n=1):
+    deadline = time.monotonic() + 2
+    while controller.queued().get(kind, 0) < n:
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_token_bucket_refills_at_rate():
+    bucket = TokenBucket(rate=10, burst=2)
+    now = bucket.updated
+    bucket.take()
+    bucket.take()
+    assert abs(bucket.delay(now) - 0.1) < 1e-9
+    assert bucket.delay(now + 0.1) == 0
+
+
+def test_kind_budget_makes_requests_wait_and_records_stats():
+    controller = make({"insert": (20, 1), "read": (20, 1), "telemetry": (20, 1)}, total=(1000, 100))
+    assert controller.acquire("read") < 0.01
+    waited = controller.acquire("read")
+    assert 0.03 < waited < 0.2
+    stats = controller.metrics()["read"]
+    assert stats["count"] == 2 and stats["max_ms"] >= 30
+
+
+def test_higher_priority_goes_first_on_shared_budget():
+    controller = make({"insert": (100, 10), "read": (100, 10), "telemetry": (100, 10)}, total=(10, 1))
+    controller.acquire("telemetry")  # 전체 버킷을 비움
+    order = []
+    low = acquire_in_thread(controller, "telemetry", order)
+    wait_until_queued(controller, "telemetry")
+    high = acquire_in_thread(controller, "insert", order)
+    low.join(2)
+    high.join(2)
+    assert order == ["insert", "telemetry"]
+
+
+def test_request_waiting_on_its_own_budget_does_not_block_lower_kinds():
+    # 저장 한도(초당 0.5)가 바닥나 저장이 기다리는 동안에도 전체 한도가 남으면 조회는 바로 통과
+    controller = make({"insert": (0.5, 1), "read": (100, 10), "telemetry": (100, 10)}, total=(1000, 100))
+    controller.acquire("insert")
+    order = []
+    waiting_insert = acquire_in_thread(controller, "insert", order)
+    wait_until_queued(controller, "insert")
+    assert controller.acquire("read") < 0.1
+    assert controller.acquire("telemetry") < 0.1
+    waiting_insert.join(3)
+    assert order == ["insert"]
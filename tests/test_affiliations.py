@@ -0,0 +1,43 @@
+"""자유 입력 소속 -> 대표 소속키"""
+import pytest
+
+from mpti_core import affiliation_index
+
+
+@pytest.mark.parametrize("raw, key", [
+    ("서울대", "서울대학교"),
+    ("SNU", "서울대학교"),
+    (" 서울 대학교 ", "서울대학교"),
+    ("Seoul National University", "서울대학교"),
+    ("서울대 정밀푸드솔루션연구실", "서울대학교"),
+    ("Seoul Natl. University", "서울대학교"),
+    ("강원대", "강원대학교"),
+    ("평창군 보건소", "평창군보건의료원"),
+    ("식약처", "식품의약품안전처"),
+    ("(주)CJ제일제당", "CJ제일제당"),
+    ("씨제이 제일제당", "CJ제일제당"),
+    # 끝 글자 오타 (기관 종류를 알 수 없는 끝은 유사도로만 판단)
+    ("서울대학료", "서울대학교"),
+    ("고려대학쿄", "고려대학교"),
+])
+def test_aliases_and_variants_map_to_key(raw, key):
+    assert affiliation_index().key(raw) == key
+
+
+@pytest.mark.parametrize("raw, key", [
+    ("서울대학교병원", "서울대학교병원"),
+    ("강원대학교병원", "강원대학교병원"),
+    ("식품연구소", "식품연구소"),
+    ("서울대학교 치과병원", "서울대학교치과병원"),
+    ("Seoul National University Hospital", "seoulnationaluniversityhospital"),
+])
+def test_distinct_organisations_are_not_merged(raw, key):
+    # 글자가 많이 겹쳐도 기관 종류가 다르면 규칙의 키로 합치지 않음
+    assert affiliation_index().key(raw) == key
+
+
+def test_unknown_affiliations_share_one_canonical_key():
+    index = affiliation_index()
+    assert {index.key(raw) for raw in ["Foo Univ", "foo univ.", "FOO-UNIV", " Foo  Univ "]} == {"foouniv"}
+    assert index.key("  새로운   회사 ") == index.key("새로운회사") == "새로운회사"
+    assert index.key("") == ""
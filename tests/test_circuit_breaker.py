@@ -0,0 +1,76 @@
+"""Supabase 장애 대비 - 차단기와 마지막 정상 응답"""
+import threading
+import time
+
+import pytest
+
+from mpti_core import CircuitBreaker, CircuitOpenError, SnapshotStore
+
+
+def fail():
+    raise ConnectionError("down")
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_opens_after_consecutive_failures_only():
+    breaker = CircuitBreaker(probe=fail, failure_threshold=3, probe_interval=60)
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+    # 성공하면 연속 실패 수가 다시 0부터
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.failures == 0
+    for _ in range(3):
+        with pytest.raises(ConnectionError):
+            breaker.call(fail)
+    assert breaker.is_open
+    assert breaker.last_error == "ConnectionError: down"
+
+
+def test_open_breaker_fails_fast_without_calling():
+    breaker = CircuitBreaker(probe=fail, failure_threshold=1, probe_interval=60)
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    calls = []
+    with pytest.raises(CircuitOpenError, match="ConnectionError: down"):
+        breaker.call(lambda: calls.append(1))
+    assert calls == []
+    with pytest.raises(CircuitOpenError):
+        breaker.check()
+    CircuitBreaker(probe=fail).check()  # 닫혀 있으면 그대로 통과
+
+
+def test_probe_closes_breaker_once_it_succeeds():
+    healthy = threading.Event()
+    probes = []
+
+    def probe():
+        probes.append(1)
+        if not healthy.is_set():
+            raise TimeoutError("still down")
+
+    breaker = CircuitBreaker(probe=probe, failure_threshold=1, probe_interval=0.01)
+    with pytest.raises(ConnectionError):
+        breaker.call(fail)
+    wait_for(lambda: len(probes) >= 2)
+    assert breaker.is_open and breaker.last_error == "TimeoutError: still down"
+    healthy.set()
+    wait_for(lambda: not breaker.is_open)
+    assert breaker.failures == 0
+    assert breaker.call(lambda: 42) == 42
+
+
+def test_snapshot_store_returns_value_and_age():
+    store = SnapshotStore()
+    assert store.get(("rows", "seoul")) is None
+    store.put(("rows", "seoul"), [1, 2])
+    value, age = store.get(("rows", "seoul"))
+    assert value == [1, 2] and 0 <= age < 1
+    store.put(("rows", "seoul"), [3])
+    assert store.get(("rows", "seoul"))[0] == [3]
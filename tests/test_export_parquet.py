@@ -0,0 +1,112 @@
+"""Parquet 증분 내보내기 - 배치마다 컬럼이 달라도 같은 스키마로"""
+import json
+
+import pandas as pd
+import pytest
+
+from export_parquet import export_incremental
+from mpti_core import TASTE_TESTS_PATH
+
+
+class _Query:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def gt(self, col, value):
+        return _Query([r for r in self.rows if r[col] > value])
+
+    def order(self, col):
+        return _Query(sorted(self.rows, key=lambda r: r[col]))
+
+    def range(self, start, end):
+        return _Query(self.rows[start:end + 1])
+
+    def execute(self):
+        return type("Res", (), {"data": self.rows})()
+
+
+class FakeClient:
+    def __init__(self):
+        self.rows = []
+
+    def table(self, name):
+        return _Query(list(self.rows))
+
+
+def test_parts_share_one_schema(tmp_path):
+    sb = FakeClient()
+    # 마이그레이션 전 행 (이벤트·소속키·응답데이터 없음)
+    sb.rows.append({"id": 1, "이메일": "a@x.com", "성명": "가", "소속": "서울대", "성별": "여",
+                    "나이": 30, "신장": 160, "체중": 50, "단맛선호": "3", "짠맛선호": "2",
+                    "제출시간": "2026-10-18 10:00:00"})
+    assert export_incremental(sb, str(tmp_path)) == 1
+
+    sb.rows.append({"id": 2, "이메일": "b@x.com", "성명": "나", "소속": "연세대", "성별": "남",
+                    "나이": 40, "신장": 175.5, "체중": 70, "단맛선호": "4", "짠맛선호": "1",
+                    "제출시간": "2026-10-19 01:00:00+00", "이벤트": "seoul", "소속키": "연세대학교",
+                    "응답데이터": json.dumps({"sour_preference": "4"})})
+    assert export_incremental(sb, str(tmp_path), partition_by_affiliation=False) == 1
+
+    df = pd.read_parquet(tmp_path).sort_values("id")
+    assert df["이벤트"].tolist() == ["pyeongchang", "seoul"]
+    assert df["소속키"].tolist() == ["서울대학교", "연세대학교"]
+    assert json.loads(df["응답데이터"].iloc[1])["sour_preference"] == "4"
+    assert str(df["제출시간"].iloc[1]) == "2026-10-19 10:00:00+09:00"
+    assert df["신장"].tolist() == [160.0, 175.5]
+
+
+def test_affiliation_partition_uses_key(tmp_path):
+    sb = FakeClient()
+    sb.rows += [
+        {"id": 1, "소속": "서울대", "제출시간": "2026-10-18 10:00:00"},
+        {"id": 2, "소속": "SNU", "제출시간": "2026-10-18 11:00:00"},
+    ]
+    export_incremental(sb, str(tmp_path), partition_by_affiliation=True)
+    df = pd.read_parquet(tmp_path)
+    # 표기가 달라도 같은 소속키 파티션 하나로
+    assert set(df["소속구분"].astype(str)) == {"서울대학교"}
+    assert len(list((tmp_path / "제출일=2026-10-18").iterdir())) == 1
+
+
+def write_taste_tests(path, extra_keys):
+    """기본 시식(단맛·짠맛)에 컬럼 없는 시식을 더한 정의 파일"""
+    with open(TASTE_TESTS_PATH, encoding="utf-8") as f:
+        tests = json.load(f)["tests"]
+    for key in extra_keys:
+        tests.append({**tests[0], "id": key, "response_key": key, "column": None})
+    path.write_text(json.dumps({"tests": tests}, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+def test_custom_tastes_are_flattened_into_columns(tmp_path):
+    taste_tests = write_taste_tests(tmp_path / "tests.json", ["sour_preference", "bitter_preference"])
+    root = str(tmp_path / "archive")
+    sb = FakeClient()
+    sb.rows.append({"id": 1, "소속": "서울대", "제출시간": "2026-10-18 10:00:00",
+                    "응답데이터": json.dumps({"sour_preference": "4"})})
+    assert export_incremental(sb, root, taste_tests=taste_tests) == 1
+    # 다음 배치에는 다른 시식 응답만 있어도 같은 컬럼
+    sb.rows.append({"id": 2, "소속": "서울대", "제출시간": "2026-10-18 11:00:00",
+                    "응답데이터": json.dumps({"bitter_preference": "2"})})
+    assert export_incremental(sb, root, taste_tests=taste_tests) == 1
+
+    df = pd.read_parquet(root).sort_values("id")
+    assert df["응답_sour_preference"].iloc[0] == "4"
+    assert df["응답_sour_preference"].isna().tolist() == [False, True]
+    assert df["응답_bitter_preference"].isna().tolist() == [True, False]
+    assert df["응답_bitter_preference"].iloc[1] == "2"
+    # 테이블 컬럼이 있는 시식은 펼치지 않음 (단맛선호·짠맛선호 그대로)
+    assert "응답_sweet_preference" not in df.columns
+
+
+def test_changed_taste_tests_need_a_new_dataset(tmp_path):
+    root = str(tmp_path / "archive")
+    sb = FakeClient()
+    sb.rows.append({"id": 1, "소속": "서울대", "제출시간": "2026-10-18 10:00:00"})
+    export_incremental(sb, root)
+    taste_tests = write_taste_tests(tmp_path / "tests.json", ["sour_preference"])
+    with pytest.raises(ValueError, match="sour_preference"):
+        export_incremental(sb, root, taste_tests=taste_tests)
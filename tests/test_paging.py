@@ -0,0 +1,37 @@
+"""max-rows를 넘는 전체 조회 - 페이지 나눠 받기"""
+import pyarrow as pa
+
+from mpti_core import concat_response_tables, fetch_pages, read_responses_arrow
+
+
+def make_source(n, max_rows=1000):
+    rows = [{"id": i} for i in range(n)]
+    calls = []
+
+    def page(start, end):
+        calls.append((start, end))
+        # PostgREST처럼 요청 범위가 커도 max-rows까지만
+        return rows[start:min(end, start + max_rows - 1) + 1]
+    return rows, calls, page
+
+
+def test_fetch_pages_reads_past_max_rows():
+    rows, calls, page = make_source(2500)
+    fetched = [row for chunk in fetch_pages(page) for row in chunk]
+    assert fetched == rows
+    assert calls == [(0, 999), (1000, 1999), (2000, 2999)]
+
+
+def test_fetch_pages_exact_multiple_ends_with_empty_page():
+    rows, calls, page = make_source(2000)
+    assert sum(len(chunk) for chunk in fetch_pages(page)) == 2000
+    assert len(calls) == 3
+
+
+def test_concat_response_tables_promotes_page_types():
+    first = read_responses_arrow("id,나이,체중\n1,30,\n")
+    second = read_responses_arrow("id,나이,체중\n2,31,70.5\n")
+    table = concat_response_tables([first, second, pa.table({})])
+    assert table.num_rows == 2
+    assert table["체중"].to_pylist() == [None, 70.5]
+    assert concat_response_tables([]).num_rows == 0
@@ -0,0 +1,55 @@
+"""응답데이터 저장 방식 - 세 방식 모두 행 -> 세션 응답으로 그대로 복원"""
+import pytest
+
+from mpti_core import PAYLOAD_MODES, build_response_row, compact_payload_row, decode_payload, encode_payload, row_to_response
+
+RESPONSE = {
+    "email": "hong@example.com",
+    "name": "홍길동",
+    "affiliation": "서울대학교",
+    "gender": "남",
+    "age": 35,
+    "height": 172.5,
+    "weight": 68.0,
+    "sweet_preference": "3",
+    "salty_preference": "5",
+    "제출시간": "2025-09-01 14:03:27",
+    "event": "seoul",
+    "sweet_note": "시료 3이 가장 " + "달콤하고 부드러움 " * 20,
+    "ranks": {"sweet": ["3", "1", "2", "5", "4"], "salty": ["5", "4", "3", "2", "1"]},
+}
+
+
+@pytest.mark.parametrize("mode", PAYLOAD_MODES)
+def test_round_trip(mode):
+    row = build_response_row(RESPONSE, payload_mode=mode)
+    assert row_to_response(row) == RESPONSE
+
+
+def test_compact_modes_store_only_extra_items():
+    compact = encode_payload(RESPONSE, "compact")
+    assert decode_payload(compact) == {"sweet_note": RESPONSE["sweet_note"], "ranks": RESPONSE["ranks"]}
+    packed = encode_payload(RESPONSE, "compact_zlib")
+    assert packed.startswith("z:") and len(packed) < len(compact)
+    assert decode_payload(packed) == decode_payload(compact)
+
+
+def test_short_payload_is_not_compressed():
+    assert encode_payload({"a": 1}, "compact_zlib") == '{"a":1}'
+
+
+@pytest.mark.parametrize("value", [None, "", "   ", "not json", "[1, 2]", "z:!!!", "z:" + "QUJD"])
+def test_unreadable_payload_decodes_to_empty(value):
+    assert decode_payload(value) == {}
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        encode_payload(RESPONSE, "gzip")
+
+
+def test_compact_payload_row_only_reports_changes():
+    row = build_response_row(RESPONSE, payload_mode="full")
+    compacted = compact_payload_row(row, "compact_zlib")
+    assert compacted is not None and decode_payload(compacted)["ranks"] == RESPONSE["ranks"]
+    assert compact_payload_row({**row, "응답데이터": compacted}, "compact_zlib") is None
@@ -0,0 +1,28 @@
+"""페이지 프로파일 기록 - 보관 개수만큼만 남김"""
+import os
+
+from mpti_core import RerunProfiler
+
+
+def page():
+    return sum(range(100))
+
+
+def test_keeps_only_the_latest_captures_on_disk(tmp_path):
+    # 이전 실행이 남긴 파일도 정리 대상
+    (tmp_path / "20000101_000000_000000_page.prof").write_bytes(b"")
+    profiler = RerunProfiler(str(tmp_path), keep=3)
+    profiler.arm("page", 5)
+    for _ in range(5):
+        assert profiler.run(page) == 4950
+    captures = profiler.captures()
+    assert len(captures) == 3
+    assert sorted(os.listdir(tmp_path)) == sorted(os.path.basename(c["path"]) for c in captures)
+    assert RerunProfiler.summarize(captures[0]["path"])
+
+
+def test_other_pages_are_not_profiled(tmp_path):
+    profiler = RerunProfiler(str(tmp_path / "prof"))
+    profiler.arm("other", 1)
+    assert profiler.run(page) == 4950
+    assert profiler.captures() == [] and not os.path.exists(tmp_path / "prof")
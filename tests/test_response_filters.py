@@ -0,0 +1,90 @@
+"""관리자 필터 -> PostgREST 조건, 같은 필터의 pyarrow 적용과 결과 일치"""
+import operator
+
+import pytest
+
+from mpti_core import (
+    apply_response_filters,
+    filter_response_table,
+    parse_submit_time,
+    read_responses_arrow,
+    with_submit_timestamps,
+)
+
+
+class RecordingQuery:
+    """호출된 조건만 기록하는 postgrest 쿼리 대역"""
+
+    def __init__(self, calls=()):
+        self.calls = list(calls)
+
+    def _op(name):
+        def call(self, column, value):
+            return RecordingQuery([*self.calls, (name, column, value)])
+        return call
+
+    eq, gte, lt = _op("eq"), _op("gte"), _op("lt")
+
+
+def test_empty_filters_add_no_conditions():
+    assert apply_response_filters(RecordingQuery(), {}).calls == []
+    assert apply_response_filters(RecordingQuery(), {"event": "", "gender": None}).calls == []
+
+
+def test_filters_translate_to_conditions():
+    filters = {"event": "seoul", "affiliation": "서울대학교", "date_from": "2026-10-18", "date_to": "2026-10-19",
+               "gender": "여", "sweet": "3", "salty": "5"}
+    assert apply_response_filters(RecordingQuery(), filters).calls == [
+        ("eq", "이벤트", "seoul"),
+        ("eq", "소속키", "서울대학교"),
+        # 날짜는 한국 시각 0시 기준, date_to는 그날 끝까지 포함 (다음 날 0시 미만)
+        ("gte", "제출시간", "2026-10-18T00:00:00+09:00"),
+        ("lt", "제출시간", "2026-10-20T00:00:00+09:00"),
+        ("eq", "성별", "여"),
+        ("eq", "단맛선호", "3"),
+        ("eq", "짠맛선호", "5"),
+    ]
+
+
+CSV = (
+    "id,이벤트,소속키,성별,단맛선호,짠맛선호,제출시간\n"
+    "1,seoul,서울대학교,여,3,5,2026-10-17 14:59:59+00\n"   # 한국 시각 10-17 23:59:59
+    "2,seoul,서울대학교,여,3,5,2026-10-17 15:00:00+00\n"   # 10-18 00:00:00
+    "3,seoul,고려대학교,남,1,2,2026-10-19 23:59:59\n"
+    "4,seoul,서울대학교,남,3,2,2026-10-20 00:00:00\n"
+    "5,pyeongchang,서울대학교,여,3,5,2026-10-19 12:00:00\n"
+    "6,seoul,서울대학교,여,3,5,\n"
+)
+
+OPS = {"eq": operator.eq, "gte": operator.ge, "lt": operator.lt}
+
+
+def matches(row, calls):
+    for op, column, value in calls:
+        if column == "제출시간":
+            left, right = parse_submit_time(row[column]), parse_submit_time(value)
+            if left is None:
+                return False
+        else:
+            left, right = row[column], value
+        if not OPS[op](left, right):
+            return False
+    return True
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"event": "seoul"},
+    {"date_from": "2026-10-18"},
+    {"date_to": "2026-10-19"},
+    {"event": "seoul", "date_from": "2026-10-18", "date_to": "2026-10-19"},
+    {"affiliation": "서울대학교", "gender": "여", "sweet": "3", "salty": "5"},
+    {"gender": "남", "salty": "2", "date_to": "2026-10-20"},
+])
+def test_arrow_filter_agrees_with_query(filters):
+    table = with_submit_timestamps(read_responses_arrow(CSV))
+    header, *lines = [line.split(",") for line in CSV.splitlines()]
+    body = [dict(zip(header, line)) for line in lines]
+    calls = apply_response_filters(RecordingQuery(), filters).calls
+    expected = [int(row["id"]) for row in body if matches(row, calls)]
+    assert filter_response_table(table, filters)["id"].to_pylist() == expected
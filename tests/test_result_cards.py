@@ -0,0 +1,44 @@
+"""결과 카드 일괄 생성 - 소속 묶음·필터와 spawn 워커"""
+import zipfile
+
+import pandas as pd
+
+import result_cards
+
+ROWS = [
+    {"성명": "가", "이메일": "a@x.com", "소속": "서울대", "신장": "170", "체중": "60", "단맛선호": "1", "짠맛선호": "2"},
+    {"성명": "나", "이메일": "b@x.com", "소속": "서울대학교", "소속키": "서울대학교", "단맛선호": "3", "짠맛선호": "4"},
+    {"성명": "다", "이메일": "c@x.com", "소속": "서울대학교병원", "단맛선호": "5", "짠맛선호": "1"},
+]
+
+
+def test_group_affiliation_uses_key_for_rows_without_one():
+    assert [result_cards._group_affiliation(row) for row in ROWS] == ["서울대학교", "서울대학교", "서울대학교병원"]
+
+
+def test_plan_groups_by_affiliation_key():
+    jobs = result_cards._plan_jobs(ROWS, "pdf", "affiliation", "제목")
+    assert [(name, len(rows)) for name, _, rows, _ in jobs] == [("서울대학교.pdf", 2), ("서울대학교병원.pdf", 1)]
+
+
+def test_build_cards_zip_with_spawned_workers(tmp_path):
+    out = tmp_path / "cards.zip"
+    assert result_cards.build_cards_zip(ROWS[:2], out, workers=1) == 2
+    with zipfile.ZipFile(out) as zf:
+        names = zf.namelist()
+        assert all(zf.read(name).startswith(b"\x89PNG") for name in names)
+    assert sorted(names) == ["가_a.png", "나_b.png"]
+
+
+def test_cli_affiliation_filter_matches_key(tmp_path, monkeypatch):
+    csv = tmp_path / "rows.csv"
+    pd.DataFrame(ROWS).to_csv(csv, index=False, encoding="utf-8-sig")
+    built = {}
+
+    def fake_build(rows, out, **kwargs):
+        built["rows"] = rows
+        return len(rows)
+
+    monkeypatch.setattr(result_cards, "build_cards_zip", fake_build)
+    result_cards.main(["--csv", str(csv), "--affiliation", "SNU", "-o", str(tmp_path / "out.zip")])
+    assert [row["성명"] for row in built["rows"]] == ["가", "나"]
@@ -0,0 +1,54 @@
+"""재참여 판별 - 이메일은 정규화해 저장·조회하고, 메모리 집계(집합 또는 블룸 필터)로 바로 판단"""
+import sqlite3
+
+import pytest
+
+from migrations import MIGRATIONS, apply_migrations, connect_sqlite
+from mpti_core import RESPONSE_TABLE, BloomFilter, ResponseAggregates, build_response_row
+
+
+def test_build_response_row_stores_normalized_email():
+    row = build_response_row({"email": "  Hong.Gil_Dong@Example.COM ", "affiliation": "서울대"})
+    assert row["이메일"] == "hong.gil_dong@example.com"
+
+
+def test_sqlite_migration_normalizes_existing_emails(tmp_path):
+    path = str(tmp_path / "local.db")
+    conn = connect_sqlite(path)
+    apply_migrations(conn, "sqlite", log=lambda _: None)
+    conn.close()
+
+    # 정규화 이전에 저장된 행을 흉내 내고 마지막 버전을 다시 적용
+    db = sqlite3.connect(path)
+    db.execute(f'insert into {RESPONSE_TABLE} ("이메일") values (?), (?)', (" A@X.com", "b@x.com"))
+    db.execute("delete from schema_migrations where version = ?", (MIGRATIONS[-1][0],))
+    db.commit()
+    db.close()
+
+    conn = connect_sqlite(path)
+    assert apply_migrations(conn, "sqlite", log=lambda _: None) == [MIGRATIONS[-1][0]]
+    conn.close()
+    db = sqlite3.connect(path)
+    assert [r[0] for r in db.execute(f'select "이메일" from {RESPONSE_TABLE} order by id')] == ["a@x.com", "b@x.com"]
+    db.close()
+
+
+def test_bloom_filter_has_no_false_negatives_and_bounded_false_positives():
+    bloom = BloomFilter(capacity=10_000, error_rate=0.01)
+    added = [f"user{i}@example.com" for i in range(10_000)]
+    for email in added:
+        bloom.add(email)
+    assert all(email in bloom for email in added)
+    false_positives = sum(f"other{i}@example.com" in bloom for i in range(20_000))
+    assert false_positives / 20_000 < 0.02
+
+
+@pytest.mark.parametrize("approximate", [False, True])
+def test_has_participant_ignores_case_and_spaces(approximate):
+    agg = ResponseAggregates(approximate=approximate)
+    agg.rebuild([{"이메일": "Hong@Example.com"}, {"이메일": ""}])
+    assert agg.has_participant(" hong@example.COM ")
+    assert not agg.has_participant("kim@example.com")
+    assert not agg.has_participant("")
+    agg.add({"이메일": "kim@example.com"})
+    assert agg.has_participant("KIM@example.com")
@@ -0,0 +1,35 @@
+"""소속별 시료 선택 비율과 응답 수"""
+import pandas as pd
+
+from mpti_charts import share_matrices
+
+
+def test_counts_rows_even_when_a_column_is_missing():
+    df = pd.DataFrame({
+        "소속키": ["서울대학교", "서울대학교", "서울대학교", "고려대학교", None, ""],
+        "단맛선호": ["1", "1", "2", "3", "1", "1"],
+        # 한 명은 짠맛을 고르지 않음 - 예전에는 (3 + 2) // 2 = 2명으로 셌음
+        "짠맛선호": ["5", None, "", "4", "5", "5"],
+    })
+    shares, n = share_matrices(df, samples=("1", "2", "3", "4", "5"))
+    assert n.to_dict() == {"서울대학교": 3, "고려대학교": 1}
+    assert list(shares["단맛선호"].index) == ["서울대학교", "고려대학교"]
+    assert shares["단맛선호"].loc["서울대학교"].tolist() == [2 / 3, 1 / 3, 0, 0, 0]
+    assert shares["짠맛선호"].loc["서울대학교"].tolist() == [0, 0, 0, 0, 1]
+
+
+def test_limit_folds_the_rest_into_others():
+    df = pd.DataFrame({
+        "소속키": ["A"] * 4 + ["B"] * 3 + ["C"] * 2 + ["D"],
+        "단맛선호": ["1"] * 10,
+        "짠맛선호": ["2"] * 9 + [None],
+    })
+    shares, n = share_matrices(df, limit=2)
+    assert n.to_dict() == {"A": 4, "B": 3, "기타": 3}
+    assert list(shares["짠맛선호"].index) == ["A", "B", "기타"]
+    assert shares["단맛선호"]["1"].tolist() == [1.0, 1.0, 1.0]
+
+
+def test_no_choices_returns_empty():
+    shares, n = share_matrices(pd.DataFrame({"소속키": ["A"], "단맛선호": [None], "짠맛선호": [""]}))
+    assert shares == {} and n.empty
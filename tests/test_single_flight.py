@@ -0,0 +1,57 @@
+"""같은 키의 동시 조회 합치기"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from mpti_core import SingleFlight
+
+
+def run_concurrently(flight, key, fn, n):
+    """n개 호출을 동시에 시작하고, 모두 합류한 뒤에 fn이 끝나도록 함"""
+    release = threading.Event()
+
+    def leader_fn():
+        release.wait(2)
+        return fn()
+
+    with ThreadPoolExecutor(n) as pool:
+        futures = [pool.submit(flight.do, key, leader_fn) for _ in range(n)]
+        while sum(m["issued"] + m["coalesced"] for m in flight.metrics().values()) < n:
+            time.sleep(0.001)
+        release.set()
+        return futures
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    futures = run_concurrently(flight, ("rows", "seoul", 0), lambda: calls.append(1) or ["row"], 8)
+    assert [f.result() for f in futures] == [["row"]] * 8
+    assert calls == [1]
+    assert flight.metrics() == {"rows": {"issued": 1, "coalesced": 7}}
+    assert flight.in_flight() == 0
+
+
+def test_error_is_shared_and_not_kept():
+    flight = SingleFlight()
+
+    def fail():
+        raise ConnectionError("down")
+
+    futures = run_concurrently(flight, ("table", "seoul", 0), fail, 4)
+    for future in futures:
+        with pytest.raises(ConnectionError):
+            future.result()
+    # 끝난 결과(오류 포함)는 보관하지 않으므로 다음 호출은 다시 실행
+    assert flight.do(("table", "seoul", 0), lambda: "ok") == "ok"
+    assert flight.metrics()["table"] == {"issued": 2, "coalesced": 3}
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    assert flight.do(("rows", "seoul", 0), lambda: 1) == 1
+    assert flight.do(("rows", "seoul", 1000), lambda: 2) == 2
+    assert flight.do(("funnel", "seoul", 0), lambda: 3) == 3
+    assert flight.metrics() == {"rows": {"issued": 2, "coalesced": 0}, "funnel": {"issued": 1, "coalesced": 0}}
@@ -0,0 +1,97 @@
+"""고정 메모리 스케치 - 정확도와 이벤트 간 병합"""
+import random
+
+import pytest
+
+from mpti_core import HyperLogLog, ResponseAggregates, ResponseSketch, TDigest
+
+
+def emails(start, stop):
+    return [f"user{i}@example.com" for i in range(start, stop)]
+
+
+@pytest.mark.parametrize("n", [1, 50, 1000, 20000])
+def test_hyperloglog_accuracy(n):
+    hll = HyperLogLog()
+    for email in emails(0, n):
+        hll.add(email)
+        hll.add(email)  # 중복은 세지 않음
+    # p=12의 표준 오차 약 1.6% - 여유 있게 5%
+    assert abs(hll.count() - n) <= max(1, 0.05 * n)
+
+
+def test_hyperloglog_merge_counts_union():
+    a, b, both = HyperLogLog(), HyperLogLog(), HyperLogLog()
+    for email in emails(0, 6000):
+        a.add(email)
+        both.add(email)
+    for email in emails(4000, 10000):
+        b.add(email)
+        both.add(email)
+    assert a.merge(b).registers == both.registers
+    assert abs(a.count() - 10000) <= 500
+
+
+def test_hyperloglog_rejects_different_precision():
+    assert HyperLogLog().count() == 0
+    with pytest.raises(ValueError):
+        HyperLogLog(p=12).merge(HyperLogLog(p=10))
+
+
+def true_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def test_tdigest_quantiles_are_close():
+    rng = random.Random(7)
+    values = [rng.gauss(40, 12) for _ in range(20000)]
+    digest = TDigest()
+    for value in values:
+        digest.add(value)
+    spread = max(values) - min(values)
+    for q in (0.01, 0.1, 0.5, 0.9, 0.99):
+        assert abs(digest.quantile(q) - true_quantile(values, q)) < 0.01 * spread
+    assert digest.quantile(0) == min(values)
+    assert digest.quantile(1) == max(values)
+    # 양 끝은 작은 중심점으로 남으므로 compression의 몇 배까지 - 값 개수보다 훨씬 적음
+    assert len(digest.centroids) < 10 * digest.compression
+
+
+def test_tdigest_merge_matches_single_digest():
+    rng = random.Random(11)
+    left = [rng.uniform(18, 40) for _ in range(3000)]
+    right = [rng.uniform(30, 80) for _ in range(5000)]
+    a, b = TDigest(), TDigest()
+    for value in left:
+        a.add(value)
+    for value in right:
+        b.add(value)
+    merged = a.merge(b)
+    everything = left + right
+    assert merged.count == len(everything)
+    for q in (0.1, 0.25, 0.5, 0.75, 0.9):
+        assert abs(merged.quantile(q) - true_quantile(everything, q)) < 0.01 * (80 - 18)
+    assert TDigest().quantile(0.5) is None
+
+
+def make_rows(event_emails, ages):
+    return [{"이메일": email, "나이": age, "신장": 170, "체중": 65, "소속": "서울대", "단맛선호": "3", "짠맛선호": "1"}
+            for email, age in zip(event_emails, ages)]
+
+
+def test_response_sketch_merges_events():
+    seoul, pyeongchang = ResponseAggregates(), ResponseAggregates()
+    seoul.rebuild(make_rows(emails(0, 300), [20 + i % 10 for i in range(300)]))
+    # 두 이벤트 모두 참여한 100명은 한 번만 셈
+    pyeongchang.rebuild(make_rows(emails(200, 500), [60 + i % 10 for i in range(300)]))
+
+    total = ResponseSketch().merge(seoul.sketch()).merge(pyeongchang.sketch())
+    assert total.count == 600
+    assert abs(total.participants.count() - 500) <= 10
+    assert total.sweet == {"3": 600} and total.salty == {"1": 600}
+    assert total.by_affiliation == {"서울대학교": 600}
+    low, median, high = total.quantiles("age", (0.25, 0.5, 0.75))
+    assert 20 <= low < 30 and 60 <= high < 70 and 20 <= median < 70
+    # 원본 집계는 병합으로 바뀌지 않음
+    assert seoul.sketch().count == 300
@@ -0,0 +1,61 @@
+"""제출시간 변환 - PostgREST CSV 경로와 시간대 표기"""
+from datetime import datetime
+
+import pytest
+
+from mpti_core import SUBMIT_TZ, normalize_response, parse_submit_time, read_responses_arrow, with_submit_timestamps
+
+# PostgREST .csv() 응답 그대로 (timestamptz는 "+00"처럼 시만 붙음)
+POSTGREST_CSV = (
+    "id,이메일,제출시간,이벤트\n"
+    "1,a@x.com,2026-10-19 01:00:00+00,seoul\n"
+    "2,b@x.com,2026-10-19 01:00:00.123456+00,seoul\n"
+    "3,c@x.com,2026-10-19 10:00:00,seoul\n"
+    "4,d@x.com,2026-10-19T10:00:00+09:00,seoul\n"
+    "5,e@x.com,2026-10-19T01:00:00Z,seoul\n"
+    "6,f@x.com,2026-10-19 01:00:00+0000,seoul\n"
+    "7,g@x.com,,seoul\n"
+)
+
+
+def test_postgrest_csv_timestamptz_round_trip():
+    table = with_submit_timestamps(read_responses_arrow(POSTGREST_CSV))
+    submitted = table["제출시간"].to_pylist()
+    expected = datetime(2026, 10, 19, 10, 0, tzinfo=SUBMIT_TZ)
+    assert submitted[0] == expected
+    assert submitted[1].replace(microsecond=0) == expected
+    # 시간대 없는 값은 한국 시각
+    for value in submitted[2:6]:
+        assert value == expected
+    assert submitted[6] is None
+
+
+@pytest.mark.parametrize("text", [
+    "2026-10-19 01:00:00+00",
+    "2026-10-19 01:00:00+00:00",
+    "2026-10-19T01:00:00Z",
+    "2026-10-19 10:00:00",
+])
+def test_parse_submit_time_agrees(text):
+    assert parse_submit_time(text) == datetime(2026, 10, 19, 10, 0, tzinfo=SUBMIT_TZ)
+
+
+IMPORTED = {"email": "a@x.com", "name": "홍길동", "gender": "여", "age": "30", "height": "160", "weight": "50",
+            "sweet_preference": "3", "salty_preference": "5.0"}
+
+
+@pytest.mark.parametrize("text", [
+    "2026-10-19T01:00:00Z",
+    "2026-10-19 01:00:00+00:00",
+    "2026-10-19T10:00:00+09:00",
+    "2026-10-18T20:00:00-05:00",
+    "2026-10-19 10:00:00",
+])
+def test_normalize_response_converts_offsets_to_kst(text):
+    assert normalize_response({**IMPORTED, "제출시간": text})["제출시간"] == "2026-10-19 10:00:00"
+
+
+@pytest.mark.parametrize("text", ["", "어제", "2026-13-01 10:00:00"])
+def test_normalize_response_rejects_bad_submit_time(text):
+    with pytest.raises(ValueError, match="제출시간"):
+        normalize_response({**IMPORTED, "제출시간": text})